@@ -5,6 +5,7 @@ from sqlalchemy import pool
 
 from alembic import context
 from app.db.base import Base  # important for autogenerate
+from app.db.search import UNMAPPED_COLUMNS, UNMAPPED_TABLES
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -27,6 +28,15 @@ target_metadata = Base.metadata  # important for autogenerate
 # ... etc.
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Skip search objects that exist only in the database, not on the models."""
+    if type_ == "table" and name in UNMAPPED_TABLES:
+        return False
+    if type_ == "column" and (object.table.name, name) in UNMAPPED_COLUMNS:
+        return False
+    return True
+
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sqlite.db")
 config.set_main_option("sqlalchemy.url", DATABASE_URL)
 
@@ -48,6 +58,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -71,7 +82,8 @@ def run_migrations_online() -> None:
         context.configure(
             connection=connection, 
             target_metadata=target_metadata,
-            render_as_batch=True
+            render_as_batch=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
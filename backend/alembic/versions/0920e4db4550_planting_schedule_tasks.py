@@ -0,0 +1,123 @@
+"""Planting schedule tasks
+
+Revision ID: 0920e4db4550
+Revises: 5f343ff07c49
+Create Date: 2026-10-18 09:10:21.803611
+
+"""
+import uuid
+from datetime import timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0920e4db4550'
+down_revision: Union[str, Sequence[str], None] = '5f343ff07c49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Crop templates and expansion as of this revision, frozen so that replaying
+# it always produces the same tasks: (season days, irrigate every n days, stop
+# irrigating n days before harvest, fertilizing (day, what), harvest window
+# opens n days before, closes n days after)
+TEMPLATES = {
+    "maize": (110, 7, 21, ((14, "basal NPK"), (42, "urea top-dressing")), 7, 14),
+    "rice": (120, 5, 14, ((21, "basal NPK"), (45, "urea top-dressing"), (65, "urea at panicle initiation")), 7, 10),
+    "sorghum": (115, 10, 21, ((21, "basal NPK"), (42, "urea top-dressing")), 7, 14),
+    "cowpea": (75, 7, 14, ((14, "single superphosphate"),), 5, 10),
+    "tomato": (90, 3, 7, ((14, "NPK"), (35, "calcium nitrate"), (55, "potash")), 0, 30),
+    "cassava": (300, 14, 120, ((30, "NPK"), (90, "potash")), 0, 60),
+    "yam": (240, 14, 60, ((60, "NPK"), (120, "potash")), 0, 45),
+}
+DEFAULT_TEMPLATE = (100, 7, 14, ((21, "NPK"),), 7, 14)
+ALIASES = {
+    "corn": "maize",
+    "paddy": "rice",
+    "beans": "cowpea",
+    "cowpeas": "cowpea",
+    "tomatoes": "tomato",
+    "guinea corn": "sorghum",
+}
+
+
+def expand(crop_name, sowing_date, harvest_date_est, status):
+    """(kind, title, due_date, end_date) for each of a schedule's tasks."""
+    if (status or "").lower() in ("completed", "cancelled"):
+        return []
+    name = " ".join(crop_name.split()).lower()
+    season_days, every, stop, fertilizing, before, after = TEMPLATES.get(ALIASES.get(name, name), DEFAULT_TEMPLATE)
+    crop = crop_name.strip()
+    harvest = harvest_date_est or sowing_date + timedelta(days=season_days)
+    season = max((harvest - sowing_date).days, 1)
+    stretch = season / season_days
+
+    tasks = [
+        ("fertilizing", f"Apply {what} to {crop}", sowing_date + timedelta(days=round(day * stretch)), None)
+        for day, what in fertilizing
+    ]
+    tasks.extend(
+        ("irrigation", f"Irrigate {crop}", sowing_date + timedelta(days=day), None)
+        for day in range(every, season - stop + 1, every)
+    )
+    tasks.append(("harvest", f"Harvest {crop}", harvest - timedelta(days=before), harvest + timedelta(days=after)))
+    return tasks
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ### commands auto generated by Alembic - please adjust! ###
+    tasks = op.create_table('crop_schedule_tasks',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('schedule_id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['schedule_id'], ['crop_planting_schedules.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('crop_schedule_tasks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_crop_schedule_tasks_id'), ['id'], unique=True)
+        batch_op.create_index(batch_op.f('ix_crop_schedule_tasks_schedule_id'), ['schedule_id'], unique=False)
+        batch_op.create_index('ix_crop_schedule_tasks_user_id_due_date', ['user_id', 'due_date'], unique=False)
+
+    # ### end Alembic commands ###
+    # Materialize tasks for existing schedules
+    schedules = sa.table(
+        'crop_planting_schedules',
+        sa.column('id', sa.Uuid()),
+        sa.column('user_id', sa.Uuid()),
+        sa.column('crop_name', sa.String()),
+        sa.column('sowing_date', sa.Date()),
+        sa.column('harvest_date_est', sa.Date()),
+        sa.column('status', sa.String()),
+    )
+    rows = [
+        {
+            "id": uuid.uuid4(), "schedule_id": schedule_id, "user_id": user_id,
+            "kind": kind, "title": title, "due_date": due_date, "end_date": end_date,
+        }
+        for schedule_id, user_id, crop_name, sowing_date, harvest_date_est, status in op.get_bind().execute(
+            sa.select(schedules)
+        )
+        for kind, title, due_date, end_date in expand(crop_name, sowing_date, harvest_date_est, status)
+    ]
+    if rows:
+        op.bulk_insert(tasks, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('crop_schedule_tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_crop_schedule_tasks_user_id_due_date')
+        batch_op.drop_index(batch_op.f('ix_crop_schedule_tasks_schedule_id'))
+        batch_op.drop_index(batch_op.f('ix_crop_schedule_tasks_id'))
+
+    op.drop_table('crop_schedule_tasks')
+    # ### end Alembic commands ###
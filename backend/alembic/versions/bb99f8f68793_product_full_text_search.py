@@ -0,0 +1,77 @@
+"""Product full-text search
+
+Revision ID: bb99f8f68793
+Revises: 4d6b6dc800eb
+Create Date: 2026-10-18 08:01:59.004470
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bb99f8f68793'
+down_revision: Union[str, Sequence[str], None] = '4d6b6dc800eb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_CONFIG = "english"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute(f"""
+            ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B') ||
+                setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(category, '')), 'C')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX ix_products_search_vector ON products USING gin (search_vector)")
+    elif dialect == "sqlite":
+        # NOTE: batch migrations that recreate `products` drop these triggers and
+        # renumber rowids; re-run the DDL and the 'rebuild' afterwards
+        op.execute("""
+            CREATE VIRTUAL TABLE products_fts USING fts5(
+                name, description, category,
+                content='products', content_rowid='rowid', tokenize='unicode61'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts(rowid, name, description, category)
+                VALUES (new.rowid, new.name, new.description, new.category);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name, description, category)
+                VALUES ('delete', old.rowid, old.name, old.description, old.category);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description, category ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name, description, category)
+                VALUES ('delete', old.rowid, old.name, old.description, old.category);
+                INSERT INTO products_fts(rowid, name, description, category)
+                VALUES (new.rowid, new.name, new.description, new.category);
+            END
+        """)
+        op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_products_search_vector")
+        op.execute("ALTER TABLE products DROP COLUMN IF EXISTS search_vector")
+    elif dialect == "sqlite":
+        for trigger in ("products_fts_au", "products_fts_ad", "products_fts_ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,117 @@
+"""HTTP response caching for public read endpoints.
+
+Routers opt in with ``APIRouter(route_class=CachedRoute)`` and mark endpoints
+with ``@cache_response("<namespace>")``. Responses are keyed by path and
+normalized query params under a per-namespace generation; write handlers call
+``response_cache.invalidate(namespace)`` which bumps the generation so every
+older entry is skipped and ages out of the backend.
+"""
+import hashlib
+import json
+from typing import Callable, Optional
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.utils.cache import CacheBackend, build_cache_backend, cache_settings
+
+
+class ResponseCache:
+    def __init__(self, backend: CacheBackend, ttl: int, client_max_age: int = 0):
+        self.backend = backend
+        self.ttl = ttl
+        self.cache_control = f"public, max-age={client_max_age}, must-revalidate"
+
+    async def generation(self, namespace: str) -> int:
+        return await self.backend.get_counter(f"gen:{namespace}")
+
+    async def invalidate(self, *namespaces: str):
+        """Drop every cached response in the given namespaces."""
+        for namespace in namespaces:
+            await self.backend.incr(f"gen:{namespace}")
+
+    async def clear(self):
+        await self.backend.clear()
+
+    @staticmethod
+    def key(request: Request, namespace: str, generation: int) -> str:
+        params = sorted((k, v) for k, v in request.query_params.multi_items() if v != "")
+        return f"resp:{namespace}:{generation}:{request.url.path}?{urlencode(params)}"
+
+
+response_cache = ResponseCache(
+    build_cache_backend(),
+    ttl=cache_settings.CACHE_TTL,
+    client_max_age=cache_settings.CACHE_CLIENT_MAX_AGE,
+)
+
+
+def cache_response(namespace: str) -> Callable:
+    """Mark an endpoint as cacheable; place it below ``@router.get``."""
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__cache_namespace__ = namespace
+        return endpoint
+    return decorator
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+# Headers set by the framework for each response; never replayed from cache
+_SKIP_HEADERS = {"content-length", "content-type", "etag", "cache-control"}
+
+
+def _respond(request: Request, body: bytes, meta: dict, status: str) -> Response:
+    headers = {
+        **meta["headers"],
+        "ETag": meta["etag"],
+        "Cache-Control": response_cache.cache_control,
+        "X-Cache": status,
+    }
+    if _etag_matches(request, meta["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=meta["media_type"], headers=headers)
+
+
+class CachedRoute(APIRoute):
+    """APIRoute that serves ``@cache_response`` endpoints from ``response_cache``."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        namespace: Optional[str] = getattr(self.endpoint, "__cache_namespace__", None)
+        if namespace is None:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            if request.method != "GET":
+                return await handler(request)
+
+            key = response_cache.key(request, namespace, await response_cache.generation(namespace))
+            entry = await response_cache.backend.get(key)
+            if entry is not None:
+                meta, body = entry.split(b"\n", 1)
+                return _respond(request, body, json.loads(meta), "HIT")
+
+            response = await handler(request)
+            if response.status_code != 200 or not isinstance(getattr(response, "body", None), bytes):
+                return response
+
+            meta = {
+                "etag": f'"{hashlib.sha1(response.body).hexdigest()}"',
+                "media_type": response.media_type or "application/json",
+                "headers": {
+                    k: v for k, v in response.headers.items() if k not in _SKIP_HEADERS
+                },
+            }
+            await response_cache.backend.set(
+                key, json.dumps(meta).encode() + b"\n" + response.body, response_cache.ttl
+            )
+            return _respond(request, response.body, meta, "MISS")
+
+        return cached_handler
@@ -1,28 +1,38 @@
-from typing import Generator
+from typing import AsyncGenerator
+from uuid import UUID
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from app.schemas.token import settings
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import AsyncSessionLocal
+from app.models.users import UserRole
+from app.schemas.token import Principal
+from app.utils.jwt import TokenError, decode_access_token, verified_tokens
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-def get_db() -> Generator:
-    """Dependency that provides a database session"""
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency that provides an async database session"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Decode JWT token to get current user ID."""
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """Resolve the bearer token to the calling user, verifying each token once."""
+    return resolve_principal(token)
+
+def resolve_principal(token: str) -> Principal:
+    """Principal for an access token; raises 401 when it is invalid or expired."""
+    principal = verified_tokens.get(token)
+    if principal is not None:
+        return principal
+
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=["HS256"])
-        user_id: str = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return user_id
-    except JWTError:
+        payload = decode_access_token(token)
+    except TokenError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+    try:
+        principal = Principal(id=UUID(payload["sub"]), role=payload.get("role", UserRole.USER))
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    verified_tokens.put(token, principal, payload.get("exp"))
+    return principal
@@ -6,6 +6,7 @@ from .chats import router as chats_router
 from .auth import router as auth_router
 from .community import router as community_router
 from .crop import router as crop_router
+from .internal import router as internal_router
 
 __all__ = [
     "farmers_router",
@@ -16,4 +17,5 @@ __all__ = [
     "auth_router",
     "community_router",
     "crop_router",
+    "internal_router",
 ]
@@ -1,24 +1,25 @@
 """API Router for Authentication Endpoints."""
-from jose import jwt, JWTError
+from uuid import UUID
 from fastapi import APIRouter, Body, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.user import UserRegister, UserLogin
-from app.schemas.token import settings
+from app.schemas.token import Principal
 from app.api.deps import get_db, get_current_user
-from app.models.users import User
-from app.utils.security import hash_password, verify_password
-from app.utils.jwt import create_access_token, create_refresh_token, decode_refresh_token
+from app.models.users import User, UserRole
+from app.utils.security import password_hasher
+from app.utils.jwt import TokenError, create_access_token, create_refresh_token, decode_refresh_token
+from app.utils.revocation import revocation_store
 
 router = APIRouter()
 
 # oauth2_scheme and get_current_user moved to app.api.deps
 
 @router.post("/register")
-def register(payload: UserRegister, db: Session = Depends(get_db)):
+async def register(payload: UserRegister, db: AsyncSession = Depends(get_db)):
     """Registers a new User on the platform."""
 
-    existing_user = User.get_by_email(db, email=payload.email)
+    existing_user = await User.get_by_email(db, email=payload.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -27,7 +28,7 @@ def register(payload: UserRegister, db: Session = Depends(get_db)):
 
     new_user = User(
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=await password_hasher.hash(payload.password),
         first_name=payload.first_name,
         last_name=payload.last_name,
         username=payload.username,
@@ -38,8 +39,8 @@ def register(payload: UserRegister, db: Session = Depends(get_db)):
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return {
         "id": new_user.id,
@@ -49,7 +50,7 @@ def register(payload: UserRegister, db: Session = Depends(get_db)):
     }
 
 @router.post("/login")
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """Log in a user using email or phone + password."""
     # Ensure one of email or phone is provided
     if not (credentials.email or credentials.phone):
@@ -59,9 +60,9 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
         )
 
     user = (
-        User.get_by_email(db, email=credentials.email)
+        await User.get_by_email(db, email=credentials.email)
         if credentials.email
-        else User.get_by_phone(db, phone=credentials.phone)
+        else await User.get_by_phone(db, phone=credentials.phone)
     )
 
     if not user:
@@ -69,14 +70,21 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials."
         )
 
-    if not verify_password(credentials.password, user.password_hash):
+    valid, new_hash = await password_hasher.verify_and_update(credentials.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials."
         )
 
+    # Transparently upgrade hashes made with an older scheme or cost
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+
     # Generate tokens
-    access_token = create_access_token({"sub": str(user.id)})
-    refresh_token = create_refresh_token({"sub": str(user.id)})
+    claims = {"sub": str(user.id), "role": UserRole(user.role).value}
+    access_token = create_access_token(claims)
+    refresh_token = create_refresh_token(claims)
 
     return {
         "message": "Login successful",
@@ -87,40 +95,54 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.post("/refresh")
-def refresh(token: str):
-    """Refreshes an access token using a refresh token."""
+async def refresh(token: str, db: AsyncSession = Depends(get_db)):
+    """Exchanges a refresh token for a new access token and a rotated refresh token."""
     try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_REFRESH_SECRET_KEY,
-            algorithms=["HS256"]
-        )
-        user_id: str = payload.get("sub") # type: ignore
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
+        payload = decode_refresh_token(token)
+    except TokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
 
-    except JWTError:
+    user_id: str = payload.get("sub") # type: ignore
+    jti = payload.get("jti")
+    if not user_id or not jti:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    # Create new access token
-    new_access = create_access_token({"sub": user_id})
+    # Revoking doubles as the reuse check: only the first caller wins a given jti
+    if not await revocation_store.revoke(db, jti, payload["exp"]):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+
+    # Roles come from the user row, not the old token, so demotions take effect on refresh
+    try:
+        user = await db.get(User, UUID(user_id))
+    except ValueError:
+        user = None
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid token")
 
+    claims = {"sub": str(user.id), "role": UserRole(user.role).value}
     return {
-        "access_token": new_access,
+        "access_token": create_access_token(claims),
+        "refresh_token": create_refresh_token(claims),
         "token_type": "bearer"
     }
 
 @router.get("/me")
-def profile(user_id: str = Depends(get_current_user)):
+def profile(current_user: Principal = Depends(get_current_user)):
     """Fetch the profile of the currently authenticated user."""
-    return {"user_id": user_id}
+    return {"user_id": str(current_user.id), "role": current_user.role}
 
-@router.get("/logout")
-def logout(refresh_token: str = Body(..., embed=True)):
-    """Logs out the user by blacklisting the refresh token."""
+@router.post("/logout")
+async def logout(refresh_token: str = Body(..., embed=True), db: AsyncSession = Depends(get_db)):
+    """Logs out the user by revoking the refresh token until it expires."""
     try:
-        pass
-        # payload = decode_refresh_token(refresh_token)
-        # jti = payload.get("jti")
-    except Exception:
+        payload = decode_refresh_token(refresh_token)
+    except TokenError:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid token")
+
+    jti = payload.get("jti")
+    if not jti:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid token")
+
+    # Idempotent: logging out twice is not an error
+    await revocation_store.revoke(db, jti, payload["exp"])
+    return {"message": "Logged out"}
@@ -1,49 +1,176 @@
-from fastapi import APIRouter
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.api.deps import get_db, get_current_user, resolve_principal
+from app.models.conversation import Conversation, ConversationParticipant, Message
+from app.models.users import User
+from app.schemas.chat import ConversationCreate, ConversationResponse, MessageCreate, MessageResponse
+from app.schemas.token import Principal
+from app.utils.chat_hub import chat_hub
+from app.utils.message_writer import message_writer
+from app.utils.pagination import keyset_page, next_cursor
 
 router = APIRouter()
 
-@router.get('/posts')
-def list_posts():
-    return [{"id": 1, "user": "John", "message": "Hello farmers!"}]
+def channel(chat_id: UUID) -> str:
+    return f"chat:{chat_id}"
 
-@router.post('/posts')
-def create_post(message: dict):
-    return {"id": 2, **message}
+def conversation_response(conversation: Conversation) -> ConversationResponse:
+    return ConversationResponse(
+        id=conversation.id,
+        title=conversation.title,
+        participant_ids=[p.user_id for p in conversation.participants],
+        created_at=conversation.created_at,
+        last_message_at=conversation.last_message_at,
+    )
 
-@router.get('/{post_id}')
-def get_post(post_id: int):
-    return {"id": post_id, "messages": []}
+async def ensure_participant(db: AsyncSession, chat_id: UUID, user_id: UUID):
+    """404 unless the user belongs to the conversation (existence is not leaked)."""
+    if await db.get(ConversationParticipant, (chat_id, user_id)) is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
 
-@router.put('/{post_id}')
-def update_post(post_id: int, post: dict):
-    return {"id": post_id, **post}
+async def post_message(chat_id: UUID, sender_id: UUID, content: str) -> MessageResponse:
+    """Queue a message for write-behind persistence and fan it out to live sockets."""
+    result = MessageResponse.model_validate(await message_writer.enqueue(chat_id, sender_id, content))
+    await chat_hub.publish(channel(chat_id), {"type": "message", **result.model_dump(mode="json")})
+    return result
 
-@router.delete('/{post_id}')
-def delete_post(post_id: int):
-    return {"message": f"Chat {post_id} deleted"}
+# --- Conversations ---
 
-# Comments for messages
-@router.post('/{chat_id}/comments')
-def add_comment(chat_id: int, comment: dict):
-    return {"id": 1, "chat_id": chat_id, **comment}
+@router.post("/", response_model=ConversationResponse, status_code=status.HTTP_201_CREATED)
+async def create_conversation(
+    conversation_in: ConversationCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    member_ids = set(conversation_in.participant_ids) | {current_user.id}
+    found = await db.scalar(select(func.count()).select_from(User).where(User.id.in_(member_ids)))
+    if found != len(member_ids):
+        raise HTTPException(status_code=404, detail="Participant not found")
 
-@router.get('/{chat_id}/comments')
-def list_comments(chat_id: int):
-    return [{"id": 1, "chat_id": chat_id, "comment": "Great post!"}]
+    conversation = Conversation(
+        title=conversation_in.title,
+        participants=[ConversationParticipant(user_id=user_id) for user_id in member_ids],
+    )
+    db.add(conversation)
+    await db.commit()
+    await db.refresh(conversation, ["created_at"])
+    return conversation_response(conversation)
 
-@router.delete('/comments/{comment_id}')
-def delete_comment(comment_id: int):
-    return {"message": f"Comment {comment_id} deleted"}
+@router.get("/", response_model=List[ConversationResponse])
+async def list_conversations(
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """The caller's conversations, most recently active first.
 
-# Chat messages
-@router.post('/{chat_id}/send')
-def send_chat(chat_id: int, message: dict):
-    return {"id": 1, "chat_id": chat_id, **message}
+    ``last_message_at`` trails live traffic by at most one flush interval.
+    """
+    conversations = await db.scalars(
+        select(Conversation)
+        .join(ConversationParticipant, ConversationParticipant.conversation_id == Conversation.id)
+        .where(ConversationParticipant.user_id == current_user.id)
+        .options(selectinload(Conversation.participants))
+        .order_by(Conversation.last_message_at.desc().nulls_last(), Conversation.created_at.desc())
+        .limit(limit)
+    )
+    return [conversation_response(c) for c in conversations]
 
-@router.get('/{chat_id}')
-def get_chat(chat_id: int):
-    return [{"id": 1, "chat_id": chat_id, "message": "Hello!"}]
+# --- Messages ---
 
-@router.delete('/{chat_id}')
-def delete_chat_message(chat_id: int, message_id: int):
-    return {"message": f"Message {message_id} from chat {chat_id} deleted"}
\ No newline at end of file
+@router.get("/{chat_id}", response_model=List[MessageResponse])
+async def get_chat(
+    chat_id: UUID,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from a previous page"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Message history newest first; the next (older) page's cursor is sent in X-Next-Cursor."""
+    await ensure_participant(db, chat_id, current_user.id)
+    # Read-your-writes: persist this conversation's queued messages first
+    await message_writer.sync(chat_id)
+    query = keyset_page(
+        select(Message).where(Message.conversation_id == chat_id),
+        Message, cursor, db.get_bind().dialect.name,
+    )
+    messages = (await db.scalars(query.limit(limit + 1))).all()
+
+    cursor_out = next_cursor(messages, limit)
+    if cursor_out:
+        response.headers["X-Next-Cursor"] = cursor_out
+    return messages[:limit]
+
+@router.post("/{chat_id}/send", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
+async def send_chat(
+    chat_id: UUID,
+    message: MessageCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    await ensure_participant(db, chat_id, current_user.id)
+    return await post_message(chat_id, current_user.id, message.content)
+
+@router.delete("/{chat_id}/messages/{message_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_chat_message(
+    chat_id: UUID,
+    message_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    await message_writer.sync(chat_id)
+    message = await db.get(Message, message_id)
+    if message is None or message.conversation_id != chat_id:
+        raise HTTPException(status_code=404, detail="Message not found")
+    if message.sender_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to delete this message")
+
+    await db.delete(message)
+    await db.commit()
+    await chat_hub.publish(channel(chat_id), {"type": "message_deleted", "id": str(message_id)})
+
+# --- Real-time ---
+
+@router.websocket("/{chat_id}/ws")
+async def chat_socket(
+    websocket: WebSocket,
+    chat_id: UUID,
+    token: str = Query(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """Live messages for a conversation.
+
+    Browsers cannot set headers on a WebSocket handshake, so the access token
+    is passed as ``?token=``. Clients send ``{"content": "..."}`` frames and
+    receive every message posted to the conversation, including their own.
+    Messages are persisted by the write-behind writer, so after the
+    membership check the socket holds no database connection at all.
+    """
+    try:
+        principal = resolve_principal(token)
+        await ensure_participant(db, chat_id, principal.id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    finally:
+        await db.rollback()
+    await websocket.accept()
+
+    async def on_receive(frame: str) -> Optional[dict]:
+        try:
+            message = MessageCreate.model_validate_json(frame)
+        except ValidationError as e:
+            return {"type": "error", "detail": e.errors(include_url=False, include_context=False)}
+        await post_message(chat_id, principal.id, message.content)
+        return None
+
+    try:
+        await chat_hub.serve(channel(chat_id), websocket, on_receive)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
@@ -1,68 +1,222 @@
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
+from app.api.cache import CachedRoute, cache_response, response_cache
 from app.api.deps import get_db, get_current_user
-from app.models.community import Post, Comment
-from app.schemas.community import PostCreate, PostUpdate, PostResponse, CommentCreate, CommentResponse
+from app.schemas.token import Principal
+from app.models.community import Post, Comment, PostLike
+from app.schemas.community import PostCreate, PostUpdate, PostResponse, CommentCreate, CommentResponse, LikeResponse
+from app.utils.feed import hot_score, refresh_scores
+from app.utils.likes import like_buffer
+from app.utils.pagination import keyset_page, next_cursor
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 # --- Posts ---
 
 @router.get("/posts", response_model=List[PostResponse])
-def list_posts(
-    skip: int = 0, 
-    limit: int = 20, 
+@cache_response("posts")
+async def list_posts(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from a previous page; switches to keyset pagination"),
     category: Optional[str] = None,
-    db: Session = Depends(get_db)
+    sort: Literal["new", "hot"] = Query("new", description="new: newest first; hot: time-decayed engagement score"),
+    comments: Optional[int] = Query(None, ge=0, le=100, description="Embed only each post's first N comments; all by default"),
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(Post)
+    """List posts newest first (or hottest first with ``sort=hot``).
+
+    For the newest-first feed the next page's cursor is sent in X-Next-Cursor;
+    the hot feed reorders as scores change and pages with ``skip`` only.
+    Every comment is embedded, oldest first, unless ``comments=N`` limits it
+    to the first N; ``comments_count`` always carries the full count, and the
+    rest can be paged from ``/posts/{id}/comments?skip=N``.
+    """
+    query = select(Post)
     if category:
-        query = query.filter(Post.category == category)
-    return query.order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
+        query = query.where(Post.category == category)
+    if sort == "hot":
+        if cursor is not None:
+            raise HTTPException(status_code=400, detail="Cursor pagination is only supported for sort=new")
+        query = query.order_by(Post.score.desc(), Post.id.desc()).offset(skip)
+    else:
+        query = keyset_page(query, Post, cursor, db.get_bind().dialect.name)
+        if cursor is None:
+            query = query.offset(skip)
+    posts = (await db.scalars(query.limit(limit + 1))).all()
+
+    cursor_out = next_cursor(posts, limit)
+    if cursor_out:
+        response.headers["X-Next-Cursor"] = cursor_out
+    posts = posts[:limit]
+    await embed_first_comments(db, posts, comments)
+    return posts
+
+async def embed_first_comments(db: AsyncSession, posts: List[Post], n: Optional[int] = None):
+    """Attach each post's first ``n`` comments (all when None) using one query for the page."""
+    by_post = {post.id: [] for post in posts}
+    rows = []
+    if n is None and by_post:
+        rows = await db.scalars(
+            select(Comment)
+            .where(Comment.post_id.in_(list(by_post)))
+            .order_by(Comment.post_id, Comment.created_at, Comment.id)
+        )
+    elif n and by_post:
+        position = func.row_number().over(
+            partition_by=Comment.post_id, order_by=(Comment.created_at, Comment.id)
+        ).label("position")
+        ranked = (
+            select(Comment, position)
+            .where(Comment.post_id.in_(list(by_post)))
+            .subquery()
+        )
+        first = aliased(Comment, ranked)
+        rows = await db.scalars(
+            select(first).where(ranked.c.position <= n).order_by(ranked.c.post_id, ranked.c.position)
+        )
+    for comment in rows:
+        by_post[comment.post_id].append(comment)
+    for post in posts:
+        # Loaded as-is: no lazy load and nothing for the session to flush
+        set_committed_value(post, "comments", by_post[post.id])
 
 @router.post("/posts", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
-def create_post(
+async def create_post(
     post: PostCreate,
-    db: Session = Depends(get_db),
-    current_user_id: str = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     new_post = Post(
         **post.model_dump(),
-        author_id=UUID(current_user_id)
+        author_id=current_user.id,
+        score=hot_score(0, 0, datetime.now(timezone.utc)),
     )
     db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
+    await db.commit()
+    await db.refresh(new_post, ["created_at", "updated_at", "comments"])
+    await response_cache.invalidate("posts")
     return new_post
 
 @router.get("/posts/{post_id}", response_model=PostResponse)
-def get_post(post_id: UUID, db: Session = Depends(get_db)):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def get_post(
+    post_id: UUID,
+    comments: Optional[int] = Query(None, ge=0, le=100, description="Embed only the post's first N comments; all by default"),
+    db: AsyncSession = Depends(get_db)
+):
+    """A post with its comments; see ``list_posts`` for ``comments=N``."""
+    post = await db.scalar(select(Post).where(Post.id == post_id))
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
+    await embed_first_comments(db, [post], comments)
     return post
 
+# --- Likes ---
+
+async def set_like(db: AsyncSession, post_id: UUID, user_id: UUID, liked: bool) -> LikeResponse:
+    """Record or remove the user's like; the post's counter is updated by the like buffer."""
+    likes_count = await db.scalar(select(Post.likes_count).where(Post.id == post_id))
+    if likes_count is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    if liked:
+        dialect = db.get_bind().dialect.name
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        result = await db.execute(
+            insert(PostLike).values(post_id=post_id, user_id=user_id).on_conflict_do_nothing()
+        )
+    else:
+        result = await db.execute(
+            delete(PostLike).where(PostLike.post_id == post_id, PostLike.user_id == user_id)
+        )
+    await db.commit()
+    # Repeated likes/unlikes change no rows and so never double count
+    if result.rowcount:
+        like_buffer.add(post_id, 1 if liked else -1)
+    return LikeResponse(post_id=post_id, liked=liked, likes_count=likes_count + like_buffer.pending(post_id))
+
+@router.put("/posts/{post_id}/like", response_model=LikeResponse)
+async def like_post(
+    post_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    return await set_like(db, post_id, current_user.id, True)
+
+@router.delete("/posts/{post_id}/like", response_model=LikeResponse)
+async def unlike_post(
+    post_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    return await set_like(db, post_id, current_user.id, False)
+
 # --- Comments ---
 
 @router.post("/posts/{post_id}/comments", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
-def create_comment(
+async def create_comment(
     post_id: UUID,
     comment: CommentCreate,
-    db: Session = Depends(get_db),
-    current_user_id: str = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.scalar(select(Post).where(Post.id == post_id))
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-        
+
     new_comment = Comment(
         content=comment.content,
         post_id=post_id,
-        author_id=UUID(current_user_id)
+        author_id=current_user.id
     )
     db.add(new_comment)
-    db.commit()
-    db.refresh(new_comment)
+    # Same transaction as the insert, so the count can never drift from the rows
+    await db.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(comments_count=Post.comments_count + 1, updated_at=Post.updated_at)
+    )
+    await refresh_scores(db, [post_id])
+    await db.commit()
+    await db.refresh(new_comment)
+    # Listed posts embed their comments
+    await response_cache.invalidate("posts")
     return new_comment
+
+@router.get("/posts/{post_id}/comments", response_model=List[CommentResponse])
+async def list_comments(
+    post_id: UUID,
+    response: Response,
+    skip: int = Query(0, ge=0, description="Comments to skip on the first page, e.g. those already embedded in the post"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from a previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """A post's comments oldest first, in the order posts embed them.
+
+    The next page's cursor is sent in X-Next-Cursor.
+    """
+    if await db.scalar(select(Post.id).where(Post.id == post_id)) is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    query = keyset_page(
+        select(Comment).where(Comment.post_id == post_id), Comment, cursor, db.get_bind().dialect.name,
+        newest_first=False,
+    )
+    if cursor is None:
+        query = query.offset(skip)
+    comments = (await db.scalars(query.limit(limit + 1))).all()
+
+    cursor_out = next_cursor(comments, limit)
+    if cursor_out:
+        response.headers["X-Next-Cursor"] = cursor_out
+    return comments[:limit]
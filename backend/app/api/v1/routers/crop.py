@@ -1,98 +1,297 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_db, get_current_user
-from app.models.crop import DiseaseDetection, SoilAnalysis, PlantingSchedule
+from app.schemas.token import Principal
+from app.models.crop import DiseaseDetection, SoilAnalysis, PlantingSchedule, ScheduleTask
 from app.schemas.crop import (
     DiseaseDetectionCreate, DiseaseDetectionResponse,
-    SoilAnalysisCreate, SoilAnalysisResponse,
-    PlantingScheduleCreate, PlantingScheduleResponse, PlantingScheduleUpdate
+    SoilAnalysisCreate, SoilAnalysisResponse, SoilAnalyticsResponse,
+    PlantingScheduleCreate, PlantingScheduleResponse, PlantingScheduleUpdate, ScheduleTaskResponse,
 )
-import random # For mocking disease detection if needed
+from app.utils.crop_calendar import calendar_settings, due_tasks, materialize, rematerialize
+from app.utils.detection import TERMINAL_STATUSES, detection_pipeline
+from app.utils.detection_cache import CachedResult
+from app.utils.image_store import UploadTooLarge, image_store, image_store_settings, iter_multipart_file
+from app.utils.soil_analytics import analyze, load_user_samples, normalize_region, soil_regions
 
 router = APIRouter()
 
 # --- Disease Detection ---
 
-@router.post("/disease-detect", response_model=DiseaseDetectionResponse)
-def detect_disease(
+@router.post("/disease-detect", response_model=DiseaseDetectionResponse, status_code=status.HTTP_202_ACCEPTED)
+async def detect_disease(
     data: DiseaseDetectionCreate,
-    db: Session = Depends(get_db),
-    current_user_id: str = Depends(get_current_user)
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
+    """Queue a detection job for the image.
+
+    The returned ``id`` is the job id: poll ``GET /disease-detect/{id}`` or
+    stream ``GET /disease-detect/{id}/events`` until ``status`` is completed
+    or failed. An image URL detected before is answered from the result
+    cache straight away, with 200 and a completed job.
     """
-    Mock endpoint for disease detection.
-    In production, this would call an ML model or external service.
+    cached = await detection_pipeline.lookup(db, data.image_url)
+    if cached is None:
+        await detection_pipeline.admit(db)
+        return await record_detection(db, response, current_user.id, data.image_url)
+    digest, result = cached
+    return await record_detection(db, response, current_user.id, data.image_url, digest, result)
+
+@router.post("/disease-detect/upload", response_model=DiseaseDetectionResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_for_detection(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Upload an image as multipart field ``image`` and queue a detection job for it.
+
+    The file is streamed to content-addressed storage as it arrives; the
+    job's ``image_url`` is its ``store://`` reference. Images uploaded
+    before are stored once and answered from the result cache (200).
     """
-    # Simulate processing
-    detected = "Leaf Blight"
-    confidence = 0.95
-    recommendation = "Apply fungicide and improve air circulation."
-    
-    record = DiseaseDetection(
-        user_id=UUID(current_user_id),
-        image_url=data.image_url,
-        detected_disease=detected,
-        confidence_score=confidence,
-        recommendation=recommendation
+    await detection_pipeline.admit(db)
+    # Hold no transaction (or pooled connection) while the body streams in
+    await db.rollback()
+    chunks = iter_multipart_file(
+        request.stream(), request.headers.get("content-type", ""), image_store_settings.IMAGE_UPLOAD_FIELD
     )
+    try:
+        stored = await image_store.save(chunks, detection_pipeline.settings.DETECTION_MAX_IMAGE_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = await detection_pipeline.lookup_digest(db, stored.digest)
+    if result is None:
+        try:
+            await detection_pipeline.prepare(stored.digest)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Could not read image")
+    return await record_detection(
+        db, response, current_user.id, image_store.url(stored.digest), stored.digest, result
+    )
+
+async def record_detection(
+    db: AsyncSession,
+    response: Response,
+    user_id: UUID,
+    image_url: str,
+    digest: Optional[str] = None,
+    result: Optional[CachedResult] = None,
+) -> DiseaseDetection:
+    """Insert a job: completed from a cached ``result``, otherwise queued for the workers."""
+    record = DiseaseDetection(user_id=user_id, image_url=image_url, image_digest=digest, status="queued")
+    if result is not None:
+        for field, value in result._asdict().items():
+            setattr(record, field, value)
+        record.status = "completed"
+        record.completed_at = datetime.now(timezone.utc)
+        response.status_code = status.HTTP_200_OK
     db.add(record)
-    db.commit()
-    db.refresh(record)
+    await db.commit()
+    await db.refresh(record)
+    if result is None:
+        detection_pipeline.wake()
+    response.headers["Location"] = f"/api/v1/crop/disease-detect/{record.id}"
+    return record
+
+async def get_detection_job(db: AsyncSession, job_id: UUID, user_id: UUID) -> DiseaseDetection:
+    record = await db.get(DiseaseDetection, job_id, populate_existing=True)
+    if record is None or record.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Detection job not found")
     return record
 
+@router.get("/disease-detect/{job_id}", response_model=DiseaseDetectionResponse)
+async def get_detection(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    return await get_detection_job(db, job_id, current_user.id)
+
+@router.get("/disease-detect/{job_id}/events")
+async def stream_detection(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Server-sent ``status`` events carrying the job, one per status change.
+
+    The stream ends once the job completes or fails, or after
+    DETECTION_STREAM_TIMEOUT seconds; clients reconnect to keep waiting.
+    """
+    await get_detection_job(db, job_id, current_user.id)
+    settings = detection_pipeline.settings
+
+    async def events():
+        deadline = asyncio.get_running_loop().time() + settings.DETECTION_STREAM_TIMEOUT
+        last_status = None
+        while True:
+            record = await db.get(DiseaseDetection, job_id, populate_existing=True)
+            if record is None:
+                return
+            job = DiseaseDetectionResponse.model_validate(record)
+            # No transaction (or SQLite read snapshot) is held while waiting
+            await db.rollback()
+            if job.status != last_status:
+                last_status = job.status
+                yield f"event: status\ndata: {job.model_dump_json()}\n\n"
+            remaining = deadline - asyncio.get_running_loop().time()
+            if job.status in TERMINAL_STATUSES or remaining <= 0:
+                return
+            # Woken early when this process updates the job; polling covers other processes
+            await detection_pipeline.wait(job_id, min(remaining, settings.DETECTION_POLL_INTERVAL))
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @router.get("/disease-history", response_model=List[DiseaseDetectionResponse])
-def get_disease_history(
-    db: Session = Depends(get_db),
-    current_user_id: str = Depends(get_current_user)
+async def get_disease_history(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    return db.query(DiseaseDetection).filter(DiseaseDetection.user_id == UUID(current_user_id)).all()
+    query = select(DiseaseDetection).where(DiseaseDetection.user_id == current_user.id)
+    return (await db.scalars(query)).all()
 
 # --- Soil Analysis ---
 
 @router.post("/soil-analysis", response_model=SoilAnalysisResponse)
-def add_soil_record(
+async def add_soil_record(
     data: SoilAnalysisCreate,
-    db: Session = Depends(get_db),
-    current_user_id: str = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     record = SoilAnalysis(
-        user_id=UUID(current_user_id),
+        user_id=current_user.id,
+        region=normalize_region(data.location),
         **data.model_dump()
     )
     db.add(record)
-    db.commit()
-    db.refresh(record)
+    await db.commit()
+    await db.refresh(record)
+    soil_regions.add(record)
     return record
 
 @router.get("/soil-analysis", response_model=List[SoilAnalysisResponse])
-def get_soil_history(
-    db: Session = Depends(get_db),
-    current_user_id: str = Depends(get_current_user)
+async def get_soil_history(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    return db.query(SoilAnalysis).filter(SoilAnalysis.user_id == UUID(current_user_id)).all()
+    query = select(SoilAnalysis).where(SoilAnalysis.user_id == current_user.id)
+    return (await db.scalars(query)).all()
+
+@router.get("/soil-analysis/analytics", response_model=SoilAnalyticsResponse)
+async def get_soil_analytics(
+    region: Optional[str] = Query(None, description="Compare against this region instead of the latest sample's location"),
+    deltas: int = Query(10, ge=0, le=100, description="Changes between the last N+1 samples"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Trends, sample-to-sample changes and regional standing of the user's soil.
+
+    Percentiles place each latest measurement among every user's samples in
+    the region. Recommendations flag measurements outside their optimal band
+    and ones trending out of it.
+    """
+    times, values, latest_region = await load_user_samples(db, current_user.id)
+    region = normalize_region(region) or latest_region
+    region_stats = await soil_regions.get(db, region) if region else None
+    return analyze(times, values, region, region_stats, deltas)
 
 # --- Planting Schedule ---
 
 @router.post("/schedules", response_model=PlantingScheduleResponse)
-def create_schedule(
+async def create_schedule(
     data: PlantingScheduleCreate,
-    db: Session = Depends(get_db),
-    current_user_id: str = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
+    """Create a schedule and lay out its tasks from the crop's template."""
     schedule = PlantingSchedule(
-        user_id=UUID(current_user_id),
+        user_id=current_user.id,
         **data.model_dump()
     )
     db.add(schedule)
-    db.commit()
-    db.refresh(schedule)
+    await db.flush()
+    await materialize(db, [schedule])
+    await db.commit()
+    await db.refresh(schedule)
     return schedule
 
 @router.get("/schedules", response_model=List[PlantingScheduleResponse])
-def get_schedules(
-    db: Session = Depends(get_db),
-    current_user_id: str = Depends(get_current_user)
+async def get_schedules(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    query = select(PlantingSchedule).where(PlantingSchedule.user_id == current_user.id)
+    return (await db.scalars(query)).all()
+
+async def get_own_schedule(db: AsyncSession, schedule_id: UUID, user_id: UUID) -> PlantingSchedule:
+    """The caller's schedule; 404 for schedules of other users too."""
+    schedule = await db.get(PlantingSchedule, schedule_id)
+    if schedule is None or schedule.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    return schedule
+
+@router.put("/schedules/{schedule_id}", response_model=PlantingScheduleResponse)
+async def update_schedule(
+    schedule_id: UUID,
+    data: PlantingScheduleUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    return db.query(PlantingSchedule).filter(PlantingSchedule.user_id == UUID(current_user_id)).all()
+    """Update a schedule; its tasks are brought in line with the change."""
+    schedule = await get_own_schedule(db, schedule_id, current_user.id)
+    for key, value in data.model_dump(exclude_unset=True).items():
+        # Only the harvest estimate can be cleared
+        if value is not None or key == "harvest_date_est":
+            setattr(schedule, key, value)
+    await rematerialize(db, schedule)
+    await db.commit()
+    await db.refresh(schedule)
+    return schedule
+
+@router.get("/schedules/{schedule_id}/tasks", response_model=List[ScheduleTaskResponse])
+async def get_schedule_tasks(
+    schedule_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    await get_own_schedule(db, schedule_id, current_user.id)
+    query = (
+        select(ScheduleTask)
+        .where(ScheduleTask.schedule_id == schedule_id)
+        .order_by(ScheduleTask.due_date, ScheduleTask.title, ScheduleTask.id)
+    )
+    return (await db.scalars(query)).all()
+
+@router.get("/tasks", response_model=List[ScheduleTaskResponse])
+async def get_due_tasks(
+    start: Optional[date] = Query(None, description="First day; defaults to today (UTC)"),
+    end: Optional[date] = Query(None, description="Last day, inclusive; defaults to six days after start"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Tasks due in a date range across all of the caller's schedules.
+
+    Harvest windows are included while open, even when they opened before
+    ``start``.
+    """
+    start = start or datetime.now(timezone.utc).date()
+    end = end or start + timedelta(days=6)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days >= calendar_settings.CALENDAR_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Range exceeds {calendar_settings.CALENDAR_MAX_RANGE_DAYS} days"
+        )
+    return await due_tasks(db, current_user.id, start, end)
@@ -1,43 +1,76 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 from math import ceil
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, joinedload
+from app.api.cache import CachedRoute, cache_response
 from app.api.deps import get_db
+from app.models.dealer import DealerStats
 from app.models.users import User, UserRole
 from app.schemas.dealer import DealerPublic, PaginatedDealerResponse
+from app.utils.pagination import CountMode, count_rows, keyset_page, next_cursor
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+# Sort keys served straight from the precomputed dealer_stats columns
+SORT_COLUMNS = {
+    "products": DealerStats.products_count,
+    "rating": DealerStats.rating,
+}
 
 @router.get('/', response_model=PaginatedDealerResponse)
-def list_dealers(
-    db: Session = Depends(get_db),
+@cache_response("dealers")
+async def list_dealers(
+    db: AsyncSession = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page; switches to keyset pagination"),
+    count: Optional[CountMode] = Query(None, description="Total count: exact, estimated or none (default: exact for pages, none for cursors)"),
+    sort: Literal["newest", "products", "rating"] = Query("newest", description="Order by signup date, product count or rating"),
 ):
-    """List all dealers with pagination."""
+    """List dealers with pagination, newest first or by their precomputed stats."""
+    if cursor and sort != "newest":
+        raise HTTPException(status_code=400, detail="Cursor pagination only supports sort=newest")
+
     # Query users with dealer role
-    query = db.query(User).filter(User.role == UserRole.DEALER)
+    query = select(User).where(User.role == UserRole.DEALER)
+    
+    total = await count_rows(db, query, count or ("none" if cursor else "exact"))
     
-    total = query.count()
-    pages = ceil(total / per_page)
-    skip = (page - 1) * per_page
+    query = (
+        query.outerjoin(DealerStats, DealerStats.user_id == User.id)
+        .options(joinedload(User.dealer_profile), contains_eager(User.dealer_stats))
+    )
+    if sort == "newest":
+        page_query = keyset_page(query, User, cursor, db.get_bind().dialect.name)
+    else:
+        page_query = query.order_by(SORT_COLUMNS[sort].desc().nulls_last(), User.created_at.desc(), User.id.desc())
+    if cursor is None:
+        page_query = page_query.offset((page - 1) * per_page)
     
-    dealers = query.offset(skip).limit(per_page).all()
+    dealers = (await db.scalars(page_query.limit(per_page + 1))).all()
     
     # Convert to Public Dealer Schema using the helper method
     return {
-        "items": [DealerPublic.from_user(d) for d in dealers],
+        "items": [DealerPublic.from_user(d) for d in dealers[:per_page]],
         "total": total,
-        "page": page,
-        "pages": pages,
-        "per_page": per_page
+        "page": None if cursor else page,
+        "pages": ceil(total / per_page) if total is not None else None,
+        "per_page": per_page,
+        "next_cursor": next_cursor(dealers, per_page) if sort == "newest" else None,
     }
 
 @router.get('/{dealer_id}', response_model=DealerPublic)
-def get_dealer(dealer_id: UUID, db: Session = Depends(get_db)):
+async def get_dealer(dealer_id: UUID, db: AsyncSession = Depends(get_db)):
     """Get specific dealer by ID."""
-    dealer = db.query(User).filter(User.id == dealer_id, User.role == UserRole.DEALER).first()
+    dealer = await db.scalar(
+        select(User)
+        .outerjoin(DealerStats, DealerStats.user_id == User.id)
+        .options(joinedload(User.dealer_profile), contains_eager(User.dealer_stats))
+        .where(User.id == dealer_id, User.role == UserRole.DEALER)
+    )
     if not dealer:
         raise HTTPException(status_code=404, detail="Dealer not found")
     
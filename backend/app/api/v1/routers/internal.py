@@ -0,0 +1,78 @@
+"""Internal operational endpoints; not part of the public API.
+
+Callers must present ``INTERNAL_METRICS_TOKEN`` in the ``X-Internal-Token``
+header (for scrapers) or an admin's bearer token.
+"""
+import os
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from pydantic import BaseModel
+from app.api.deps import resolve_principal
+from app.api.cache import response_cache
+from app.db.pool import pool_status
+from app.db.session import engine, async_engine
+from app.models.users import UserRole
+from app.utils.alerts import alert_index, notifications
+from app.utils.chat_hub import chat_hub
+from app.utils.detection import detection_pipeline
+from app.utils.detection_cache import detection_cache
+from app.utils.jwt import verified_tokens
+from app.utils.likes import like_buffer
+from app.utils.message_writer import message_writer
+from app.utils.price_analytics import price_models
+from app.utils.security import password_hasher
+from app.utils.soil_analytics import soil_regions
+
+
+class InternalSettings(BaseModel):
+    """Env-driven configuration for internal endpoints."""
+    INTERNAL_METRICS_TOKEN: Optional[str] = os.getenv("INTERNAL_METRICS_TOKEN") or None   # unset: admins only
+
+
+internal_settings = InternalSettings()
+
+optional_bearer = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
+
+
+async def require_internal_access(
+    x_internal_token: Optional[str] = Header(None),
+    token: Optional[str] = Depends(optional_bearer),
+):
+    """Allow the shared internal token or an admin; 401/403 otherwise."""
+    expected = internal_settings.INTERNAL_METRICS_TOKEN
+    if expected and x_internal_token and secrets.compare_digest(x_internal_token, expected):
+        return
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if resolve_principal(token).role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admins only")
+
+
+router = APIRouter(dependencies=[Depends(require_internal_access)])
+
+@router.get("/metrics")
+async def metrics():
+    """Runtime statistics for this worker process (pools are per-process)."""
+    return {
+        "pid": os.getpid(),
+        "db": {
+            "async": pool_status(async_engine.sync_engine),
+            "sync": pool_status(engine),
+        },
+        "response_cache": response_cache.backend.stats(),
+        "verified_tokens": verified_tokens.stats(),
+        "password_hasher": password_hasher.stats(),
+        "price_models": price_models.stats(),
+        "price_alerts": {**alert_index.stats(), "notifications": notifications.stats()},
+        "chat_hub": chat_hub.stats(),
+        "chat_writer": message_writer.stats(),
+        "likes": like_buffer.stats(),
+        "disease_detection": {**detection_pipeline.stats(), "cache": detection_cache.stats()},
+        "soil_regions": soil_regions.stats(),
+    }
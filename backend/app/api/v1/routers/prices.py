@@ -1,7 +1,40 @@
-from fastapi import APIRouter
+from datetime import datetime, timezone
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_db, get_current_user
+from app.models.price import LatestPrice, PriceAlert, PriceObservation
+from app.models.product import Product
+from app.schemas.price import (
+    HistoryInterval,
+    LatestPriceQuery,
+    PredictBatchRequest,
+    PriceCompareRequest,
+    PriceCompareResponse,
+    PricePrediction,
+    PriceRecommendRequest,
+    PriceRecommendResponse,
+    TrendMethod,
+    LatestPriceResponse,
+    PriceAlertCreate,
+    PriceAlertResponse,
+    PriceHistoryResponse,
+    PriceReport,
+    PriceReportResult,
+    as_utc,
+)
+from app.schemas.token import Principal
+from app.utils.alerts import alert_index, evaluate_report
+from app.utils.price_analytics import percentile_of, predict, price_models
 
 router = APIRouter()
 
+async def ensure_product(db: AsyncSession, product_id: UUID):
+    if await db.scalar(select(Product.id).where(Product.id == product_id)) is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+
 @router.get('/track')
 def get_tracked_prices():
     return [{"product_id": 1, "price": 1000}]
@@ -20,42 +53,167 @@ def delete_tracked_price(price_id: int):
 
 
 # Price Update/Market Data Endpoints
-@router.get('/producs/{product_id}/latest')
-def get_latest_price(product_id: int):
-    return {"product_id": product_id, "latest_price": 1200}
-
-
-@router.get('/products/{product_id}/history')
-def get_price_history(product_id: int):
-    return [{"date": "2024-01-01", "price": 1100}, {"date": "2024-02-01", "price": 1150}]
-
-@router.post('/products/{product_id}/report')
-def update_product_price(product_id: int, price_data: dict):
-    return {"product_id": product_id, **price_data}
+@router.post('/latest', response_model=List[LatestPriceResponse])
+async def get_latest_prices(query: LatestPriceQuery, db: AsyncSession = Depends(get_db)):
+    """Latest prices for many products in one query; products without reports are omitted."""
+    rows = await db.scalars(select(LatestPrice).where(LatestPrice.product_id.in_(set(query.product_ids))))
+    return rows.all()
+
+@router.get('/products/{product_id}/latest', response_model=LatestPriceResponse)
+async def get_latest_price(product_id: UUID, db: AsyncSession = Depends(get_db)):
+    """Most recently observed price for a product."""
+    latest = await db.get(LatestPrice, product_id)
+    if not latest:
+        raise HTTPException(status_code=404, detail="No prices reported for this product")
+    return latest
+
+
+@router.get('/products/{product_id}/history', response_model=PriceHistoryResponse)
+async def get_price_history(
+    product_id: UUID,
+    start: Optional[datetime] = Query(None, description="Inclusive lower bound (UTC if no offset)"),
+    end: Optional[datetime] = Query(None, description="Exclusive upper bound (UTC if no offset)"),
+    interval: HistoryInterval = Query("raw", description="raw points, or day/week OHLC buckets"),
+    limit: int = Query(1000, ge=1, le=10_000, description="Max points or buckets, oldest first"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Price history for a product over a time range, optionally downsampled."""
+    await ensure_product(db, product_id)
+    start, end = as_utc(start), as_utc(end)
+
+    if interval == "raw":
+        rows = (await db.execute(PriceObservation.history(product_id, start, end).limit(limit))).all()
+        return {"product_id": product_id, "interval": interval, "points": [r._asdict() for r in rows]}
+
+    query = PriceObservation.ohlc(product_id, start, end, interval, db.get_bind().dialect.name)
+    rows = (await db.execute(query.limit(limit))).all()
+    return {"product_id": product_id, "interval": interval, "buckets": [r._asdict() for r in rows]}
+
+@router.post('/products/{product_id}/report', response_model=PriceReportResult, status_code=status.HTTP_201_CREATED)
+async def update_product_price(
+    product_id: UUID,
+    report: PriceReport,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Record a batch of observed market prices for a product."""
+    await ensure_product(db, product_id)
+    now = datetime.now(timezone.utc)
+    ingested = await PriceObservation.ingest(
+        db,
+        product_id,
+        ((o.observed_at or now, o.price) for o in report.observations),
+        reported_by=current_user.id,
+    )
+    fired = await evaluate_report(db, product_id, (o.price for o in report.observations))
+    await db.commit()
+    fired.publish()
+    price_models.invalidate(product_id)
+    return {"product_id": product_id, "ingested": ingested, "alerts_triggered": len(fired)}
 
 
 # Alerting Endpoints
-@router.post('/alerts')
-def create_price_alert(alert_data: dict):
-    return {"id": 1, **alert_data}
-
-@router.get('/alerts')
-def list_price_alerts():
-    return [{"id": 1, "product_id": 1, "threshold": 1000}]
+@router.post('/alerts', response_model=PriceAlertResponse, status_code=status.HTTP_201_CREATED)
+async def create_price_alert(
+    alert: PriceAlertCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Notify the caller once the product's price crosses the threshold."""
+    await ensure_product(db, alert.product_id)
+    new_alert = PriceAlert(**alert.model_dump(), user_id=current_user.id)
+    db.add(new_alert)
+    await db.commit()
+    await db.refresh(new_alert, ["created_at"])
+    await alert_index.sync(db)
+    alert_index.add(new_alert.id, new_alert.product_id, new_alert.direction, new_alert.threshold)
+    return new_alert
+
+@router.get('/alerts', response_model=List[PriceAlertResponse])
+async def list_price_alerts(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """The caller's alerts, newest first, including ones that already fired."""
+    alerts = await db.scalars(
+        select(PriceAlert).where(PriceAlert.user_id == current_user.id).order_by(PriceAlert.created_at.desc())
+    )
+    return alerts.all()
 
 @router.delete('/alerts/{alert_id}')
-def delete_price_alert(alert_id: int):
+async def delete_price_alert(
+    alert_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Delete one of the caller's alerts."""
+    alert = await db.get(PriceAlert, alert_id)
+    if not alert or alert.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Price alert not found")
+    await db.delete(alert)
+    await db.commit()
+    alert_index.remove(alert_id)
     return {"message": f"Price alert {alert_id} deleted"}
 
 # AI Price Prediction Endpoints
-@router.post('/ai/compare')
-def compare_prices(price_data: dict):
-    return {"comparison_result": "Price is competitive", **price_data}
-
-@router.post('/ai/predict/{product_id}')
-def predict_price_trend(product_data: dict):
-    return {"predicted_trend": "upward", **product_data}
-
-@router.post('/ai/recommend')
-def recommend_prices(product_data: dict):
-    return {"recommended_price": 1250, **product_data}
+async def fitted_model(db: AsyncSession, product_id: UUID, method: TrendMethod = "ewm"):
+    await ensure_product(db, product_id)
+    fitted = (await price_models.get_many(db, [product_id], method)).get(product_id)
+    if fitted is None:
+        raise HTTPException(status_code=422, detail="Not enough price history for this product")
+    return fitted
+
+@router.post('/ai/compare', response_model=PriceCompareResponse)
+async def compare_prices(request: PriceCompareRequest, db: AsyncSession = Depends(get_db)):
+    """Place a price within the distribution of recently observed prices."""
+    fitted = await fitted_model(db, request.product_id)
+    model, price = fitted.model, float(request.price)
+    if price < model.p25:
+        verdict = "below_market"
+    elif price > model.p75:
+        verdict = "above_market"
+    else:
+        verdict = "competitive"
+    return {
+        "product_id": request.product_id,
+        "price": price,
+        "percentile": percentile_of(fitted.sorted_prices, price),
+        "p25": model.p25,
+        "p50": model.p50,
+        "p75": model.p75,
+        "verdict": verdict,
+    }
+
+@router.post('/ai/predict', response_model=List[PricePrediction])
+async def predict_price_trends(request: PredictBatchRequest, db: AsyncSession = Depends(get_db)):
+    """Forecast many products at once; products without enough history are omitted."""
+    fitted = await price_models.get_many(db, request.product_ids, request.method)
+    return [
+        predict(fitted[product_id].model, request.horizon_days)
+        for product_id in dict.fromkeys(request.product_ids)
+        if product_id in fitted
+    ]
+
+@router.post('/ai/predict/{product_id}', response_model=PricePrediction)
+async def predict_price_trend(
+    product_id: UUID,
+    horizon_days: int = Query(7, ge=1, le=90),
+    method: TrendMethod = Query("ewm", description="linear fit, or one weighted toward recent prices"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Forecast a product's price ``horizon_days`` ahead from its recent trend."""
+    fitted = await fitted_model(db, product_id, method)
+    return predict(fitted.model, horizon_days)
+
+@router.post('/ai/recommend', response_model=PriceRecommendResponse)
+async def recommend_prices(request: PriceRecommendRequest, db: AsyncSession = Depends(get_db)):
+    """Suggest a price: the forecast, kept within the market's interquartile range."""
+    fitted = await fitted_model(db, request.product_id)
+    prediction = predict(fitted.model, request.horizon_days)
+    return {
+        "product_id": request.product_id,
+        "recommended_price": round(min(max(prediction.predicted_price, prediction.p25), prediction.p75), 2),
+        "low": prediction.p25,
+        "high": prediction.p75,
+        "predicted_trend": prediction.predicted_trend,
+    }
@@ -1,113 +1,280 @@
+import json
+import tempfile
+import uuid
 from typing import List, Optional
 from uuid import UUID
 from math import ceil
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.api.cache import CachedRoute, cache_response, response_cache
 from app.api.deps import get_db, get_current_user
+from app.schemas.token import Principal
+from app.db.search import apply_search
+from app.models.dealer import DealerStats
 from app.models.product import Product
 from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, PaginatedProductResponse
 from app.models.users import User
+from app.utils.catalog_io import (
+    EXPORT_COLUMNS, CatalogFormat, detect_format, export_header, export_rows, import_settings, iter_products,
+)
+from app.utils.pagination import CountMode, count_rows, keyset_page, next_cursor
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+# Owner and its one-to-one dealer profile in the same SELECT as the products
+with_dealer = joinedload(Product.dealer).joinedload(User.dealer_profile)
+
+async def load_product(db: AsyncSession, product_id: UUID) -> Optional[Product]:
+    """Fetch a product with everything ProductResponse serializes."""
+    return await db.scalar(
+        select(Product)
+        .options(with_dealer)
+        .where(Product.id == product_id)
+        .execution_options(populate_existing=True)
+    )
 
 @router.get("/", response_model=PaginatedProductResponse)
-def list_products(
-    db: Session = Depends(get_db),
+@cache_response("products")
+async def list_products(
+    db: AsyncSession = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page; switches to keyset pagination"),
+    count: Optional[CountMode] = Query(None, description="Total count: exact, estimated or none (default: exact for pages, none for cursors)"),
     category: Optional[str] = None,
-    search: Optional[str] = None,
+    search: Optional[str] = Query(None, description="Full-text search over name, description and category; the last word matches as a prefix"),
     dealer_id: Optional[UUID] = None
 ):
-    """List products with optional filtering and pagination."""
-    query = db.query(Product).filter(Product.is_active == True)
-    
+    """List products (newest first, or best match first when searching) with optional filtering and pagination."""
+    query = select(Product).options(with_dealer).where(Product.is_active == True)
+
     if category:
-        query = query.filter(Product.category == category)
-    
+        query = query.where(Product.category == category)
+
     if dealer_id:
-        query = query.filter(Product.dealer_id == dealer_id)
-    
+        query = query.where(Product.dealer_id == dealer_id)
+
+    dialect = db.get_bind().dialect.name
+    rank = None
     if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
-        
-    total = query.count()
-    pages = ceil(total / per_page)
-    skip = (page - 1) * per_page
-    
-    items = query.offset(skip).limit(per_page).all()
-    
+        query, rank = apply_search(query, search, dialect)
+
+    if rank is not None and cursor is not None:
+        raise HTTPException(status_code=400, detail="Ranked search results are paginated by page, not cursor")
+
+    total = await count_rows(db, query, count or ("none" if cursor else "exact"))
+
+    if rank is not None:
+        page_query = query.order_by(rank, Product.created_at.desc(), Product.id.desc())
+    else:
+        page_query = keyset_page(query, Product, cursor, dialect)
+    if cursor is None:
+        page_query = page_query.offset((page - 1) * per_page)
+
+    items = (await db.scalars(page_query.limit(per_page + 1))).unique().all()
+
     return {
-        "items": items,
+        "items": items[:per_page],
         "total": total,
-        "page": page,
-        "pages": pages,
-        "per_page": per_page
+        "page": None if cursor else page,
+        "pages": ceil(total / per_page) if total is not None else None,
+        "per_page": per_page,
+        "next_cursor": next_cursor(items, per_page),
     }
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
-def create_product(
+async def create_product(
     product: ProductCreate,
-    db: Session = Depends(get_db),
-    current_user_id: str = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create a new product. Requires authentication."""
     # Verify user exists (optional, implicit by token)
-    
+
     new_product = Product(
         **product.model_dump(),
-        dealer_id=UUID(current_user_id) # Assign to current user
+        dealer_id=current_user.id # Assign to current user
     )
     db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
-    return new_product
+    await DealerStats.add_products(db, new_product.dealer_id, 1)
+    await db.commit()
+    await response_cache.invalidate("products", "dealers")
+    return await load_product(db, new_product.id)
+
+async def insert_batch(db: AsyncSession, dealer_id: UUID, batch: list) -> list:
+    """Insert ``(row, id, values)`` tuples and commit; returns one result per row.
+
+    The batch goes in as one executemany. If the database rejects it (e.g. a
+    value too long for its column), rows are retried one by one inside
+    savepoints so only the offending rows fail.
+    """
+    rows = [{**values, "id": product_id, "dealer_id": dealer_id} for _, product_id, values in batch]
+    try:
+        await db.execute(insert(Product), rows)
+        await DealerStats.add_products(db, dealer_id, len(rows))
+        await db.commit()
+        return [{"row": row, "status": "created", "id": str(product_id)} for row, product_id, _ in batch]
+    except DBAPIError:
+        await db.rollback()
+
+    results, created = [], 0
+    for (row, product_id, _), values in zip(batch, rows):
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(Product), [values])
+            results.append({"row": row, "status": "created", "id": str(product_id)})
+            created += 1
+        except DBAPIError as e:
+            results.append({"row": row, "status": "error", "errors": [{"type": "database", "msg": str(e.orig)}]})
+    await DealerStats.add_products(db, dealer_id, created)
+    await db.commit()
+    return results
+
+@router.post("/import")
+async def import_products(
+    request: Request,
+    format: Optional[CatalogFormat] = Query(None, description="csv or ndjson; defaults from Content-Type"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Bulk-create products from a CSV or NDJSON request body.
+
+    The body is parsed as it arrives and every row is validated with
+    ProductCreate; valid rows are inserted in batches of
+    PRODUCT_IMPORT_BATCH_SIZE, each committed on its own. The response is
+    NDJSON with one result per row (``created`` with its id, or ``error``
+    with the reasons) followed by a summary line. Results are spooled to a
+    temporary file while the upload is read, since the body cannot be read
+    once the response has started.
+    """
+    fmt = detect_format(request.headers.get("content-type"), format)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=",
+        )
+    batch_size = import_settings.PRODUCT_IMPORT_BATCH_SIZE
+    max_rows = import_settings.PRODUCT_IMPORT_MAX_ROWS
+
+    summary = {"created": 0, "failed": 0, "truncated": False}
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+")
+
+    def record(results):
+        for result in results:
+            summary["created" if result["status"] == "created" else "failed"] += 1
+            spool.write(json.dumps(result) + "\n")
+
+    batch = []
+    async for row, product, errors in iter_products(request.stream(), fmt):
+        if row > max_rows:
+            summary["truncated"] = True
+            break
+        if errors is not None:
+            record([{"row": row, "status": "error", "errors": errors}])
+            continue
+        batch.append((row, uuid.uuid4(), product.model_dump()))
+        if len(batch) >= batch_size:
+            record(await insert_batch(db, current_user.id, batch))
+            batch = []
+    if batch:
+        record(await insert_batch(db, current_user.id, batch))
+    if summary["created"]:
+        await response_cache.invalidate("products", "dealers")
+    spool.write(json.dumps({"summary": summary}) + "\n")
+    spool.seek(0)
+
+    def results():
+        with spool:
+            while chunk := spool.read(64 * 1024):
+                yield chunk
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@router.get("/export")
+async def export_products(
+    format: CatalogFormat = Query("ndjson"),
+    include_inactive: bool = Query(True, description="Also export deactivated products"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Stream the caller's catalog as NDJSON or CSV, oldest first."""
+    query = (
+        select(*(getattr(Product, column) for column in EXPORT_COLUMNS))
+        .where(Product.dealer_id == current_user.id)
+        .order_by(Product.created_at, Product.id)
+        .execution_options(yield_per=import_settings.PRODUCT_IMPORT_BATCH_SIZE)
+    )
+    if not include_inactive:
+        query = query.where(Product.is_active == True)
+
+    async def rows():
+        yield export_header(format)
+        # Server-side cursor: one batch of rows in memory at a time
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            yield export_rows(partition, format)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: UUID, db: Session = Depends(get_db)):
+@cache_response("products")
+async def get_product(product_id: UUID, db: AsyncSession = Depends(get_db)):
     """Get a specific product."""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await load_product(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
 @router.put("/{product_id}", response_model=ProductResponse)
-def update_product(
-    product_id: UUID, 
+async def update_product(
+    product_id: UUID,
     product_update: ProductUpdate,
-    db: Session = Depends(get_db),
-    current_user_id: str = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Update a product. Only the owner can update."""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.scalar(select(Product).where(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-        
-    if str(product.dealer_id) != current_user_id:
+
+    if product.dealer_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to update this product")
-        
+
+    was_active = product.is_active
     update_data = product_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(product, key, value)
-        
-    db.commit()
-    db.refresh(product)
-    return product
+
+    await DealerStats.add_products(db, product.dealer_id, int(product.is_active) - int(was_active))
+    await db.commit()
+    await response_cache.invalidate("products", "dealers")
+    return await load_product(db, product_id)
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_product(
+async def delete_product(
     product_id: UUID,
-    db: Session = Depends(get_db),
-    current_user_id: str = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Delete a product. Only the owner can delete."""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.scalar(select(Product).where(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-        
-    if str(product.dealer_id) != current_user_id:
+
+    if product.dealer_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this product")
-        
-    db.delete(product)
-    db.commit()
+
+    await db.delete(product)
+    if product.is_active:
+        await DealerStats.add_products(db, product.dealer_id, -1)
+    await db.commit()
+    await response_cache.invalidate("products", "dealers")
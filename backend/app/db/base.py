@@ -2,7 +2,11 @@
 from app.db.session import Base
 from app.models.users import User
 from app.models.product import Product
-from app.models.dealer import Dealer
+from app.models.dealer import Dealer, DealerStats
 from app.models.farmer import Farmer
-from app.models.community import Post, Comment
-from app.models.crop import DiseaseDetection, SoilAnalysis, PlantingSchedule
+from app.models.community import Post, Comment, PostLike
+from app.models.conversation import Conversation, ConversationParticipant, Message
+from app.models.crop import DiseaseDetection, DetectionResult, SoilAnalysis, PlantingSchedule, ScheduleTask
+from app.models.price import PriceObservation, LatestPrice, PriceAlert
+from app.models.token import RevokedToken
+import app.db.search  # full-text search DDL for products
@@ -0,0 +1,228 @@
+"""Connection pool settings and instrumentation."""
+import os
+import threading
+import time
+from collections import deque
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolSettings(BaseModel):
+    """Env-driven sizing for the SQLAlchemy connection pools.
+
+    Size the pool against the number of uvicorn workers: every worker owns its
+    own pool, so Postgres sees up to ``workers * (POOL_SIZE + MAX_OVERFLOW)``
+    connections per engine.
+    """
+    POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))     # seconds, -1 disables
+    POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", 30))   # seconds
+    # always: ping on every checkout; idle: only ping connections that sat idle
+    # longer than PRE_PING_IDLE_SECONDS; never: rely on POOL_RECYCLE alone
+    PRE_PING: Literal["always", "idle", "never"] = os.getenv("DB_POOL_PRE_PING", "idle")  # type: ignore
+    PRE_PING_IDLE_SECONDS: float = float(os.getenv("DB_POOL_PRE_PING_IDLE_SECONDS", 30))
+
+
+pool_settings = PoolSettings()
+
+
+class Timings:
+    """Count/total/max plus a window of recent samples for percentiles."""
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        samples = sorted(self.recent)
+
+        def pct(p: float) -> float:
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+        return {
+            "count": self.count,
+            "avg_ms": (self.total / self.count * 1000) if self.count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": self.max * 1000,
+        }
+
+
+class PoolMetrics:
+    """Checkout statistics recorded by the instrumented pools."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_latency = Timings()
+        self.wait_time = Timings()
+        self.waits = 0
+        self.timeouts = 0
+        self.overflow_checkouts = 0
+        self.peak_overflow = 0
+        self.peak_in_flight = 0
+        self.pings = 0
+        self.ping_failures = 0
+
+    def record_get(self, seconds: float, waited: bool, pool: QueuePool):
+        with self._lock:
+            self.wait_time.add(seconds)
+            self.waits += waited
+            overflow = pool.overflow()
+            if overflow > 0:
+                self.overflow_checkouts += 1
+                self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def record_checkout(self, seconds: float, pool: QueuePool):
+        with self._lock:
+            self.checkout_latency.add(seconds)
+            self.peak_in_flight = max(self.peak_in_flight, pool.checkedout())
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_ping(self, ok: bool):
+        with self._lock:
+            self.pings += 1
+            self.ping_failures += not ok
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkout_latency.count,
+                "checkout_latency": self.checkout_latency.snapshot(),
+                "wait_time": self.wait_time.snapshot(),
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "peak_overflow": self.peak_overflow,
+                "peak_in_flight": self.peak_in_flight,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Times checkouts (``connect``) and queue waits (``_do_get``)."""
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting on the same metrics
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+    def connect(self):
+        started = time.perf_counter()
+        connection = super().connect()
+        self.metrics.record_checkout(time.perf_counter() - started, self)
+        return connection
+
+    def _do_get(self):
+        waited = (
+            self._max_overflow > -1
+            and self._overflow >= self._max_overflow
+            and self.checkedin() == 0
+        )
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        finally:
+            self.metrics.record_get(time.perf_counter() - started, waited, self)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool for the sync engine that records checkout metrics."""
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool for the async engine that records checkout metrics."""
+
+
+def pool_kwargs(url: str, async_mode: bool = False, settings: PoolSettings = pool_settings) -> dict:
+    """Keyword arguments for create_engine/create_async_engine."""
+    if ":memory:" in url or "mode=memory" in url:
+        # In-memory SQLite needs its single shared connection; nothing to size
+        return {"pool_pre_ping": settings.PRE_PING == "always"}
+
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if async_mode else InstrumentedQueuePool,
+        "pool_size": settings.POOL_SIZE,
+        "max_overflow": settings.MAX_OVERFLOW,
+        "pool_recycle": settings.POOL_RECYCLE,
+        "pool_timeout": settings.POOL_TIMEOUT,
+        "pool_pre_ping": settings.PRE_PING == "always",
+    }
+
+
+def install_idle_pre_ping(engine: Engine, settings: PoolSettings = pool_settings):
+    """Ping only connections that were idle longer than PRE_PING_IDLE_SECONDS.
+
+    Busy connections skip the round-trip that ``pool_pre_ping`` pays on every
+    checkout; a failed ping raises DisconnectionError so the pool retries with
+    a fresh connection.
+    """
+    if settings.PRE_PING != "idle":
+        return
+
+    @event.listens_for(engine, "checkin")
+    def _mark_idle(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at: Optional[float] = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < settings.PRE_PING_IDLE_SECONDS:
+            return
+
+        metrics = getattr(engine.pool, "metrics", None)
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception:
+            if metrics:
+                metrics.record_ping(ok=False)
+            raise exc.DisconnectionError("Idle connection failed pre-ping")
+        if metrics:
+            metrics.record_ping(ok=True)
+
+
+def pool_status(engine: Engine) -> dict:
+    """Current pool occupancy plus recorded metrics for an engine."""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "in_flight": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics:
+        status.update(metrics.snapshot())
+    return status
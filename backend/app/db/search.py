@@ -0,0 +1,118 @@
+"""Full-text product search.
+
+Postgres keeps a generated ``tsvector`` column on ``products`` behind a GIN
+index; SQLite mirrors the searchable columns into an FTS5 table kept in sync
+by triggers. Neither lives on the ORM model, so both are created by DDL hooks
+(``create_all``) and by the Alembic migration.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import DDL, event, func, literal_column, or_, table, column, text
+from sqlalchemy.sql import ColumnElement, Select
+
+from app.models.product import Product
+
+SEARCH_CONFIG = "english"
+
+# name > description > category, for both ts_rank_cd and bm25
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(category, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX ix_products_search_vector ON products USING gin (search_vector)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, description, category,
+        content='products', content_rowid='rowid', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.rowid, new.name, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.rowid, old.name, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description, category ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.rowid, old.name, old.description, old.category);
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.rowid, new.name, new.description, new.category);
+    END
+    """,
+]
+
+# Rebuild the FTS5 index from products (e.g. after a VACUUM renumbers rowids)
+SQLITE_REBUILD = "INSERT INTO products_fts(products_fts) VALUES ('rebuild')"
+
+# Objects Alembic autogenerate must not try to drop
+UNMAPPED_TABLES = {
+    "products_fts", "products_fts_data", "products_fts_idx",
+    "products_fts_docsize", "products_fts_config",
+}
+UNMAPPED_COLUMNS = {("products", "search_vector")}
+
+for _statement in POSTGRES_DDL:
+    event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in SQLITE_DDL:
+    event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    Product.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"),
+)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_fts = table("products_fts", column("rowid"))
+
+
+def search_terms(term: str) -> List[str]:
+    """Lower-cased word tokens; punctuation never reaches the query parser."""
+    return _WORD.findall(term.lower())[:16]
+
+
+def apply_search(query: Select, term: str, dialect: str) -> Tuple[Select, Optional[ColumnElement]]:
+    """Filter ``query`` to products matching ``term``.
+
+    Returns the filtered query and an ORDER BY expression ranking the best
+    match first. The last word is matched as a prefix for type-ahead.
+    """
+    terms = search_terms(term)
+    if not terms:
+        return query, None
+
+    if dialect == "postgresql":
+        tsquery = func.to_tsquery(SEARCH_CONFIG, " & ".join(terms[:-1] + [f"{terms[-1]}:*"]))
+        vector = literal_column("products.search_vector")
+        query = query.where(vector.op("@@")(tsquery))
+        return query, func.ts_rank_cd(vector, tsquery).desc()
+
+    if dialect == "sqlite":
+        match = " ".join([f'"{t}"' for t in terms[:-1]] + [f'"{terms[-1]}"*'])
+        query = (
+            query.join(_fts, _fts.c.rowid == literal_column("products.rowid"))
+            .where(text("products_fts MATCH :search_match").bindparams(search_match=match))
+        )
+        # bm25 scores are negative: lower is a better match
+        return query, func.bm25(literal_column("products_fts"), 10.0, 4.0, 2.0).asc()
+
+    pattern = f"%{' '.join(terms)}%"
+    query = query.where(or_(
+        Product.name.ilike(pattern),
+        Product.description.ilike(pattern),
+        Product.category.ilike(pattern),
+    ))
+    return query, None
@@ -1,21 +1,55 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app.db.pool import install_idle_pre_ping, pool_kwargs
 
 # SQLAlchemy URL
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sqlite.db")
 
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto the matching async driver."""
+    if url.startswith("sqlite"):
+        return url.replace("+pysqlite", "").replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgres"):
+        _, rest = url.split("://", 1)
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+# Async URL (used by the API); override when the driver mapping is not enough
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL", to_async_url(SQLALCHEMY_DATABASE_URL)
+)
+
 # Engine
 connect_args = {"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
 
+# Sync engine: Alembic, scripts/seeds.py and other offline tooling
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    connect_args=connect_args
+    connect_args=connect_args,
+    **pool_kwargs(SQLALCHEMY_DATABASE_URL)
 )
 
+# Async engine: request handlers
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **pool_kwargs(ASYNC_SQLALCHEMY_DATABASE_URL, async_mode=True)
+)
+
+install_idle_pre_ping(engine)
+install_idle_pre_ping(async_engine.sync_engine)
+
 # SessionLocal instance
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# AsyncSessionLocal instance; objects stay usable after commit since
+# attribute refreshes cannot lazily hit the DB outside of an await
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 # Base for models
 Base = declarative_base()
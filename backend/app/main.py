@@ -1,4 +1,6 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -10,13 +12,45 @@ from app.api.v1.routers import (
     chats_router,
     auth_router,
     community_router,
-    crop_router
+    crop_router,
+    internal_router
 )
+from app.db.session import AsyncSessionLocal, async_engine
+from app.api.cache import response_cache
+from app.utils.detection import detection_pipeline
+from app.utils.feed import rescore_periodically
+from app.utils.likes import flush_periodically, like_buffer
+from app.utils.message_writer import message_writer
+from app.utils.revocation import compact_periodically
+from app.utils.security import password_hasher
 
 load_dotenv()
 
 APP_NAME = os.getenv("APP_NAME", "Crovio Backend API")
-app = FastAPI(title=APP_NAME)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    compaction = asyncio.create_task(compact_periodically(AsyncSessionLocal))
+    rescoring = asyncio.create_task(rescore_periodically(AsyncSessionLocal))
+    like_flushing = asyncio.create_task(
+        flush_periodically(AsyncSessionLocal, on_flush=lambda: response_cache.invalidate("posts"))
+    )
+    await message_writer.start()
+    await detection_pipeline.start()
+    yield
+    compaction.cancel()
+    rescoring.cancel()
+    like_flushing.cancel()
+    await detection_pipeline.stop()
+    if len(like_buffer):
+        async with AsyncSessionLocal() as db:
+            await like_buffer.flush(db)
+    await message_writer.stop()
+    password_hasher.shutdown()
+    # Close pooled async connections on shutdown
+    await async_engine.dispose()
+
+app = FastAPI(title=APP_NAME, lifespan=lifespan)
 
 # CORS logic
 origins = [
@@ -32,6 +66,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Cache"],
 )
 
 app.include_router(auth_router, prefix="/api/v1/auth", tags=["Auth"])
@@ -45,6 +80,9 @@ app.include_router(dealers_router, prefix="/api/v1/dealers", tags=["Dealers"])
 app.include_router(prices_router, prefix="/api/v1/prices", tags=["Prices"])
 app.include_router(chats_router, prefix="/api/v1/chats", tags=["Chats"])
 
+# Operational endpoints (pool sizing etc.); hidden from the public docs
+app.include_router(internal_router, prefix="/internal", tags=["Internal"], include_in_schema=False)
+
 @app.get("/")
 def root():
     return {"message": "Welcome to Crovio API"}
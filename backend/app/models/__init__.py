@@ -1,3 +1,3 @@
-from app.models.dealer import Dealer
+from app.models.dealer import Dealer, DealerStats
 
-__all__ = ['Dealer']
\ No newline at end of file
+__all__ = ['Dealer', 'DealerStats']
\ No newline at end of file
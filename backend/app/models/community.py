@@ -1,5 +1,5 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, List
 
 from sqlalchemy import (
@@ -9,6 +9,10 @@ from sqlalchemy import (
     func,
     ForeignKey,
     Integer,
+    Float,
+    Index,
+    select,
+    update,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.session import Base
@@ -16,6 +20,13 @@ from app.db.session import Base
 class Post(Base):
     """Database Model for Community Posts."""
     __tablename__ = "community_posts"
+    __table_args__ = (
+        # Keyset pagination: newest first, id breaks ties
+        Index("ix_community_posts_created_at_id", "created_at", "id"),
+        # Hot feed, overall and per category (see app.utils.feed)
+        Index("ix_community_posts_score_id", "score", "id"),
+        Index("ix_community_posts_category_score", "category", "score"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         default=uuid.uuid4, primary_key=True, index=True, unique=True, nullable=False
@@ -27,21 +38,35 @@ class Post(Base):
     content: Mapped[str] = mapped_column(Text, nullable=False)
     category: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     likes_count: Mapped[int] = mapped_column(Integer, default=0)
+    # Maintained by create_comment in the comment's transaction
+    comments_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    score: Mapped[float] = mapped_column(Float, default=0.0, server_default="0", nullable=False)
     
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), onupdate=func.now, nullable=False
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
     )
 
     # Relationships
     comments: Mapped[List["Comment"]] = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
 
+    @classmethod
+    def recount(cls, session):
+        """Reset likes_count and comments_count from their tables in one statement."""
+        likes = select(func.count()).where(PostLike.post_id == cls.id).correlate(cls).scalar_subquery()
+        comments = select(func.count()).where(Comment.post_id == cls.id).correlate(cls).scalar_subquery()
+        session.execute(update(cls).values(likes_count=likes, comments_count=comments, updated_at=cls.updated_at))
+
 
 class Comment(Base):
     """Database Model for Post Comments."""
     __tablename__ = "community_comments"
+    __table_args__ = (
+        # Per-post keyset pages and the first-N-per-post window
+        Index("ix_community_comments_post_id_created_at_id", "post_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         default=uuid.uuid4, primary_key=True, index=True, unique=True, nullable=False
@@ -54,9 +79,28 @@ class Comment(Base):
     )
     content: Mapped[str] = mapped_column(Text, nullable=False)
     
+    # Stamped in Python so comments posted within the same second keep their order
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
     )
     
     # Relationships
     post: Mapped["Post"] = relationship("Post", back_populates="comments")
+
+
+class PostLike(Base):
+    """One user's like of a post; the source of truth for Post.likes_count."""
+    __tablename__ = "community_post_likes"
+
+    post_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("community_posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -0,0 +1,80 @@
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import (
+    String,
+    Text,
+    DateTime,
+    func,
+    ForeignKey,
+    Index,
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from app.db.session import Base
+
+class Conversation(Base):
+    """Database Model for chat conversations (direct or group)."""
+    __tablename__ = "conversations"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        default=uuid.uuid4, primary_key=True, index=True, unique=True, nullable=False
+    )
+    title: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    # Orders a user's inbox; bumped whenever a message is sent
+    last_message_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+
+    participants: Mapped[List["ConversationParticipant"]] = relationship(
+        "ConversationParticipant", back_populates="conversation", cascade="all, delete-orphan"
+    )
+
+
+class ConversationParticipant(Base):
+    """Membership of a user in a conversation."""
+    __tablename__ = "conversation_participants"
+
+    conversation_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("conversations.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    joined_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    conversation: Mapped["Conversation"] = relationship("Conversation", back_populates="participants")
+
+
+class Message(Base):
+    """Database Model for chat messages."""
+    __tablename__ = "messages"
+    __table_args__ = (
+        # History pages: newest first within a conversation, id breaks ties
+        Index("ix_messages_conversation_created_at_id", "conversation_id", "created_at", "id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        default=uuid.uuid4, primary_key=True, index=True, unique=True, nullable=False
+    )
+    conversation_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False
+    )
+    sender_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+
+    # Stamped in Python so messages sent within the same second keep their order
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
+    )
@@ -1,5 +1,5 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
 from sqlalchemy import (
@@ -10,13 +10,21 @@ from sqlalchemy import (
     ForeignKey,
     Float,
     Date,
+    Index,
+    Integer,
 )
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.session import Base
 
 class DiseaseDetection(Base):
-    """Model for storing crop disease detection results."""
+    """A disease detection job and, once it completes, its result."""
     __tablename__ = "crop_disease_detections"
+    __table_args__ = (
+        # Workers claim the oldest queued jobs
+        Index("ix_crop_disease_detections_status_created_at", "status", "created_at"),
+        # Resubmitted URLs are answered from their latest completed job
+        Index("ix_crop_disease_detections_image_url_completed_at", "image_url", "completed_at"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         default=uuid.uuid4, primary_key=True, index=True, unique=True, nullable=False
@@ -25,10 +33,33 @@ class DiseaseDetection(Base):
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     image_url: Mapped[str] = mapped_column(String(500), nullable=False)
+    # SHA-256 of the image bytes; with the model version, the key of its DetectionResult
+    image_digest: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    detected_disease: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    confidence_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    recommendation: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # queued, running, completed, failed; rows from before the pipeline are completed
+    status: Mapped[str] = mapped_column(String(20), default="queued", server_default="completed", nullable=False)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Times the job was claimed; jobs that keep being reclaimed are failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+class DetectionResult(Base):
+    """Model output for one image, shared by every job that submitted the same bytes."""
+    __tablename__ = "crop_detection_results"
+
+    digest: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model_version: Mapped[str] = mapped_column(String(100), primary_key=True)
     detected_disease: Mapped[str] = mapped_column(String(255), nullable=False)
     confidence_score: Mapped[float] = mapped_column(Float, nullable=False)
     recommendation: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    
+
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -36,6 +67,11 @@ class DiseaseDetection(Base):
 class SoilAnalysis(Base):
     """Model for storing soil analysis records."""
     __tablename__ = "crop_soil_analysis"
+    __table_args__ = (
+        # Region aggregates are loaded, and refreshed past a watermark, by range scan
+        Index("ix_crop_soil_analysis_region_created_at", "region", "created_at"),
+        Index("ix_crop_soil_analysis_user_id_created_at", "user_id", "created_at"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         default=uuid.uuid4, primary_key=True, index=True, unique=True, nullable=False
@@ -49,10 +85,16 @@ class SoilAnalysis(Base):
     potassium: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     moisture: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     location: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # Normalized location that samples are aggregated by
+    region: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Stamped in Python so samples taken within the same second stay ordered
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
     )
 
 class PlantingSchedule(Base):
@@ -73,3 +115,30 @@ class PlantingSchedule(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
+
+class ScheduleTask(Base):
+    """A dated task expanded from a planting schedule's crop template.
+
+    Rows are derived data: they are rewritten whenever their schedule
+    changes, so they carry no state of their own.
+    """
+    __tablename__ = "crop_schedule_tasks"
+    __table_args__ = (
+        # "Due between" across all of a user's schedules is one range scan
+        Index("ix_crop_schedule_tasks_user_id_due_date", "user_id", "due_date"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        default=uuid.uuid4, primary_key=True, index=True, unique=True, nullable=False
+    )
+    schedule_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("crop_planting_schedules.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)   # irrigation, fertilizing, harvest
+    title: Mapped[str] = mapped_column(String(255), nullable=False)
+    due_date: Mapped[Date] = mapped_column(Date, nullable=False)
+    # Last day of a window task (harvest); None for single-day tasks
+    end_date: Mapped[Optional[Date]] = mapped_column(Date, nullable=True)
@@ -6,7 +6,15 @@ from sqlalchemy import (
     Boolean,
     Text,
     ForeignKey,
+    Integer,
+    Float,
+    func,
+    literal,
+    select,
+    update,
 )
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.session import Base
 
@@ -39,4 +47,57 @@ class Dealer(Base):
     # Created/Updated are handled by User model mostly, but we can keep specific profile timestamps if needed
     
     # Relationship
-    user: Mapped["User"] = relationship("User", backref="dealer_profile")
+    user: Mapped["User"] = relationship("User", back_populates="dealer_profile")
+
+
+class DealerStats(Base):
+    """Denormalized per-dealer aggregates, kept current on every product write.
+
+    Listing dealers reads and sorts these columns directly instead of running
+    COUNT(*) over products per request. ``rebuild`` recomputes them in bulk.
+    """
+    __tablename__ = "dealer_stats"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    products_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False, index=True)
+    rating: Mapped[float] = mapped_column(Float, default=0.0, nullable=False, index=True)
+    ratings_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    user: Mapped["User"] = relationship("User", back_populates="dealer_stats")
+
+    @classmethod
+    async def add_products(cls, session, user_id: uuid.UUID, delta: int):
+        """Atomically shift products_count inside the caller's transaction."""
+        if not delta:
+            return
+        dialect = session.get_bind().dialect.name
+        upsert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = upsert(cls).values(user_id=user_id, products_count=max(delta, 0), rating=0.0, ratings_count=0)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.user_id],
+            set_={"products_count": cls.products_count + delta},
+        )
+        await session.execute(stmt)
+
+    @classmethod
+    def rebuild(cls, session):
+        """Recompute products_count for every dealer in two set-based statements."""
+        from app.models.product import Product
+
+        counts = (
+            select(Product.dealer_id, func.count(), literal(0.0), literal(0))
+            .where(Product.is_active == True)
+            .group_by(Product.dealer_id)
+        )
+        dialect = session.get_bind().dialect.name
+        upsert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = upsert(cls).from_select(["user_id", "products_count", "rating", "ratings_count"], counts)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.user_id],
+            set_={"products_count": stmt.excluded.products_count},
+        )
+        # Ratings are left as they are; only the product counts are derived
+        session.execute(update(cls).values(products_count=0))
+        session.execute(stmt)
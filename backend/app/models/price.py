@@ -0,0 +1,171 @@
+import enum
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Date,
+    ForeignKey,
+    Numeric,
+    String,
+    cast,
+    func,
+    insert,
+    select,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import ColumnElement, Select
+from app.db.session import Base
+
+class PriceObservation(Base):
+    """Append-only market price reports for a product.
+
+    The primary key leads with ``(product_id, observed_at)`` so one product's
+    history is a single contiguous index range; on SQLite the table is
+    WITHOUT ROWID, which stores rows physically in that order. Rows are never
+    updated, only inserted in bulk and range-scanned.
+    """
+    __tablename__ = "price_observations"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    product_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    observed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    # Breaks ties between reports made at the same instant
+    id: Mapped[uuid.UUID] = mapped_column(default=uuid.uuid4, primary_key=True)
+
+    price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    reported_by: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+
+    @classmethod
+    async def ingest(cls, session, product_id: uuid.UUID, observations, reported_by: Optional[uuid.UUID] = None) -> int:
+        """Bulk insert ``(observed_at, price)`` pairs as one executemany."""
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "product_id": product_id,
+                "observed_at": observed_at,
+                "price": price,
+                "reported_by": reported_by,
+            }
+            for observed_at, price in observations
+        ]
+        if rows:
+            await session.execute(insert(cls), rows)
+            newest = max(rows, key=lambda row: row["observed_at"])
+            await LatestPrice.advance(session, product_id, newest["observed_at"], newest["price"])
+        return len(rows)
+
+    @classmethod
+    def bucket(cls, interval: str, dialect: str) -> ColumnElement:
+        """UTC day, or ISO week starting Monday, containing ``observed_at``."""
+        if dialect == "postgresql":
+            return cast(func.date_trunc(interval, func.timezone("UTC", cls.observed_at)), Date)
+        if interval == "week":
+            # Forward to the week's Sunday, then back to its Monday
+            return func.date(cls.observed_at, "weekday 0", "-6 days")
+        return func.date(cls.observed_at)
+
+    @classmethod
+    def history(cls, product_id: uuid.UUID, start: Optional[datetime], end: Optional[datetime]) -> Select:
+        """Observations in ``[start, end)``, oldest first."""
+        query = select(cls.observed_at, cls.price).where(cls.product_id == product_id)
+        if start is not None:
+            query = query.where(cls.observed_at >= start)
+        if end is not None:
+            query = query.where(cls.observed_at < end)
+        return query.order_by(cls.observed_at, cls.id)
+
+    @classmethod
+    def ohlc(cls, product_id: uuid.UUID, start: Optional[datetime], end: Optional[datetime], interval: str, dialect: str) -> Select:
+        """Open/high/low/close/count per bucket, computed in the database."""
+        bucket = cls.bucket(interval, dialect).label("bucket")
+        window = {"partition_by": bucket}
+        ranged = (
+            cls.history(product_id, start, end)
+            .order_by(None)
+            .add_columns(
+                bucket,
+                func.first_value(cls.price).over(**window, order_by=(cls.observed_at, cls.id)).label("open"),
+                func.first_value(cls.price).over(**window, order_by=(cls.observed_at.desc(), cls.id.desc())).label("close"),
+            )
+            .subquery()
+        )
+        return (
+            select(
+                ranged.c.bucket,
+                func.min(ranged.c.open).label("open"),
+                func.max(ranged.c.price).label("high"),
+                func.min(ranged.c.price).label("low"),
+                func.min(ranged.c.close).label("close"),
+                func.count().label("count"),
+            )
+            .group_by(ranged.c.bucket)
+            .order_by(ranged.c.bucket)
+        )
+
+
+class LatestPrice(Base):
+    """Most recent observation per product, maintained on every ingest.
+
+    Lets dashboards fetch current prices for many products with one primary
+    key lookup each instead of a newest-first scan per product.
+    """
+    __tablename__ = "latest_prices"
+
+    product_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    observed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    @classmethod
+    async def advance(cls, session, product_id: uuid.UUID, observed_at: datetime, price: Decimal):
+        """Upsert, ignoring backfilled reports older than the stored one."""
+        dialect = session.get_bind().dialect.name
+        upsert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = upsert(cls).values(product_id=product_id, price=price, observed_at=observed_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.product_id],
+            set_={"price": stmt.excluded.price, "observed_at": stmt.excluded.observed_at},
+            where=stmt.excluded.observed_at >= cls.observed_at,
+        )
+        await session.execute(stmt)
+
+
+class AlertDirection(str, enum.Enum):
+    ABOVE = "above"  # fire when a price reaches or exceeds the threshold
+    BELOW = "below"  # fire when a price reaches or drops under the threshold
+
+
+class PriceAlert(Base):
+    """A user's one-shot price threshold on a product."""
+    __tablename__ = "price_alerts"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        default=uuid.uuid4, primary_key=True, index=True, unique=True, nullable=False
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    product_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    threshold: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    direction: Mapped[AlertDirection] = mapped_column(String(10), nullable=False)
+
+    # Cleared when the alert fires
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
+    triggered_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    triggered_price: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)
@@ -12,6 +12,7 @@ from sqlalchemy import (
     Numeric,
     Integer,
     Text,
+    Index,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.session import Base
@@ -20,6 +21,10 @@ class Product(Base):
     """Database Model for Products."""
     
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination: newest first, id breaks ties
+        Index("ix_products_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         default=uuid.uuid4,
@@ -50,7 +55,7 @@ class Product(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
-        onupdate=func.now,
+        onupdate=func.now(),
         nullable=False,
     )
 
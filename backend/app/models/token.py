@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.session import Base
+
+class RevokedToken(Base):
+    """Revoked refresh-token IDs, kept only until the token would have expired."""
+    __tablename__ = "revoked_tokens"
+
+    # The token's jti; primary-key lookups keep revocation checks O(1)
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
@@ -9,8 +9,10 @@ from sqlalchemy import (
     DateTime,
     func,
     Enum,
+    Index,
+    select,
 )
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.session import Base
 import enum
 
@@ -24,6 +26,10 @@ class User(Base):
     """Database Model for Users."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination of role listings (e.g. dealers)
+        Index("ix_users_role_created_at_id", "role", "created_at", "id"),
+    )
 
     # Primary Key (UUID preferred for distributed systems)
     id: Mapped[uuid.UUID] = mapped_column(
@@ -74,10 +80,19 @@ class User(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
-        onupdate=func.now,
+        onupdate=func.now(),
         nullable=False,
     )
 
+    # One-to-one dealer profile. Never lazy-loaded: listing queries must pick an
+    # eager strategy (joinedload/selectinload) instead of firing one SELECT per row
+    dealer_profile: Mapped[Optional["Dealer"]] = relationship(
+        "Dealer", back_populates="user", uselist=False, lazy="raise_on_sql"
+    )
+    dealer_stats: Mapped[Optional["DealerStats"]] = relationship(
+        "DealerStats", back_populates="user", uselist=False, lazy="raise_on_sql"
+    )
+
     def __repr__(self) -> str:
         return f"<User id={self.id} email={self.email} username={self.username}>"
 
@@ -120,13 +135,13 @@ class User(Base):
 
     # Class methods for convenience
     @classmethod
-    def get_by_email(cls, session, email: str) -> Optional["User"]:
-        return session.query(cls).filter(cls.email == email).first()
+    async def get_by_email(cls, session, email: str) -> Optional["User"]:
+        return await session.scalar(select(cls).where(cls.email == email))
 
     @classmethod
-    def get_by_username(cls, session, username: str) -> Optional["User"]:
-        return session.query(cls).filter(cls.username == username).first()
+    async def get_by_username(cls, session, username: str) -> Optional["User"]:
+        return await session.scalar(select(cls).where(cls.username == username))
     
     @classmethod
-    def get_by_phone(cls, session, phone: str) -> Optional["User"]:
-        return session.query(cls).filter(cls.phone == phone).first()
+    async def get_by_phone(cls, session, phone: str) -> Optional["User"]:
+        return await session.scalar(select(cls).where(cls.phone == phone))
@@ -0,0 +1,30 @@
+from typing import List, Optional
+from uuid import UUID
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+
+# Conversation Schemas
+class ConversationCreate(BaseModel):
+    # The caller is always added; others are invited by user id
+    participant_ids: List[UUID] = Field(min_length=1, max_length=100)
+    title: Optional[str] = Field(None, max_length=255)
+
+class ConversationResponse(BaseModel):
+    id: UUID
+    title: Optional[str] = None
+    participant_ids: List[UUID]
+    created_at: datetime
+    last_message_at: Optional[datetime] = None
+
+# Message Schemas
+class MessageCreate(BaseModel):
+    content: str = Field(min_length=1, max_length=4000)
+
+class MessageResponse(BaseModel):
+    id: UUID
+    conversation_id: UUID
+    sender_id: UUID
+    content: str
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
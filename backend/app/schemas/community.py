@@ -38,8 +38,17 @@ class PostResponse(PostBase):
     id: UUID
     author_id: UUID
     likes_count: int
+    comments_count: int = 0
+    score: float = 0.0
     created_at: datetime
     updated_at: datetime
     comments: List[CommentResponse] = []
 
     model_config = ConfigDict(from_attributes=True)
+
+# Like Schemas
+class LikeResponse(BaseModel):
+    post_id: UUID
+    liked: bool
+    # Eventually consistent: includes this worker's pending likes
+    likes_count: int
@@ -1,13 +1,15 @@
-from typing import Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 from datetime import datetime, date
 from pydantic import BaseModel, ConfigDict
 
 # Disease Detection
+DetectionStatus = Literal["queued", "running", "completed", "failed"]
+
 class DiseaseDetectionBase(BaseModel):
     image_url: str
-    detected_disease: str
-    confidence_score: float
+    detected_disease: Optional[str] = None
+    confidence_score: Optional[float] = None
     recommendation: Optional[str] = None
 
 class DiseaseDetectionCreate(BaseModel):
@@ -17,9 +19,13 @@ class DiseaseDetectionCreate(BaseModel):
     pass
 
 class DiseaseDetectionResponse(DiseaseDetectionBase):
+    """A detection job; the result fields are set once ``status`` is completed."""
     id: UUID
     user_id: UUID
+    status: DetectionStatus
+    error: Optional[str] = None
     created_at: datetime
+    completed_at: Optional[datetime] = None
     model_config = ConfigDict(from_attributes=True)
 
 # Soil Analysis
@@ -38,9 +44,47 @@ class SoilAnalysisCreate(SoilAnalysisBase):
 class SoilAnalysisResponse(SoilAnalysisBase):
     id: UUID
     user_id: UUID
+    region: Optional[str] = None
     created_at: datetime
     model_config = ConfigDict(from_attributes=True)
 
+SoilMetric = Literal["ph_level", "nitrogen", "phosphorus", "potassium", "moisture"]
+
+class SoilMetricSummary(BaseModel):
+    """One measurement across a user's samples, placed within their region."""
+    metric: SoilMetric
+    latest: Optional[float] = None
+    delta: Optional[float] = None            # change since the previous measurement
+    mean: Optional[float] = None
+    trend_per_30d: Optional[float] = None    # least-squares slope
+    status: Literal["low", "optimal", "high", "unknown"]
+    region_percentile: Optional[float] = None  # share of region samples at or below latest, 0-100
+    region_p25: Optional[float] = None
+    region_p50: Optional[float] = None
+    region_p75: Optional[float] = None
+
+class SoilDelta(BaseModel):
+    """Change of each measurement from the previous sample."""
+    created_at: datetime
+    ph_level: Optional[float] = None
+    nitrogen: Optional[float] = None
+    phosphorus: Optional[float] = None
+    potassium: Optional[float] = None
+    moisture: Optional[float] = None
+
+class SoilRecommendation(BaseModel):
+    metric: SoilMetric
+    issue: Literal["deficient", "excess", "declining"]
+    message: str
+
+class SoilAnalyticsResponse(BaseModel):
+    region: Optional[str] = None
+    samples: int
+    region_samples: int
+    metrics: List[SoilMetricSummary]
+    deltas: List[SoilDelta]
+    recommendations: List[SoilRecommendation]
+
 # Planting Schedule
 class PlantingScheduleBase(BaseModel):
     crop_name: str
@@ -52,6 +96,8 @@ class PlantingScheduleCreate(PlantingScheduleBase):
     pass
 
 class PlantingScheduleUpdate(BaseModel):
+    crop_name: Optional[str] = None
+    sowing_date: Optional[date] = None
     status: Optional[str] = None
     harvest_date_est: Optional[date] = None
 
@@ -60,3 +106,14 @@ class PlantingScheduleResponse(PlantingScheduleBase):
     user_id: UUID
     created_at: datetime
     model_config = ConfigDict(from_attributes=True)
+
+TaskKind = Literal["irrigation", "fertilizing", "harvest"]
+
+class ScheduleTaskResponse(BaseModel):
+    id: UUID
+    schedule_id: UUID
+    kind: TaskKind
+    title: str
+    due_date: date
+    end_date: Optional[date] = None     # last day of a harvest window
+    model_config = ConfigDict(from_attributes=True)
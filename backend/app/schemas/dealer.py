@@ -22,8 +22,8 @@ class DealerPublic(BaseModel):
     
     # Verification
     is_verified: bool = False
-    rating: float = 0.0 # Placeholder or calculated
-    products_count: int = 0 # Calculated
+    rating: float = 0.0  # from dealer_stats
+    products_count: int = 0  # from dealer_stats
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -37,18 +37,18 @@ class DealerPublic(BaseModel):
         description = None
         logo_url = None
         
-        # If dealer profile exists
-        if hasattr(user, "dealer_profile") and user.dealer_profile:
-             # Handle list vs object (backref quirks)
-            profile = user.dealer_profile[0] if isinstance(user.dealer_profile, list) and user.dealer_profile else user.dealer_profile
-            
-            if not isinstance(profile, list) and profile: 
-                 business_name = profile.business_name or business_name
-                 city = profile.city or city
-                 state = profile.state
-                 verified = profile.is_verified
-                 description = profile.description
-                 logo_url = profile.logo_url
+        # If dealer profile exists (one-to-one; the query must have eager-loaded it)
+        profile = user.dealer_profile
+        if profile:
+            business_name = profile.business_name or business_name
+            city = profile.city or city
+            state = profile.state
+            verified = profile.is_verified
+            description = profile.description
+            logo_url = profile.logo_url
+
+        # Precomputed aggregates (the query must have loaded them too)
+        stats = user.dealer_stats
         
         return cls(
             id=user.id,
@@ -58,6 +58,8 @@ class DealerPublic(BaseModel):
             is_verified=verified,
             description=description,
             logo_url=logo_url,
+            rating=stats.rating if stats else 0.0,
+            products_count=stats.products_count if stats else 0,
             # owner_name=user.full_name() # If we add full_name property to schema
         )
 
@@ -65,7 +67,8 @@ class DealerPublic(BaseModel):
 
 class PaginatedDealerResponse(BaseModel):
     items: List[DealerPublic]
-    total: int
-    page: int
-    pages: int
+    total: Optional[int] = None  # None when the count was skipped
+    page: Optional[int] = None   # None in cursor mode
+    pages: Optional[int] = None
     per_page: int
+    next_cursor: Optional[str] = None
@@ -0,0 +1,144 @@
+from typing import List, Literal, Optional
+from uuid import UUID
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from app.models.price import AlertDirection
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalize to UTC; naive timestamps are taken to be UTC already."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+# ----------------------------
+# Ingest
+# ----------------------------
+
+class PriceObservationIn(BaseModel):
+    price: Decimal = Field(gt=0, max_digits=10, decimal_places=2)
+    observed_at: Optional[datetime] = None  # defaults to the time of the report
+
+    _utc = field_validator("observed_at")(as_utc)
+
+class PriceReport(BaseModel):
+    observations: List[PriceObservationIn] = Field(min_length=1, max_length=10_000)
+
+class PriceReportResult(BaseModel):
+    product_id: UUID
+    ingested: int
+    alerts_triggered: int = 0
+
+# ----------------------------
+# History
+# ----------------------------
+
+HistoryInterval = Literal["raw", "day", "week"]
+
+class PricePoint(BaseModel):
+    observed_at: datetime
+    price: Decimal
+
+class OHLCBucket(BaseModel):
+    bucket: date  # UTC day, or the Monday starting the week
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+    count: int
+
+class PriceHistoryResponse(BaseModel):
+    product_id: UUID
+    interval: HistoryInterval
+    points: List[PricePoint] = []    # interval=raw
+    buckets: List[OHLCBucket] = []   # interval=day|week
+
+# ----------------------------
+# Latest
+# ----------------------------
+
+class LatestPriceResponse(BaseModel):
+    product_id: UUID
+    price: Decimal
+    observed_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+class LatestPriceQuery(BaseModel):
+    product_ids: List[UUID] = Field(min_length=1, max_length=1000)
+
+# ----------------------------
+# Alerts
+# ----------------------------
+
+class PriceAlertCreate(BaseModel):
+    product_id: UUID
+    threshold: Decimal = Field(gt=0, max_digits=10, decimal_places=2)
+    direction: AlertDirection
+
+class PriceAlertResponse(BaseModel):
+    id: UUID
+    product_id: UUID
+    threshold: Decimal
+    direction: AlertDirection
+    is_active: bool
+    created_at: datetime
+    triggered_at: Optional[datetime] = None
+    triggered_price: Optional[Decimal] = None
+    model_config = ConfigDict(from_attributes=True)
+
+# ----------------------------
+# Analytics
+# ----------------------------
+
+TrendMethod = Literal["linear", "ewm"]
+
+class PriceModel(BaseModel):
+    """Statistics and trend fitted to a product's recent observations."""
+    product_id: UUID
+    method: TrendMethod
+    points: int
+    last_price: float
+    last_observed_at: datetime
+    moving_average: float  # mean of the last PRICE_MA_WINDOW observations
+    volatility: float      # std of log returns between observations
+    slope_per_day: float
+    intercept: float       # fitted price at last_observed_at
+    p25: float
+    p50: float
+    p75: float
+
+class PricePrediction(PriceModel):
+    horizon_days: int
+    predicted_price: float
+    predicted_trend: Literal["upward", "downward", "stable"]
+
+class PredictBatchRequest(BaseModel):
+    product_ids: List[UUID] = Field(min_length=1, max_length=500)
+    horizon_days: int = Field(7, ge=1, le=90)
+    method: TrendMethod = "ewm"
+
+class PriceCompareRequest(BaseModel):
+    product_id: UUID
+    price: Decimal = Field(gt=0)
+
+class PriceCompareResponse(BaseModel):
+    product_id: UUID
+    price: float
+    percentile: float  # share of recent observations at or below price, 0-100
+    p25: float
+    p50: float
+    p75: float
+    verdict: Literal["below_market", "competitive", "above_market"]
+
+class PriceRecommendRequest(BaseModel):
+    product_id: UUID
+    horizon_days: int = Field(7, ge=1, le=90)
+
+class PriceRecommendResponse(BaseModel):
+    product_id: UUID
+    recommended_price: float
+    low: float
+    high: float
+    predicted_trend: Literal["upward", "downward", "stable"]
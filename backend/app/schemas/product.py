@@ -2,7 +2,7 @@ from typing import Optional
 from uuid import UUID
 from datetime import datetime
 from decimal import Decimal
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
 
 class ProductBase(BaseModel):
     name: str
@@ -36,20 +36,12 @@ class DealerPublic(BaseModel):
         city = user_obj.location or "Unknown Location"
         verified = False
         
-        # Check if the user has a dealer profile relationship (backref 'dealer_profile')
-        # Note: relationship is a list because backref default is list-like unless uselist=False specified.
-        # But we defined Dealer.user_id as PK, so it's 1-to-1 effectively but sqlalchemy might load as list.
-        # Let's handle generic case or assume direct access if configured 1-to-1 properly.
-        # However, for simplicity and robustness against the current User/Dealer model structure:
-        
-        if hasattr(user_obj, "dealer_profile") and user_obj.dealer_profile:
-             # If it's a list (default backref behavior without uselist=False)
-            profile = user_obj.dealer_profile[0] if isinstance(user_obj.dealer_profile, list) and user_obj.dealer_profile else user_obj.dealer_profile
-            
-            if not isinstance(profile, list): # It's the object
-                 business_name = profile.business_name or business_name
-                 city = profile.city or city
-                 verified = profile.is_verified
+        # One-to-one dealer profile; the query must have eager-loaded it
+        profile = user_obj.dealer_profile
+        if profile:
+            business_name = profile.business_name or business_name
+            city = profile.city or city
+            verified = profile.is_verified
 
         return DealerPublic(business_name=business_name, city=city, verified=verified)
 
@@ -63,20 +55,18 @@ class ProductResponse(ProductBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator("dealer", mode="before")
     @classmethod
-    def model_validate(cls, obj, *args, **kwargs):
-        # Allow default validation first
-        instance = super().model_validate(obj, *args, **kwargs)
-        
-        # Manually populate dealer if source object has 'dealer' relationship loaded
-        if hasattr(obj, "dealer") and obj.dealer:
-             instance.dealer = DealerPublic.from_orm(obj.dealer)
-        
-        return instance
+    def dealer_from_user(cls, value):
+        # Product.dealer is the owning User row; expose its public dealer profile
+        if value is None or isinstance(value, (DealerPublic, dict)):
+            return value
+        return DealerPublic.from_orm(value)
 
 class PaginatedProductResponse(BaseModel):
     items: list[ProductResponse]
-    total: int
-    page: int
-    pages: int
+    total: Optional[int] = None  # None when the count was skipped
+    page: Optional[int] = None   # None in cursor mode
+    pages: Optional[int] = None
     per_page: int
+    next_cursor: Optional[str] = None
@@ -1,6 +1,8 @@
 import os
-from pydantic import BaseModel
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict
 from datetime import timedelta
+from app.models.users import UserRole
 
 class TokenResponse(BaseModel):
     """Schema for JWT token response."""
@@ -9,6 +11,13 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
     user_id: str
 
+class Principal(BaseModel):
+    """The authenticated caller, as resolved from a verified access token."""
+    id: UUID
+    role: UserRole = UserRole.USER
+
+    model_config = ConfigDict(frozen=True)
+
 class Settings(BaseModel):
     """Configuration settings for JWT and token expiration."""
     JWT_ALGORITHM: str = "HS256"
@@ -16,6 +25,10 @@ class Settings(BaseModel):
     JWT_REFRESH_SECRET_KEY: str = os.getenv('REFRESH_SECRET_KEY', '4f7e1d2c9a8b204')
     ACCESS_TOKEN_EXPIRES_IN: int = 15         # minutes
     REFRESH_TOKEN_EXPIRES_IN: int = 60 * 24 * 7  # 7 days
+    JWT_BACKEND: str = os.getenv('JWT_BACKEND', 'jose')  # jose | pyjwt
+    JWT_CACHE_MAX_ENTRIES: int = int(os.getenv('JWT_CACHE_MAX_ENTRIES', 4096))  # 0 disables
+    REVOCATION_BACKEND: str = os.getenv('REVOCATION_BACKEND', 'database')  # database | memory
+    REVOCATION_COMPACT_INTERVAL: int = int(os.getenv('REVOCATION_COMPACT_INTERVAL', 3600))  # seconds
 
 settings = Settings()
 
@@ -1,24 +1,49 @@
+import asyncio
+import os
+import tempfile
+from contextlib import contextmanager
 import pytest
 from typing import Generator
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
-from app.db.session import Base
+from app.db.session import Base, to_async_url
+from app.api.cache import response_cache
 from app.api.deps import get_db
 from app.main import app
+from app.utils.alerts import alert_index, notifications
+from app.utils.detection import detection_pipeline
+from app.utils.detection_cache import detection_cache
+from app.utils.image_store import image_store
+from app.utils.jwt import verified_tokens
+from app.utils.likes import like_buffer
+from app.utils.message_writer import message_writer
+from app.utils.price_analytics import price_models
+from app.utils.soil_analytics import soil_regions
 
-# Use in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Use a throwaway SQLite file for testing: the sync session used by fixtures
+# and the async session used by the app must see the same database
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Every TestClient runs its own event loop, so never reuse async connections
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+# Detection workers only run when a test queues a job, never on a timer
+detection_pipeline.settings = detection_pipeline.settings.model_copy(update={"DETECTION_POLL_INTERVAL": 3600})
+image_store.directory = tempfile.mkdtemp()
+
 @pytest.fixture(scope="session")
 def db_engine():
     Base.metadata.create_all(bind=engine)
@@ -27,26 +52,63 @@ def db_engine():
 
 @pytest.fixture(scope="function")
 def db(db_engine):
-    connection = db_engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    session = TestingSessionLocal()
     
     # Override the get_db dependency
-    def override_get_db():
-        yield session
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as async_session:
+            yield async_session
 
     app.dependency_overrides[get_db] = override_get_db
+    message_writer.session_factory = TestingAsyncSessionLocal
+    detection_pipeline.session_factory = TestingAsyncSessionLocal
     
     yield session
     
     session.close()
-    transaction.rollback()
-    connection.close()
-    # Remove override
+    # Remove override and wipe whatever the test committed
     del app.dependency_overrides[get_db]
+    with db_engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    asyncio.run(response_cache.clear())
+    verified_tokens.clear()
+    alert_index.clear()
+    notifications.drain()
+    price_models.clear()
+    message_writer.clear()
+    like_buffer.clear()
+    detection_cache.clear()
+    soil_regions.clear()
+
+@pytest.fixture
+def assert_max_queries():
+    """Fail if the block issues more than ``limit`` SQL statements through the app.
+
+    Guards listing endpoints against N+1 loading: the bound must not grow with
+    the number of rows on the page.
+    """
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        assert len(statements) <= limit, (
+            f"{len(statements)} statements issued, expected at most {limit}:\n"
+            + "\n---\n".join(statements)
+        )
+
+    return _assert_max_queries
 
 @pytest.fixture(scope="function")
-def client() -> Generator:
+def client(db) -> Generator:
     with TestClient(app) as c:
         yield c
 
@@ -1,3 +1,8 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg, psycopg2
+from app.db.search import apply_search
+from app.models.product import Product
+from app.utils.pagination import ExplainJSON
 
 def test_read_root(client):
     response = client.get("/")
@@ -90,3 +95,106 @@ def test_crop_tools(authorized_client):
     assert response.status_code == 200
     data = response.json()
     assert data["ph_level"] == 6.5
+
+def test_update_and_delete_product(authorized_client):
+    created = authorized_client.post(
+        "/api/v1/products/",
+        json={"name": "Hoe", "price": 15.5, "quantity": 3, "category": "Tools"}
+    ).json()
+
+    response = authorized_client.put(
+        f"/api/v1/products/{created['id']}", json={"quantity": 7}
+    )
+    assert response.status_code == 200
+    assert response.json()["quantity"] == 7
+
+    response = authorized_client.delete(f"/api/v1/products/{created['id']}")
+    assert response.status_code == 204
+    assert authorized_client.get(f"/api/v1/products/{created['id']}").status_code == 404
+
+def test_list_posts_with_comments(authorized_client):
+    post = authorized_client.post(
+        "/api/v1/community/posts",
+        json={"title": "Rain", "content": "When will it rain?", "category": "General"}
+    ).json()
+    response = authorized_client.post(
+        f"/api/v1/community/posts/{post['id']}/comments", json={"content": "Soon."}
+    )
+    assert response.status_code == 201
+
+    response = authorized_client.get("/api/v1/community/posts", params={"category": "General"})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["comments"][0]["content"] == "Soon."
+
+def test_list_products_cursor_pagination(authorized_client):
+    for i in range(5):
+        authorized_client.post(
+            "/api/v1/products/",
+            json={"name": f"Seed {i}", "price": 1, "quantity": 1, "category": "Seeds"}
+        )
+
+    first = authorized_client.get("/api/v1/products/", params={"per_page": 2}).json()
+    assert first["total"] == 5
+    assert first["next_cursor"]
+
+    seen = [item["id"] for item in first["items"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = authorized_client.get(
+            "/api/v1/products/", params={"per_page": 2, "cursor": cursor}
+        ).json()
+        assert page["total"] is None
+        assert page["page"] is None
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+
+    assert len(seen) == len(set(seen)) == 5
+
+    response = authorized_client.get("/api/v1/products/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_list_posts_cursor_header(authorized_client):
+    for i in range(3):
+        authorized_client.post(
+            "/api/v1/community/posts", json={"title": f"Post {i}", "content": "..."}
+        )
+
+    response = authorized_client.get("/api/v1/community/posts", params={"limit": 2})
+    assert len(response.json()) == 2
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = authorized_client.get("/api/v1/community/posts", params={"limit": 2, "cursor": cursor})
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+def test_search_products_ranked_with_prefix(authorized_client):
+    for payload in (
+        {"name": "Hybrid Maize Seeds", "category": "Seeds", "description": "High yield"},
+        {"name": "Garden Hoe", "category": "Tools", "description": "Good for maize ridges"},
+        {"name": "NPK 15-15-15", "category": "Fertilizers", "description": "Balanced fertilizer"},
+    ):
+        authorized_client.post("/api/v1/products/", json={**payload, "price": 10, "quantity": 1})
+
+    data = authorized_client.get("/api/v1/products/", params={"search": "maize"}).json()
+    assert [item["name"] for item in data["items"]] == ["Hybrid Maize Seeds", "Garden Hoe"]
+
+    data = authorized_client.get("/api/v1/products/", params={"search": "fertil"}).json()
+    assert [item["name"] for item in data["items"]] == ["NPK 15-15-15"]
+
+    data = authorized_client.get("/api/v1/products/", params={"search": '"seeds*('}).json()
+    assert data["total"] == 1
+
+    created = data["items"][0]
+    authorized_client.put(f"/api/v1/products/{created['id']}", json={"name": "Sorghum Seeds"})
+    assert authorized_client.get("/api/v1/products/", params={"search": "hybrid"}).json()["total"] == 0
+
+def test_estimated_count_binds_search_terms_on_postgres():
+    query, _ = apply_search(select(Product.id), "maize'; drop table products", "postgresql")
+    for dialect in (asyncpg.dialect(), psycopg2.dialect()):
+        compiled = ExplainJSON(query).compile(dialect=dialect)
+        assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+        # The search text travels as a bound parameter, never inlined into the SQL
+        assert "maize" not in str(compiled)
+        assert "maize & drop & table & products:*" in compiled.params.values()
@@ -0,0 +1,194 @@
+import asyncio
+import time
+import uuid
+import pytest
+from app.utils import jwt as jwt_utils
+from app.utils.jwt import JoseBackend, TokenError, VerifiedTokenCache, create_access_token, create_refresh_token
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from app.models.users import User
+from app.utils.revocation import MemoryRevocationStore
+from app.utils.security import PasswordHasher, PasswordSettings, password_settings
+
+
+def test_me_returns_typed_principal(client):
+    user_id = uuid.uuid4()
+    token = create_access_token({"sub": str(user_id), "role": "dealer"})
+    response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json() == {"user_id": str(user_id), "role": "dealer"}
+
+
+def test_verified_tokens_skip_signature_checks(client, monkeypatch):
+    token = create_access_token({"sub": str(uuid.uuid4())})
+    calls = []
+    decode = jwt_utils.jwt_backend.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt_utils.jwt_backend, "decode", counting_decode)
+    for _ in range(3):
+        response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+    assert len(calls) == 1
+
+    # A tampered token is a different cache key and still fails verification
+    response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token[:-2]}xx"})
+    assert response.status_code == 401
+
+
+def test_verified_token_cache_is_bounded_by_exp():
+    cache = VerifiedTokenCache(max_entries=8)
+    cache.put("a", "principal", exp=time.time() + 0.02)
+    cache.put("b", "principal", exp=time.time() - 1)
+    assert cache.get("a") == "principal"
+    assert cache.get("b") is None
+    time.sleep(0.03)
+    assert cache.get("a") is None
+
+
+def test_pyjwt_backend_interoperates_with_jose():
+    pytest.importorskip("jwt")
+    from app.utils.jwt import PyJWTBackend
+
+    claims = {"sub": "abc", "exp": int(time.time()) + 60}
+    token = JoseBackend().encode(claims, "secret", "HS256")
+    assert PyJWTBackend().decode(token, "secret", ["HS256"])["sub"] == "abc"
+    with pytest.raises(TokenError):
+        PyJWTBackend().decode(token, "other", ["HS256"])
+
+
+def login(client) -> dict:
+    credentials = {"email": "refresh@example.com", "password": "Password123!"}
+    client.post("/api/v1/auth/register", json={**credentials, "accept_terms": True})
+    return client.post("/api/v1/auth/login", json=credentials).json()
+
+
+def test_refresh_rotates_and_rejects_reuse(client):
+    tokens = login(client)
+
+    response = client.post("/api/v1/auth/refresh", params={"token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()["refresh_token"]
+    assert rotated != tokens["refresh_token"]
+
+    # The old refresh token was spent by the rotation
+    response = client.post("/api/v1/auth/refresh", params={"token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+    assert client.post("/api/v1/auth/refresh", params={"token": rotated}).status_code == 200
+
+
+def test_refresh_takes_role_from_the_user(client, db):
+    credentials = {"email": "demoted@example.com", "password": "Password123!"}
+    client.post("/api/v1/auth/register", json={**credentials, "accept_terms": True})
+    user = db.query(User).filter(User.email == credentials["email"]).one()
+    user.role = "admin"
+    db.commit()
+    tokens = client.post("/api/v1/auth/login", json=credentials).json()
+    assert jwt_utils.decode_refresh_token(tokens["refresh_token"])["role"] == "admin"
+
+    user.role = "user"
+    db.commit()
+    response = client.post("/api/v1/auth/refresh", params={"token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    assert jwt_utils.decode_access_token(response.json()["access_token"])["role"] == "user"
+    assert jwt_utils.decode_refresh_token(response.json()["refresh_token"])["role"] == "user"
+
+    db.delete(user)
+    db.commit()
+    response = client.post("/api/v1/auth/refresh", params={"token": response.json()["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_logout_revokes_refresh_token(client):
+    tokens = login(client)
+
+    response = client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    # Logging out again is harmless
+    response = client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+
+    response = client.post("/api/v1/auth/refresh", params={"token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+    response = client.post("/api/v1/auth/logout", json={"refresh_token": "not-a-token"})
+    assert response.status_code == 400
+
+
+def test_refresh_tokens_carry_unique_jti():
+    first = jwt_utils.decode_refresh_token(create_refresh_token({"sub": "abc"}))
+    second = jwt_utils.decode_refresh_token(create_refresh_token({"sub": "abc"}))
+    assert first["jti"] != second["jti"]
+
+
+def test_memory_revocation_store_expires_and_compacts():
+    store = MemoryRevocationStore()
+
+    async def scenario():
+        assert await store.revoke(None, "a", time.time() + 60)
+        assert not await store.revoke(None, "a", time.time() + 60)
+        assert await store.revoke(None, "b", time.time() - 1)
+        assert await store.is_revoked(None, "a")
+        assert not await store.is_revoked(None, "b")
+        assert await store.compact() == 1
+        assert len(store) == 1
+
+    asyncio.run(scenario())
+
+
+def test_database_revocation_store_compacts_expired_rows(db):
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from app.db.session import to_async_url
+    from app.utils.revocation import DatabaseRevocationStore
+
+    store = DatabaseRevocationStore()
+
+    async def scenario():
+        engine = create_async_engine(to_async_url(db.get_bind().url.render_as_string()))
+        async with AsyncSession(engine) as session:
+            assert await store.revoke(session, "live", time.time() + 60)
+            assert await store.revoke(session, "dead", time.time() - 1)
+            assert not await store.revoke(session, "live", time.time() + 60)
+            assert await store.is_revoked(session, "live")
+            assert not await store.is_revoked(session, "dead")
+            assert await store.compact(session) == 1
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_login_rehashes_legacy_passwords(client, db):
+    legacy_hash = CryptContext(schemes=["sha256_crypt"]).hash("Password123!")
+    db.add(User(email="legacy@example.com", password_hash=legacy_hash, accept_terms=True))
+    db.commit()
+
+    response = client.post("/api/v1/auth/login", json={"email": "legacy@example.com", "password": "Password123!"})
+    assert response.status_code == 200
+
+    db.expire_all()
+    user = db.query(User).filter_by(email="legacy@example.com").one()
+    assert user.password_hash.startswith(f"${password_settings.PASSWORD_SCHEME}")
+    response = client.post("/api/v1/auth/login", json={"email": "legacy@example.com", "password": "Password123!"})
+    assert response.status_code == 200
+
+
+def test_password_hasher_sheds_load_when_saturated():
+    hasher = PasswordHasher(PasswordSettings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=1))
+
+    async def scenario():
+        first = asyncio.ensure_future(hasher.hash("a"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as excinfo:
+            await hasher.hash("b")
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.headers["Retry-After"] == "1"
+        assert (await hasher.verify_and_update("a", await first))[0]
+
+    asyncio.run(scenario())
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.pending == 0
+    hasher.shutdown()
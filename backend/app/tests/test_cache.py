@@ -0,0 +1,58 @@
+import time
+import pytest
+from app.utils.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats() == {"entries": 2, "hits": 2, "misses": 1}
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_product_listing_is_cached_and_invalidated(authorized_client):
+    first = authorized_client.get("/api/v1/products/", params={"per_page": 5, "category": ""})
+    assert first.headers["X-Cache"] == "MISS"
+    etag = first.headers["ETag"]
+
+    # Same normalized params in a different order hit the same entry
+    second = authorized_client.get("/api/v1/products/", params={"category": "", "per_page": 5})
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+
+    not_modified = authorized_client.get(
+        "/api/v1/products/", params={"per_page": 5}, headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+
+    authorized_client.post(
+        "/api/v1/products/",
+        json={"name": "Cutlass", "price": 5, "quantity": 1, "category": "Tools"}
+    )
+    after_write = authorized_client.get(
+        "/api/v1/products/", params={"per_page": 5}, headers={"If-None-Match": etag}
+    )
+    assert after_write.status_code == 200
+    assert after_write.headers["X-Cache"] == "MISS"
+    assert after_write.json()["total"] == 1
+
+
+def test_cached_posts_keep_cursor_header(authorized_client):
+    for i in range(2):
+        authorized_client.post("/api/v1/community/posts", json={"title": f"T{i}", "content": "..."})
+
+    miss = authorized_client.get("/api/v1/community/posts", params={"limit": 1})
+    hit = authorized_client.get("/api/v1/community/posts", params={"limit": 1})
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.headers["X-Next-Cursor"] == miss.headers["X-Next-Cursor"]
@@ -0,0 +1,271 @@
+import asyncio
+import uuid
+import pytest
+from starlette.websockets import WebSocketDisconnect, WebSocketState
+from app.models.conversation import Message
+from app.models.users import User
+from app.utils.chat_hub import ChatHub, ChatSettings, InProcessBroker, chat_hub
+from app.utils.jwt import create_access_token
+from app.utils.message_writer import MessageWriter, message_writer
+
+
+def create_user(db, email: str) -> User:
+    user = User(email=email, password_hash="x", accept_terms=True)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def create_chat(client, *participants) -> str:
+    response = client.post("/api/v1/chats/", json={"participant_ids": [str(u.id) for u in participants]})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_send_and_page_history(authorized_client, db):
+    friend = create_user(db, "friend@example.com")
+    chat_id = create_chat(authorized_client, friend)
+
+    for i in range(5):
+        response = authorized_client.post(f"/api/v1/chats/{chat_id}/send", json={"content": f"msg {i}"})
+        assert response.status_code == 201
+
+    first = authorized_client.get(f"/api/v1/chats/{chat_id}", params={"limit": 3})
+    assert [m["content"] for m in first.json()] == ["msg 4", "msg 3", "msg 2"]
+    second = authorized_client.get(
+        f"/api/v1/chats/{chat_id}", params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]}
+    )
+    assert [m["content"] for m in second.json()] == ["msg 1", "msg 0"]
+    assert "X-Next-Cursor" not in second.headers
+
+    inbox = authorized_client.get("/api/v1/chats/").json()
+    assert inbox[0]["id"] == chat_id
+    assert inbox[0]["last_message_at"] is not None
+
+
+def test_non_participants_cannot_read_or_join(authorized_client, db):
+    friend = create_user(db, "friend@example.com")
+    outsider = create_user(db, "outsider@example.com")
+    chat_id = create_chat(authorized_client, friend)
+    token = create_access_token({"sub": str(outsider.id)})
+
+    response = authorized_client.get(
+        f"/api/v1/chats/{chat_id}", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with authorized_client.websocket_connect(f"/api/v1/chats/{chat_id}/ws?token={token}") as ws:
+            ws.receive_text()
+    assert exc.value.code == 1008
+
+
+def test_websocket_fans_out_to_participants(authorized_client, db):
+    friend = create_user(db, "friend@example.com")
+    chat_id = create_chat(authorized_client, friend)
+    my_token = authorized_client.headers["Authorization"].split()[1]
+    friend_token = create_access_token({"sub": str(friend.id)})
+
+    # Entering the client runs every socket and request on one event loop, as in production
+    with authorized_client, \
+            authorized_client.websocket_connect(f"/api/v1/chats/{chat_id}/ws?token={my_token}") as mine, \
+            authorized_client.websocket_connect(f"/api/v1/chats/{chat_id}/ws?token={friend_token}") as theirs:
+        theirs.send_json({"content": "hello over the socket"})
+        for ws in (mine, theirs):
+            event = ws.receive_json()
+            assert event["type"] == "message"
+            assert event["content"] == "hello over the socket"
+            assert event["sender_id"] == str(friend.id)
+
+        # Messages sent over REST reach live sockets too
+        authorized_client.post(f"/api/v1/chats/{chat_id}/send", json={"content": "via rest"})
+        for ws in (mine, theirs):
+            assert ws.receive_json()["content"] == "via rest"
+
+        mine.send_json({"content": ""})
+        assert mine.receive_json()["type"] == "error"
+
+    assert chat_hub.stats()["connections"] == 0
+    history = authorized_client.get(f"/api/v1/chats/{chat_id}").json()
+    assert [m["content"] for m in history] == ["via rest", "hello over the socket"]
+
+
+class FakeSocket:
+    """Accepts frames without ever sending them, like a stalled client."""
+
+    def __init__(self):
+        self.closed_with = None
+
+    application_state = WebSocketState.CONNECTED
+
+    async def close(self, code: int, reason: str = ""):
+        self.closed_with = code
+
+
+@pytest.mark.parametrize("policy", ["drop", "disconnect"])
+def test_slow_consumers_do_not_block_the_channel(policy):
+    async def scenario():
+        hub = ChatHub(InProcessBroker(), ChatSettings(CHAT_SEND_QUEUE_SIZE=2, CHAT_SLOW_CONSUMER=policy))
+        slow, fast = FakeSocket(), FakeSocket()
+        slow_conn = await hub.join("c", slow)
+        fast_conn = await hub.join("c", fast)
+        for i in range(3):
+            await hub.publish("c", {"n": i})
+            fast_conn.queue.get_nowait()  # the fast client keeps draining
+        await asyncio.sleep(0)
+        return hub, slow, slow_conn
+
+    hub, slow, slow_conn = asyncio.run(scenario())
+    stats = hub.stats()
+    assert stats["delivered"] == 5
+    assert slow_conn.queue.qsize() == 2
+    if policy == "drop":
+        assert stats["dropped"] == 1 and slow.closed_with is None
+    else:
+        assert stats["disconnected"] == 1 and slow.closed_with == 1008
+
+
+def test_slow_consumer_is_closed_only_after_its_sender_stops():
+    class StalledSocket(FakeSocket):
+        sending = False
+
+        async def send_text(self, payload: str):
+            self.sending = True
+            try:
+                await asyncio.Event().wait()   # the client never reads
+            finally:
+                self.sending = False
+
+        async def close(self, code: int, reason: str = ""):
+            assert not self.sending, "close frame written while a send was in flight"
+            self.closed_with = code
+
+    async def scenario():
+        hub = ChatHub(InProcessBroker(), ChatSettings(CHAT_SEND_QUEUE_SIZE=1))
+        socket = StalledSocket()
+        connection = await hub.join("c", socket)
+        connection.start()
+        for i in range(3):
+            await hub.publish("c", {"n": i})
+            await asyncio.sleep(0)
+        await connection.closer
+        return socket, connection
+
+    socket, connection = asyncio.run(scenario())
+    assert socket.closed_with == 1008
+    assert connection.sender.cancelled()
+
+
+def test_write_behind_batches_and_replays_journal(authorized_client, db, tmp_path, assert_max_queries):
+    friend = create_user(db, "friend@example.com")
+    chat_id = uuid.UUID(create_chat(authorized_client, friend))
+    settings = ChatSettings(CHAT_FLUSH_MAX_BATCH=100, CHAT_JOURNAL_DIR=str(tmp_path))
+
+    async def crash_before_flush():
+        writer = MessageWriter(message_writer.session_factory, settings)
+        for i in range(250):
+            await writer.enqueue(chat_id, friend.id, f"msg {i}")
+        assert writer.stats()["pending"] == 250
+
+    async def restart():
+        writer = MessageWriter(message_writer.session_factory, settings)
+        await writer.start()
+        await writer.stop()
+        return writer
+
+    asyncio.run(crash_before_flush())
+    assert list(tmp_path.iterdir())
+
+    # 3 multi-row INSERTs and one conversation UPDATE, in one transaction
+    with assert_max_queries(4):
+        writer = asyncio.run(restart())
+    stats = writer.stats()
+    assert stats["replayed"] == 250 and stats["flushed"] == 250 and stats["pending"] == 0
+    assert stats["flush_latency"]["count"] == 1
+    assert not list(tmp_path.iterdir())
+
+    # Replaying already-committed rows is a no-op
+    asyncio.run(crash_before_flush())
+    asyncio.run(restart())
+    asyncio.run(restart())
+    history = authorized_client.get(f"/api/v1/chats/{chat_id}", params={"limit": 200})
+    assert len(history.json()) == 200
+    assert db.query(Message).filter(Message.conversation_id == chat_id).count() == 500
+
+
+def test_failed_flush_keeps_messages_queued():
+    class Broken:
+        async def __aenter__(self):
+            raise OSError("database unavailable")
+
+        async def __aexit__(self, *exc):
+            return False
+
+    async def scenario():
+        writer = MessageWriter(Broken, ChatSettings())
+        await writer.enqueue(uuid.uuid4(), uuid.uuid4(), "hello")
+        with pytest.raises(OSError):
+            await writer.flush()
+        return writer
+
+    stats = asyncio.run(scenario()).stats()
+    assert stats["pending"] == 1 and stats["failures"] == 1 and stats["flushed"] == 0
+
+
+def test_sync_waits_for_an_in_flight_flush(monkeypatch):
+    committed = []
+
+    class Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def commit(self):
+            committed.append(True)
+
+    async def scenario():
+        writing, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_write(db, rows, chunk_size):
+            writing.set()
+            await release.wait()
+
+        monkeypatch.setattr("app.utils.message_writer.write_batch", slow_write)
+        writer = MessageWriter(Session, ChatSettings())
+        chat_id = uuid.uuid4()
+        await writer.enqueue(chat_id, uuid.uuid4(), "hello")
+        background = asyncio.create_task(writer.flush())
+        await writing.wait()
+
+        # The message has left the queue but is not committed yet: a read must wait for it
+        reader = asyncio.create_task(writer.sync(chat_id))
+        await asyncio.sleep(0.01)
+        assert not reader.done()
+        release.set()
+        await asyncio.gather(background, reader)
+        assert committed and not writer.has_pending(chat_id)
+
+    asyncio.run(scenario())
+
+
+def test_rejected_rows_are_dropped_without_blocking_the_batch(authorized_client, db):
+    friend = create_user(db, "friend@example.com")
+    chat_id = uuid.UUID(create_chat(authorized_client, friend))
+
+    async def scenario():
+        writer = MessageWriter(message_writer.session_factory, ChatSettings())
+        await writer.enqueue(chat_id, friend.id, "before")
+        bad = await writer.enqueue(chat_id, friend.id, "bad")
+        bad["content"] = None   # violates NOT NULL
+        unbindable = await writer.enqueue(chat_id, friend.id, "unbindable")
+        unbindable["sender_id"] = "not-a-uuid"   # fails before reaching the database
+        await writer.enqueue(chat_id, friend.id, "after")
+        assert await writer.flush() == 2
+        return writer
+
+    stats = asyncio.run(scenario()).stats()
+    assert stats["pending"] == 0 and stats["flushed"] == 2 and stats["dropped"] == 2
+    contents = {m.content for m in db.query(Message).filter(Message.conversation_id == chat_id)}
+    assert contents == {"before", "after"}
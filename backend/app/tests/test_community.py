@@ -0,0 +1,184 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.db.session import to_async_url
+from app.models.community import Post
+from app.models.users import User
+from app.utils.feed import hot_score, rescore
+from app.utils.jwt import create_access_token
+from app.utils.likes import like_buffer
+
+
+def create_post(client, title: str, category: str = "General") -> dict:
+    response = client.post("/api/v1/community/posts", json={"title": title, "content": "...", "category": category})
+    assert response.status_code == 201
+    return response.json()
+
+
+def create_user(db, email: str) -> User:
+    user = User(email=email, password_hash="x", accept_terms=True)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def run_async(db, fn):
+    """Run ``fn(session)`` on an async session bound to the test database."""
+    async def run():
+        engine = create_async_engine(to_async_url(db.get_bind().url.render_as_string(hide_password=False)))
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+                return await fn(session)
+        finally:
+            await engine.dispose()
+    return asyncio.run(run())
+
+
+def test_hot_score_decays_with_age():
+    now = datetime.now(timezone.utc)
+    # A day-old post needs far more engagement to outrank a fresh one
+    assert hot_score(0, 0, now) > hot_score(5, 0, now - timedelta(days=1))
+    assert hot_score(1000, 0, now - timedelta(days=1)) > hot_score(0, 0, now)
+    assert hot_score(0, 1, now) > hot_score(1, 0, now)
+
+
+def test_hot_feed_orders_by_score(authorized_client, db):
+    quiet = create_post(authorized_client, "Quiet")
+    discussed = create_post(authorized_client, "Discussed")
+    other = create_post(authorized_client, "Elsewhere", category="Markets")
+    for _ in range(3):
+        authorized_client.post(f"/api/v1/community/posts/{discussed['id']}/comments", json={"content": "+1"})
+
+    response = authorized_client.get("/api/v1/community/posts", params={"sort": "hot"})
+    titles = [p["title"] for p in response.json()]
+    assert titles[0] == "Discussed"
+    assert set(titles) == {"Quiet", "Discussed", "Elsewhere"}
+
+    response = authorized_client.get("/api/v1/community/posts", params={"sort": "hot", "category": "General"})
+    assert [p["title"] for p in response.json()] == ["Discussed", "Quiet"]
+
+    response = authorized_client.get("/api/v1/community/posts", params={"sort": "hot", "cursor": "abc"})
+    assert response.status_code == 400
+
+
+def test_rescore_repairs_drift_and_feed_uses_index(authorized_client, db):
+    post = create_post(authorized_client, "Popular")
+    create_post(authorized_client, "Fresh")
+    # Counts changed behind the API's back leave a stale score...
+    db.query(Post).filter(Post.id == uuid.UUID(post["id"])).update({"likes_count": 10_000})
+    db.commit()
+    assert run_async(db, rescore) == 2
+
+    response = authorized_client.get("/api/v1/community/posts", params={"sort": "hot"})
+    assert response.json()[0]["title"] == "Popular"
+
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM community_posts WHERE category = 'General' "
+        "ORDER BY score DESC LIMIT 20"
+    )).all()
+    assert "ix_community_posts_category_score" in " ".join(str(row) for row in plan)
+
+
+def test_likes_are_idempotent_and_coalesced(authorized_client, db):
+    post = create_post(authorized_client, "Harvest")
+    url = f"/api/v1/community/posts/{post['id']}/like"
+
+    assert authorized_client.put(url).json()["likes_count"] == 1
+    assert authorized_client.put(url).json()["likes_count"] == 1  # liking twice counts once
+    other = create_access_token({"sub": str(create_user(db, "other@example.com").id)})
+    response = authorized_client.put(url, headers={"Authorization": f"Bearer {other}"})
+    assert response.json() == {"post_id": post["id"], "liked": True, "likes_count": 2}
+    assert authorized_client.delete(url).json()["likes_count"] == 1
+    assert authorized_client.delete(url).json()["likes_count"] == 1
+
+    # Four clicks on one post coalesce into one pending delta, not yet stored
+    assert like_buffer.pending(uuid.UUID(post["id"])) == 1
+    stored = db.query(Post).filter(Post.id == uuid.UUID(post["id"])).one()
+    assert stored.likes_count == 0
+
+    assert run_async(db, like_buffer.flush) == 1
+    assert like_buffer.pending(uuid.UUID(post["id"])) == 0
+    db.expire_all()
+    stored = db.query(Post).filter(Post.id == uuid.UUID(post["id"])).one()
+    assert stored.likes_count == 1
+    assert stored.score == hot_score(1, 0, stored.created_at)
+
+    assert authorized_client.put(f"/api/v1/community/posts/{uuid.uuid4()}/like").status_code == 404
+
+
+def test_recount_repairs_lost_deltas(authorized_client, db):
+    post = create_post(authorized_client, "Rain")
+    authorized_client.put(f"/api/v1/community/posts/{post['id']}/like")
+    like_buffer.clear()  # e.g. the worker died before flushing
+
+    Post.recount(db)
+    db.commit()
+    assert db.query(Post).filter(Post.id == uuid.UUID(post["id"])).one().likes_count == 1
+
+
+def test_comment_pages_and_counts(authorized_client):
+    post = create_post(authorized_client, "Pests")
+    for i in range(5):
+        authorized_client.post(f"/api/v1/community/posts/{post['id']}/comments", json={"content": f"c{i}"})
+
+    url = f"/api/v1/community/posts/{post['id']}/comments"
+    first = authorized_client.get(url, params={"limit": 3})
+    assert [c["content"] for c in first.json()] == ["c0", "c1", "c2"]
+    second = authorized_client.get(url, params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+    assert [c["content"] for c in second.json()] == ["c3", "c4"]
+    assert "X-Next-Cursor" not in second.headers
+    assert authorized_client.get(f"/api/v1/community/posts/{uuid.uuid4()}/comments").status_code == 404
+
+    detail = authorized_client.get(f"/api/v1/community/posts/{post['id']}", params={"comments": 2}).json()
+    assert detail["comments_count"] == 5
+    assert [c["content"] for c in detail["comments"]] == ["c0", "c1"]
+    # Without a limit every comment is embedded, as before
+    detail = authorized_client.get(f"/api/v1/community/posts/{post['id']}").json()
+    assert [c["content"] for c in detail["comments"]] == ["c0", "c1", "c2", "c3", "c4"]
+
+
+def test_list_posts_embeds_first_comments_in_one_query(authorized_client, assert_max_queries):
+    for p in range(4):
+        post = create_post(authorized_client, f"Post {p}")
+        for i in range(p):
+            authorized_client.post(f"/api/v1/community/posts/{post['id']}/comments", json={"content": f"{p}.{i}"})
+
+    with assert_max_queries(2):
+        response = authorized_client.get("/api/v1/community/posts", params={"comments": 2})
+    posts = {p["title"]: p for p in response.json()}
+    assert [c["content"] for c in posts["Post 3"]["comments"]] == ["3.0", "3.1"]
+    assert posts["Post 3"]["comments_count"] == 3
+    assert posts["Post 0"]["comments"] == []
+
+    response = authorized_client.get("/api/v1/community/posts", params={"comments": 0})
+    assert all(p["comments"] == [] for p in response.json())
+
+    with assert_max_queries(2):
+        response = authorized_client.get("/api/v1/community/posts")
+    posts = {p["title"]: p for p in response.json()}
+    assert [c["content"] for c in posts["Post 3"]["comments"]] == ["3.0", "3.1", "3.2"]
+
+
+def test_embedded_comments_continue_into_the_comment_pages(authorized_client):
+    post = create_post(authorized_client, "Irrigation")
+    for i in range(7):
+        authorized_client.post(f"/api/v1/community/posts/{post['id']}/comments", json={"content": f"c{i}"})
+
+    listed = authorized_client.get("/api/v1/community/posts", params={"comments": 2}).json()
+    seen = [c["id"] for c in listed[0]["comments"]]
+
+    url = f"/api/v1/community/posts/{post['id']}/comments"
+    params = {"skip": len(seen), "limit": 2}
+    while True:
+        page = authorized_client.get(url, params=params)
+        seen += [c["id"] for c in page.json()]
+        if "X-Next-Cursor" not in page.headers:
+            break
+        params = {"limit": 2, "cursor": page.headers["X-Next-Cursor"]}
+
+    everything = authorized_client.get(f"/api/v1/community/posts/{post['id']}").json()["comments"]
+    assert seen == [c["id"] for c in everything]
+    assert len(set(seen)) == listed[0]["comments_count"] == 7
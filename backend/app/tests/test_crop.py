@@ -0,0 +1,456 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+import httpx
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.db.session import to_async_url
+from app.models.crop import DetectionResult, DiseaseDetection, ScheduleTask, SoilAnalysis
+from app.models.users import User
+from app.utils import detection
+from app.utils.detection import DetectionPipeline, DetectionSettings, FetchRefused, check_fetch_url, detection_pipeline
+from app.utils.detection_cache import detection_cache
+from app.utils.image_store import image_store, iter_multipart_file
+from app.utils.inference import DISEASE_LABELS, RECOMMENDATIONS, StubModel
+from app.utils.jwt import create_access_token
+from app.utils.soil_analytics import soil_regions
+
+
+async def fake_fetch(url: str) -> bytes:
+    if "missing" in url:
+        raise httpx.HTTPStatusError("404 Not Found", request=httpx.Request("GET", url), response=httpx.Response(404))
+    return url.encode()
+
+
+def submit(client, image_url: str) -> dict:
+    response = client.post("/api/v1/crop/disease-detect", json={"image_url": image_url})
+    assert response.status_code == 202
+    job = response.json()
+    assert response.headers["location"] == f"/api/v1/crop/disease-detect/{job['id']}"
+    return job
+
+
+def wait_for_job(client, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/v1/crop/disease-detect/{job_id}").json()
+        if job["status"] in ("completed", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def test_detection_jobs_run_in_the_background(authorized_client, monkeypatch):
+    monkeypatch.setattr(detection_pipeline, "fetch", fake_fetch)
+
+    job = submit(authorized_client, "https://img.example.com/leaf.jpg")
+    assert job["status"] in ("queued", "running")
+    assert job["detected_disease"] is None
+
+    done = wait_for_job(authorized_client, job["id"])
+    assert done["status"] == "completed"
+    assert done["detected_disease"] in DISEASE_LABELS
+    assert done["recommendation"] == RECOMMENDATIONS[done["detected_disease"]]
+    assert 0 < done["confidence_score"] <= 1
+    assert done["completed_at"] is not None
+
+    failed = wait_for_job(authorized_client, submit(authorized_client, "https://img.example.com/missing.jpg")["id"])
+    assert failed["status"] == "failed"
+    assert failed["error"] == "Could not fetch image"
+    assert failed["detected_disease"] is None
+
+    history = authorized_client.get("/api/v1/crop/disease-history").json()
+    assert {j["status"] for j in history} == {"completed", "failed"}
+
+
+def test_duplicate_images_are_answered_from_the_cache(authorized_client, db, monkeypatch):
+    async def same_photo(url: str) -> bytes:
+        return b"the same leaf"
+
+    monkeypatch.setattr(detection_pipeline, "fetch", same_photo)
+    first = wait_for_job(authorized_client, submit(authorized_client, "https://img.example.com/a.jpg")["id"])
+    assert first["status"] == "completed"
+    inferred = detection_pipeline.inferred
+
+    # Same bytes under another URL: fetched, but not run through the model again
+    mirror = wait_for_job(authorized_client, submit(authorized_client, "https://cdn.example.com/a.jpg")["id"])
+    assert mirror["detected_disease"] == first["detected_disease"]
+    assert detection_pipeline.inferred == inferred
+
+    # Same URL: answered at submission, from memory and then from the table
+    for reset in (False, True):
+        if reset:
+            detection_cache.clear()
+        hits = detection_cache.stats()
+        response = authorized_client.post("/api/v1/crop/disease-detect", json={"image_url": "https://img.example.com/a.jpg"})
+        assert response.status_code == 200
+        again = response.json()
+        assert again["status"] == "completed"
+        assert again["id"] != first["id"]
+        assert (again["detected_disease"], again["confidence_score"]) == (first["detected_disease"], first["confidence_score"])
+        tier = "table_hits" if reset else "memory_hits"
+        assert detection_cache.stats()[tier] == hits[tier] + 1
+    assert detection_pipeline.inferred == inferred
+
+    # Every job points at the one stored result
+    db.expire_all()
+    assert {job.image_digest for job in db.query(DiseaseDetection)} == {hashlib.sha256(b"the same leaf").hexdigest()}
+    assert db.query(DetectionResult).count() == 1
+
+
+def test_image_fetches_cannot_reach_internal_addresses():
+    async def scenario():
+        for url in ("http://127.0.0.1/leaf.jpg", "http://169.254.169.254/latest/meta-data", "http://10.0.0.5/x",
+                    "http://[::1]/x", "file:///etc/passwd"):
+            with pytest.raises(FetchRefused):
+                await check_fetch_url(url)
+        with pytest.raises(FetchRefused):
+            await check_fetch_url("http://93.184.216.34/leaf.jpg", "img.example.com")
+        await check_fetch_url("http://93.184.216.34/leaf.jpg")
+
+        # Redirects are checked hop by hop
+        def handler(request):
+            if request.url.host == "93.184.216.34":
+                return httpx.Response(302, headers={"location": "http://169.254.169.254/latest/meta-data"})
+            return httpx.Response(200, content=b"secret")
+
+        pipeline = DetectionPipeline(StubModel(), settings=DetectionSettings())
+        pipeline._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            with pytest.raises(FetchRefused):
+                await pipeline.fetch("http://93.184.216.34/leaf.jpg")
+        finally:
+            await pipeline._http.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_image_fetches_connect_to_the_checked_address(monkeypatch):
+    # A rebinding host answers the check with a public address and any later lookup with a private one
+    answers = iter([["93.184.216.34"]])
+
+    async def rebinding(host, port):
+        return next(answers, ["127.0.0.1"])
+
+    monkeypatch.setattr(detection, "resolve_host", rebinding)
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.host, request.headers["host"], request.extensions.get("sni_hostname")))
+        return httpx.Response(200, content=b"leaf")
+
+    async def scenario():
+        pipeline = DetectionPipeline(StubModel(), settings=DetectionSettings())
+        pipeline._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            assert await pipeline.fetch("https://img.example.com/leaf.jpg") == b"leaf"
+            with pytest.raises(FetchRefused):
+                await pipeline.fetch("https://img.example.com/leaf.jpg")
+        finally:
+            await pipeline._http.aclose()
+
+    asyncio.run(scenario())
+    assert seen == [("93.184.216.34", "img.example.com", "img.example.com")]
+
+
+def test_detection_status_stream(authorized_client, monkeypatch):
+    monkeypatch.setattr(detection_pipeline, "fetch", fake_fetch)
+    job = submit(authorized_client, "https://img.example.com/rust.jpg")
+
+    with authorized_client.stream("GET", f"/api/v1/crop/disease-detect/{job['id']}/events") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            json.loads(line.removeprefix("data: "))
+            for line in response.iter_lines() if line.startswith("data: ")
+        ]
+
+    assert events[-1]["status"] == "completed"
+    assert events[-1]["id"] == job["id"]
+    # One event per status change
+    statuses = [e["status"] for e in events]
+    assert len(statuses) == len(set(statuses))
+
+
+def test_detection_jobs_are_private(authorized_client, db, monkeypatch):
+    monkeypatch.setattr(detection_pipeline, "fetch", fake_fetch)
+    job = submit(authorized_client, "https://img.example.com/leaf.jpg")
+
+    outsider = User(email="outsider@example.com", password_hash="x", accept_terms=True)
+    db.add(outsider)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(outsider.id)})}"}
+    assert authorized_client.get(f"/api/v1/crop/disease-detect/{job['id']}", headers=headers).status_code == 404
+    assert authorized_client.get(f"/api/v1/crop/disease-detect/{job['id']}/events", headers=headers).status_code == 404
+
+
+def test_pipeline_micro_batches_queued_jobs(authorized_client, db):
+    user = db.query(User).first()
+    db.add_all(DiseaseDetection(user_id=user.id, image_url=f"https://img.example.com/{n}.jpg") for n in range(5))
+    db.commit()
+
+    async def run():
+        engine = create_async_engine(to_async_url(db.get_bind().url.render_as_string(hide_password=False)))
+        try:
+            pipeline = DetectionPipeline(
+                model=StubModel(),
+                session_factory=async_sessionmaker(engine, expire_on_commit=False),
+                settings=DetectionSettings(DETECTION_MAX_BATCH=3),
+            )
+            pipeline.fetch = fake_fetch
+            return [await pipeline.run_once() for _ in range(3)], pipeline.stats()
+        finally:
+            await engine.dispose()
+
+    claimed, stats = asyncio.run(run())
+    # Two forward passes for five jobs, then nothing left to claim
+    assert claimed == [3, 2, 0]
+    assert stats["batches"] == 2
+    assert stats["completed"] == 5
+    db.expire_all()
+    assert {job.status for job in db.query(DiseaseDetection)} == {"completed"}
+
+
+class PoisonModel(StubModel):
+    """Rejects any batch containing an image whose URL mentions poison."""
+
+    def preprocess(self, data: bytes) -> np.ndarray:
+        tensor = super().preprocess(data)
+        tensor[0] = -1.0 if b"poison" in data else tensor[0]
+        return tensor
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        if (batch[:, 0] < 0).any():
+            raise RuntimeError("bad input")
+        return super().predict(batch)
+
+
+def test_poison_jobs_fail_instead_of_looping(authorized_client, db):
+    user = db.query(User).first()
+    urls = ["https://img.example.com/a.jpg", "https://img.example.com/poison.jpg", "https://img.example.com/b.jpg"]
+    db.add_all(DiseaseDetection(user_id=user.id, image_url=url) for url in urls)
+    # A job that already took down its worker three times
+    stuck = DiseaseDetection(
+        user_id=user.id, image_url="https://img.example.com/c.jpg", status="running", attempts=3,
+        started_at=datetime.now(timezone.utc) - timedelta(hours=1),
+    )
+    db.add(stuck)
+    db.commit()
+
+    async def run():
+        engine = create_async_engine(to_async_url(db.get_bind().url.render_as_string(hide_password=False)))
+        try:
+            pipeline = DetectionPipeline(
+                model=PoisonModel(),
+                session_factory=async_sessionmaker(engine, expire_on_commit=False),
+                settings=DetectionSettings(DETECTION_MAX_BATCH=10),
+            )
+            pipeline.fetch = fake_fetch
+            return [await pipeline.run_once() for _ in range(2)]
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(run()) == [4, 0]
+    db.expire_all()
+    jobs = {job.image_url: job for job in db.query(DiseaseDetection)}
+    assert jobs["https://img.example.com/a.jpg"].status == jobs["https://img.example.com/b.jpg"].status == "completed"
+    assert (jobs[urls[1]].status, jobs[urls[1]].error) == ("failed", "Could not analyze image")
+    assert (jobs[stuck.image_url].status, jobs[stuck.image_url].error) == ("failed", "Detection did not complete")
+
+
+async def chunked(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def test_multipart_file_is_parsed_incrementally():
+    photo = bytes(range(256)) * 40
+    body = (
+        b"--XyZ\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nnorth field\r\n"
+        b"--XyZ\r\nContent-Disposition: form-data; name=\"image\"; filename=\"leaf.jpg\"\r\n"
+        b"Content-Type: image/jpeg\r\n\r\n" + photo + b"\r\n--XyZ--\r\n"
+    )
+
+    async def collect(field: str):
+        return [chunk async for chunk in iter_multipart_file(chunked(body, 7), "multipart/form-data; boundary=XyZ", field)]
+
+    chunks = asyncio.run(collect("image"))
+    assert b"".join(chunks) == photo
+    assert len(chunks) > 1
+    try:
+        asyncio.run(collect("photo"))
+        assert False, "missing field accepted"
+    except ValueError:
+        pass
+
+
+def test_uploads_are_stored_once_by_content(authorized_client, monkeypatch):
+    photo = b"\xff\xd8 a photo of a maize leaf" * 1000
+    digest = hashlib.sha256(photo).hexdigest()
+    inferred = detection_pipeline.inferred
+
+    response = authorized_client.post("/api/v1/crop/disease-detect/upload", files={"image": ("leaf.jpg", photo, "image/jpeg")})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["image_url"] == f"store://{digest}"
+    with open(image_store.path(digest), "rb") as f:
+        assert f.read() == photo
+    # The tensor is ready before the job runs
+    assert os.path.exists(image_store.tensor_path(digest, detection_pipeline.model.version))
+
+    done = wait_for_job(authorized_client, job["id"])
+    assert done["status"] == "completed"
+    assert detection_pipeline.inferred == inferred + 1
+
+    again = authorized_client.post("/api/v1/crop/disease-detect/upload", files={"image": ("copy.jpg", photo, "image/jpeg")})
+    assert again.status_code == 200
+    assert again.json()["detected_disease"] == done["detected_disease"]
+    assert os.listdir(os.path.dirname(image_store.path(digest))) == [digest]
+    assert detection_pipeline.inferred == inferred + 1
+
+    monkeypatch.setattr(
+        detection_pipeline, "settings", detection_pipeline.settings.model_copy(update={"DETECTION_MAX_IMAGE_BYTES": 100})
+    )
+    too_big = authorized_client.post("/api/v1/crop/disease-detect/upload", files={"image": ("big.jpg", b"x" * 1000, "image/jpeg")})
+    assert too_big.status_code == 413
+    missing = authorized_client.post("/api/v1/crop/disease-detect/upload", files={"photo": ("leaf.jpg", b"x", "image/jpeg")})
+    assert missing.status_code == 400
+    assert os.listdir(os.path.join(image_store.directory, "tmp")) == []
+
+
+def add_samples(db, user, region, samples, start=None):
+    start = start or datetime.now(timezone.utc) - timedelta(days=len(samples) * 30)
+    for i, values in enumerate(samples):
+        db.add(SoilAnalysis(
+            user_id=user.id, location=region, region=region.lower(),
+            created_at=start + timedelta(days=i * 30), **values,
+        ))
+    db.commit()
+
+
+def test_soil_analytics_trends_and_recommendations(authorized_client, db):
+    user = db.query(User).filter_by(email="test@example.com").one()
+    add_samples(db, user, "Kano", [
+        {"ph_level": 5.0, "nitrogen": 50.0, "phosphorus": 30.0, "potassium": 200.0},
+        {"ph_level": 5.1, "nitrogen": 40.0, "phosphorus": 31.0, "moisture": 25.0},
+        {"ph_level": 5.2, "nitrogen": 30.0, "phosphorus": 32.0, "potassium": 210.0},
+    ])
+
+    response = authorized_client.get("/api/v1/crop/soil-analysis/analytics", params={"deltas": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["region"] == "kano"
+    assert body["samples"] == body["region_samples"] == 3
+    metrics = {m["metric"]: m for m in body["metrics"]}
+    assert metrics["ph_level"]["status"] == "low"
+    assert metrics["nitrogen"]["latest"] == 30.0
+    assert metrics["nitrogen"]["delta"] == -10.0
+    assert metrics["nitrogen"]["trend_per_30d"] == -10.0
+    # Deltas skip missing measurements; a metric measured once has no trend
+    assert metrics["potassium"]["delta"] == 10.0
+    assert metrics["moisture"]["trend_per_30d"] is None
+    assert body["deltas"] == [{
+        "created_at": body["deltas"][0]["created_at"],
+        "ph_level": 0.1, "nitrogen": -10.0, "phosphorus": 1.0, "potassium": None, "moisture": None,
+    }]
+    issues = {r["metric"]: r["issue"] for r in body["recommendations"]}
+    assert issues == {"ph_level": "deficient", "nitrogen": "declining"}
+
+
+def test_soil_region_percentiles_refresh_incrementally(authorized_client, db):
+    neighbour = User(email="neighbour@example.com", password_hash="x", accept_terms=True)
+    db.add(neighbour)
+    db.commit()
+    add_samples(db, neighbour, "kano", [{"nitrogen": float(n)} for n in range(10, 110, 10)])
+
+    before = soil_regions.stats()
+    created = authorized_client.post("/api/v1/crop/soil-analysis", json={"nitrogen": 45.0, "location": "  KANO "})
+    assert created.json()["region"] == "kano"
+    nitrogen = authorized_client.get("/api/v1/crop/soil-analysis/analytics").json()["metrics"][1]
+    assert nitrogen["region_percentile"] == round(5 / 11 * 100, 4)
+    assert nitrogen["region_p50"] == 50.0
+    assert soil_regions.stats()["reloads"] == before["reloads"] + 1
+
+    # Samples recorded here are folded in without a query
+    authorized_client.post("/api/v1/crop/soil-analysis", json={"nitrogen": 5.0, "location": "Kano"})
+    body = authorized_client.get("/api/v1/crop/soil-analysis/analytics").json()
+    assert body["region_samples"] == 12
+    assert soil_regions.stats()["hits"] == before["hits"] + 1
+
+    # Samples recorded elsewhere are picked up past the watermark
+    add_samples(db, neighbour, "kano", [{"nitrogen": 1.0}], start=datetime.now(timezone.utc))
+    body = authorized_client.get("/api/v1/crop/soil-analysis/analytics").json()
+    assert body["region_samples"] == 13
+    assert body["metrics"][1]["region_percentile"] == round(2 / 13 * 100, 4)
+    assert soil_regions.stats() == {
+        "regions": 1,
+        "hits": before["hits"] + 1,
+        "refreshes": before["refreshes"] + 1,
+        "reloads": before["reloads"] + 1,
+    }
+
+
+def test_schedules_are_expanded_into_due_tasks(authorized_client, db, assert_max_queries):
+    sowing = date(2026, 3, 2)
+    maize = authorized_client.post(
+        "/api/v1/crop/schedules", json={"crop_name": "Maize", "sowing_date": sowing.isoformat()}
+    ).json()
+    authorized_client.post("/api/v1/crop/schedules", json={"crop_name": "corn", "sowing_date": "2026-03-05"})
+
+    tasks = authorized_client.get(f"/api/v1/crop/schedules/{maize['id']}/tasks").json()
+    assert [t["title"] for t in tasks if t["kind"] == "fertilizing"] == [
+        "Apply basal NPK to Maize", "Apply urea top-dressing to Maize",
+    ]
+    assert tasks[0]["due_date"] == "2026-03-09"
+    # Default 110-day season, irrigation weekly until three weeks before harvest
+    assert tasks[-1] == {**tasks[-1], "kind": "harvest", "due_date": "2026-06-13", "end_date": "2026-07-04"}
+    assert max(t["due_date"] for t in tasks if t["kind"] == "irrigation") <= "2026-05-30"
+
+    with assert_max_queries(1):
+        week = authorized_client.get("/api/v1/crop/tasks", params={"start": "2026-03-16"}).json()
+    assert [(t["due_date"], t["title"]) for t in week] == [
+        ("2026-03-16", "Apply basal NPK to Maize"),
+        ("2026-03-16", "Irrigate Maize"),
+        ("2026-03-19", "Apply basal NPK to corn"),
+        ("2026-03-19", "Irrigate corn"),
+    ]
+    # Harvest windows stay due while open
+    late = authorized_client.get("/api/v1/crop/tasks", params={"start": "2026-07-01", "end": "2026-07-01"}).json()
+    assert [t["title"] for t in late] == ["Harvest Maize", "Harvest corn"]
+
+    assert authorized_client.get("/api/v1/crop/tasks", params={"start": "2026-03-16", "end": "2026-03-15"}).status_code == 400
+
+
+def test_schedule_edits_rematerialize_incrementally(authorized_client, db):
+    schedule = authorized_client.post(
+        "/api/v1/crop/schedules", json={"crop_name": "Tomato", "sowing_date": "2026-04-01"}
+    ).json()
+    before = {t["id"]: t for t in authorized_client.get(f"/api/v1/crop/schedules/{schedule['id']}/tasks").json()}
+
+    updated = authorized_client.put(f"/api/v1/crop/schedules/{schedule['id']}", json={"status": "Active"})
+    assert updated.json()["status"] == "Active"
+    unchanged = authorized_client.get(f"/api/v1/crop/schedules/{schedule['id']}/tasks").json()
+    assert {t["id"] for t in unchanged} == set(before)
+
+    # A later harvest keeps early irrigation rows and moves the harvest window
+    authorized_client.put(f"/api/v1/crop/schedules/{schedule['id']}", json={"harvest_date_est": "2026-07-10"})
+    after = {t["id"]: t for t in authorized_client.get(f"/api/v1/crop/schedules/{schedule['id']}/tasks").json()}
+    kept = set(before) & set(after)
+    assert kept and kept != set(before)
+    assert all(before[i] == after[i] for i in kept)
+    harvest = [t for t in after.values() if t["kind"] == "harvest"]
+    assert [(h["due_date"], h["end_date"]) for h in harvest] == [("2026-07-10", "2026-08-09")]
+
+    outsider = User(email="outsider@example.com", password_hash="x", accept_terms=True)
+    db.add(outsider)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(outsider.id)})}"}
+    assert authorized_client.put(
+        f"/api/v1/crop/schedules/{schedule['id']}", json={"status": "Cancelled"}, headers=headers
+    ).status_code == 404
+
+    authorized_client.put(f"/api/v1/crop/schedules/{schedule['id']}", json={"status": "Cancelled"})
+    assert db.query(ScheduleTask).count() == 0
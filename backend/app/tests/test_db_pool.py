@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+import uuid
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.api.v1.routers.internal import internal_settings
+from app.db.pool import PoolSettings, install_idle_pre_ping, pool_kwargs, pool_status
+from app.utils.jwt import create_access_token
+
+
+def make_engine(**overrides):
+    settings = PoolSettings(**{"POOL_SIZE": 1, "MAX_OVERFLOW": 1, "POOL_TIMEOUT": 0.1, **overrides})
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pool.db')}"
+    engine = create_engine(url, **pool_kwargs(url, settings=settings))
+    install_idle_pre_ping(engine, settings=settings)
+    return engine
+
+
+def test_pool_records_checkouts_and_overflow():
+    engine = make_engine()
+    first = engine.connect()
+    second = engine.connect()  # overflow connection
+
+    status = pool_status(engine)
+    assert status["pool"] == "InstrumentedQueuePool"
+    assert status["in_flight"] == 2
+    assert status["overflow"] == 1
+    assert status["peak_overflow"] == 1
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    first.close()
+    second.close()
+    status = pool_status(engine)
+    assert status["checkouts"] == 2
+    assert status["timeouts"] == 1
+    assert status["waits"] == 1
+    assert status["peak_in_flight"] == 2
+    assert status["checkout_latency"]["count"] == 2
+
+
+def test_idle_pre_ping_only_pings_idle_connections():
+    engine = make_engine(PRE_PING="idle", PRE_PING_IDLE_SECONDS=0.05)
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    assert pool_status(engine)["pings"] == 0
+
+    time.sleep(0.1)
+    with engine.connect():
+        pass
+    assert pool_status(engine)["pings"] == 1
+
+
+def test_metrics_survive_dispose():
+    engine = make_engine()
+    engine.connect().close()
+    engine.dispose()
+    engine.connect().close()
+    assert pool_status(engine)["checkouts"] == 2
+
+
+def test_internal_metrics_endpoint(client, monkeypatch):
+    assert client.get("/internal/metrics").status_code == 401
+    user_token = create_access_token({"sub": str(uuid.uuid4())})
+    forbidden = client.get("/internal/metrics", headers={"Authorization": f"Bearer {user_token}"})
+    assert forbidden.status_code == 403
+
+    monkeypatch.setattr(internal_settings, "INTERNAL_METRICS_TOKEN", "scraper-secret")
+    assert client.get("/internal/metrics", headers={"X-Internal-Token": "wrong"}).status_code == 401
+    admin_token = create_access_token({"sub": str(uuid.uuid4()), "role": "admin"})
+    assert client.get("/internal/metrics", headers={"Authorization": f"Bearer {admin_token}"}).status_code == 200
+
+    response = client.get("/internal/metrics", headers={"X-Internal-Token": "scraper-secret"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["pid"] == os.getpid()
+    assert {"async", "sync"} <= data["db"].keys()
@@ -1,5 +1,90 @@
 import pytest
+from uuid import UUID
+from app.models.users import User, UserRole
+from app.models.dealer import Dealer, DealerStats
+from app.models.product import Product
 
-def test_placeholder():
-    assert True
+def add_dealer(db, n: int) -> User:
+    user = User(
+        email=f"dealer{n}@example.com",
+        password_hash="x",
+        username=f"agro_dealer{n}",
+        role=UserRole.DEALER,
+        accept_terms=True,
+    )
+    db.add(user)
+    db.flush()
+    db.add(Dealer(user_id=user.id, business_name=f"Agro Supplies {n}", city="Ibadan", is_verified=True))
+    db.commit()
+    return user
 
+def test_list_dealers(client, db):
+    user = add_dealer(db, 1)
+
+    response = client.get("/api/v1/dealers/")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["items"][0]["business_name"] == "Agro Supplies 1"
+    assert data["items"][0]["is_verified"] is True
+
+    response = client.get(f"/api/v1/dealers/{user.id}")
+    assert response.status_code == 200
+    assert response.json()["city"] == "Ibadan"
+
+def test_listings_do_not_load_dealer_profiles_per_row(client, db, assert_max_queries):
+    for n in range(5):
+        dealer = add_dealer(db, n)
+        db.add_all(
+            Product(name=f"Item {n}-{i}", price=1, quantity=1, category="Seeds", dealer_id=dealer.id)
+            for i in range(2)
+        )
+    db.commit()
+
+    # COUNT + one page SELECT, regardless of page size
+    with assert_max_queries(2):
+        response = client.get("/api/v1/products/", params={"per_page": 10})
+    items = response.json()["items"]
+    assert len(items) == 10
+    assert all(item["dealer"]["business_name"].startswith("Agro Supplies") for item in items)
+
+    with assert_max_queries(2):
+        response = client.get("/api/v1/dealers/", params={"per_page": 5})
+    assert len(response.json()["items"]) == 5
+
+def test_dealer_stats_follow_product_writes(authorized_client, db):
+    # authorized_client's user is the dealer of every product it creates
+    payload = {"name": "Hoe", "price": 5, "quantity": 1, "category": "Tools"}
+    ids = [authorized_client.post("/api/v1/products/", json=payload).json()["id"] for _ in range(3)]
+    dealer_id = authorized_client.get(f"/api/v1/products/{ids[0]}").json()["dealer_id"]
+    user = db.get(User, UUID(dealer_id))
+    user.role = UserRole.DEALER
+    db.commit()
+
+    def count():
+        return authorized_client.get(f"/api/v1/dealers/{dealer_id}").json()["products_count"]
+
+    assert count() == 3
+    authorized_client.put(f"/api/v1/products/{ids[0]}", json={"is_active": False})
+    assert count() == 2
+    authorized_client.put(f"/api/v1/products/{ids[0]}", json={"is_active": True})
+    authorized_client.delete(f"/api/v1/products/{ids[1]}")
+    assert count() == 2
+
+def test_list_dealers_sorted_by_products_count(client, db):
+    dealers = [add_dealer(db, n) for n in range(3)]
+    for n, dealer in enumerate(dealers):
+        db.add_all(
+            Product(name=f"Item {i}", price=1, quantity=1, category="Seeds", dealer_id=dealer.id)
+            for i in range(n * 2)
+        )
+    db.commit()
+    DealerStats.rebuild(db)
+    db.commit()
+
+    response = client.get("/api/v1/dealers/", params={"sort": "products"})
+    assert response.status_code == 200
+    assert [d["products_count"] for d in response.json()["items"]] == [4, 2, 0]
+
+    response = client.get("/api/v1/dealers/", params={"sort": "products", "cursor": "abc"})
+    assert response.status_code == 400
@@ -0,0 +1,241 @@
+import asyncio
+import uuid
+from decimal import Decimal
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.db.session import to_async_url
+from app.utils.alerts import AlertIndex, alert_index, evaluate_report, notifications
+from app.utils.price_analytics import fit_trend, moving_average, price_models
+
+
+def create_product(client) -> str:
+    response = client.post(
+        "/api/v1/products/",
+        json={"name": "Maize", "price": 100, "quantity": 10, "category": "Grains"},
+    )
+    return response.json()["id"]
+
+
+def report(client, product_id, observations):
+    return client.post(f"/api/v1/prices/products/{product_id}/report", json={"observations": observations})
+
+
+def test_report_and_raw_history(authorized_client):
+    product_id = create_product(authorized_client)
+    response = report(authorized_client, product_id, [
+        {"price": 110, "observed_at": "2025-03-03T09:00:00Z"},
+        {"price": 105, "observed_at": "2025-03-03T10:30:00+01:00"},  # 09:30Z
+        {"price": 120, "observed_at": "2025-03-05T09:00:00Z"},
+    ])
+    assert response.status_code == 201
+    assert response.json()["ingested"] == 3
+
+    response = authorized_client.get(
+        f"/api/v1/prices/products/{product_id}/history",
+        params={"start": "2025-03-03T00:00:00Z", "end": "2025-03-05T00:00:00Z"},
+    )
+    assert response.status_code == 200
+    assert [float(p["price"]) for p in response.json()["points"]] == [110, 105]
+
+
+def test_history_downsamples_to_ohlc(authorized_client):
+    product_id = create_product(authorized_client)
+    report(authorized_client, product_id, [
+        # Monday and Wednesday of one week, then the next Monday
+        {"price": 10, "observed_at": "2025-03-03T08:00:00Z"},
+        {"price": 14, "observed_at": "2025-03-03T12:00:00Z"},
+        {"price": 9, "observed_at": "2025-03-03T16:00:00Z"},
+        {"price": 12, "observed_at": "2025-03-05T08:00:00Z"},
+        {"price": 20, "observed_at": "2025-03-10T08:00:00Z"},
+    ])
+
+    response = authorized_client.get(f"/api/v1/prices/products/{product_id}/history", params={"interval": "day"})
+    buckets = response.json()["buckets"]
+    assert [b["bucket"] for b in buckets] == ["2025-03-03", "2025-03-05", "2025-03-10"]
+    first = {k: float(v) for k, v in buckets[0].items() if k != "bucket"}
+    assert first == {"open": 10, "high": 14, "low": 9, "close": 9, "count": 3}
+
+    response = authorized_client.get(f"/api/v1/prices/products/{product_id}/history", params={"interval": "week"})
+    buckets = response.json()["buckets"]
+    assert [(b["bucket"], float(b["open"]), float(b["close"]), b["count"]) for b in buckets] == [
+        ("2025-03-03", 10, 12, 4),
+        ("2025-03-10", 20, 20, 1),
+    ]
+
+
+def test_report_validation(authorized_client):
+    product_id = create_product(authorized_client)
+    assert report(authorized_client, product_id, []).status_code == 422
+    assert report(authorized_client, product_id, [{"price": -1}]).status_code == 422
+    missing = "00000000-0000-0000-0000-000000000000"
+    assert report(authorized_client, missing, [{"price": 1}]).status_code == 404
+
+
+def test_latest_price_follows_ingest(authorized_client):
+    product_id = create_product(authorized_client)
+    other_id = create_product(authorized_client)
+    assert authorized_client.get(f"/api/v1/prices/products/{product_id}/latest").status_code == 404
+
+    report(authorized_client, product_id, [
+        {"price": 10, "observed_at": "2025-03-03T08:00:00Z"},
+        {"price": 12, "observed_at": "2025-03-04T08:00:00Z"},
+    ])
+    # A late backfill of older data does not replace the latest price
+    report(authorized_client, product_id, [{"price": 99, "observed_at": "2025-03-01T08:00:00Z"}])
+    report(authorized_client, other_id, [{"price": 7}])
+
+    response = authorized_client.get(f"/api/v1/prices/products/{product_id}/latest")
+    assert response.status_code == 200
+    assert float(response.json()["price"]) == 12
+
+    missing = "00000000-0000-0000-0000-000000000000"
+    response = authorized_client.post(
+        "/api/v1/prices/latest", json={"product_ids": [product_id, other_id, missing]}
+    )
+    assert response.status_code == 200
+    latest = {row["product_id"]: float(row["price"]) for row in response.json()}
+    assert latest == {product_id: 12, other_id: 7}
+
+
+def test_alert_index_matches_by_binary_search():
+    index = AlertIndex()
+    product = uuid.uuid4()
+    ids = {name: uuid.uuid4() for name in ("above_100", "above_150", "below_90", "below_50")}
+    index.add(ids["above_150"], product, "above", Decimal("150"))
+    index.add(ids["above_100"], product, "above", Decimal("100"))
+    index.add(ids["below_90"], product, "below", Decimal("90"))
+    index.add(ids["below_50"], product, "below", Decimal("50"))
+
+    assert index.match(product, Decimal("95"), Decimal("99.99")) == ([], [])
+    assert index.match(product, Decimal("100"), Decimal("100")) == ([ids["above_100"]], [])
+    assert index.match(product, Decimal("85"), Decimal("160")) == (
+        [ids["above_100"], ids["above_150"]], [ids["below_90"]]
+    )
+    index.remove(ids["above_100"])
+    assert index.match(product, Decimal("50"), Decimal("120")) == ([], [ids["below_50"], ids["below_90"]])
+    assert index.match(uuid.uuid4(), Decimal("1"), Decimal("1000")) == ([], [])
+
+
+def test_price_report_triggers_alerts_once(authorized_client):
+    product_id = create_product(authorized_client)
+    create = lambda threshold, direction: authorized_client.post(
+        "/api/v1/prices/alerts",
+        json={"product_id": product_id, "threshold": threshold, "direction": direction},
+    ).json()
+    above = create(120, "above")
+    below = create(80, "below")
+    deleted = create(110, "above")
+    assert authorized_client.delete(f"/api/v1/prices/alerts/{deleted['id']}").status_code == 200
+
+    response = report(authorized_client, product_id, [{"price": 100}, {"price": 125}])
+    assert response.json()["alerts_triggered"] == 1
+    queued = notifications.drain()
+    assert [(n["alert_id"], Decimal(n["price"])) for n in queued] == [(above["id"], 125)]
+
+    # Fired alerts are one-shot
+    assert report(authorized_client, product_id, [{"price": 130}, {"price": 75}]).json()["alerts_triggered"] == 1
+    assert [n["alert_id"] for n in notifications.drain()] == [below["id"]]
+
+    alerts = {a["id"]: a for a in authorized_client.get("/api/v1/prices/alerts").json()}
+    assert set(alerts) == {above["id"], below["id"]}
+    assert not alerts[above["id"]]["is_active"]
+    assert float(alerts[above["id"]]["triggered_price"]) == 125
+
+
+def test_alerts_created_elsewhere_are_loaded_from_the_database(authorized_client):
+    product_id = create_product(authorized_client)
+    authorized_client.post(
+        "/api/v1/prices/alerts", json={"product_id": product_id, "threshold": 5, "direction": "above"}
+    )
+    # Simulate a fresh worker whose index has never been loaded
+    alert_index.clear()
+    assert report(authorized_client, product_id, [{"price": 6}]).json()["alerts_triggered"] == 1
+
+
+def test_alerts_stay_indexed_when_the_report_rolls_back(authorized_client, db):
+    product_id = create_product(authorized_client)
+    authorized_client.post(
+        "/api/v1/prices/alerts", json={"product_id": product_id, "threshold": 5, "direction": "above"}
+    )
+
+    async def failed_report():
+        engine = create_async_engine(to_async_url(db.get_bind().url.render_as_string(hide_password=False)))
+        try:
+            async with async_sessionmaker(engine)() as session:
+                fired = await evaluate_report(session, uuid.UUID(product_id), [Decimal(6)])
+                await session.rollback()
+                return fired
+        finally:
+            await engine.dispose()
+
+    assert len(asyncio.run(failed_report())) == 1
+    assert len(alert_index) == 1 and not notifications.drain()
+    assert report(authorized_client, product_id, [{"price": 6}]).json()["alerts_triggered"] == 1
+    assert len(alert_index) == 0 and len(notifications.drain()) == 1
+
+
+def test_moving_average_and_trend_fit():
+    values = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    assert moving_average(values, 2).tolist() == [1.0, 1.5, 2.5, 3.5, 4.5]
+
+    days = np.arange(-9.0, 1.0)
+    slope, intercept = fit_trend(days, 100 + 2 * days, "linear", halflife=14)
+    assert slope == pytest.approx(2) and intercept == pytest.approx(100)
+
+    # A recent jump dominates the weighted fit but not the plain one
+    prices = np.where(days > -3, 150.0, 100.0)
+    assert fit_trend(days, prices, "ewm", halflife=1)[1] > fit_trend(days, prices, "linear", halflife=1)[1]
+
+
+def test_predict_compare_and_recommend(authorized_client):
+    product_id = create_product(authorized_client)
+    # Rising 1.00/day over 30 days
+    report(authorized_client, product_id, [
+        {"price": 100 + day, "observed_at": f"2025-04-{day + 1:02d}T12:00:00Z"} for day in range(30)
+    ])
+
+    response = authorized_client.post(
+        f"/api/v1/prices/ai/predict/{product_id}", params={"horizon_days": 10, "method": "linear"}
+    )
+    assert response.status_code == 200
+    prediction = response.json()
+    assert prediction["predicted_trend"] == "upward"
+    assert prediction["predicted_price"] == pytest.approx(139, abs=0.01)
+    assert prediction["points"] == 30
+
+    response = authorized_client.post("/api/v1/prices/ai/compare", json={"product_id": product_id, "price": 150})
+    assert response.json()["verdict"] == "above_market"
+    assert response.json()["percentile"] == 100
+    response = authorized_client.post("/api/v1/prices/ai/compare", json={"product_id": product_id, "price": 115})
+    assert response.json()["verdict"] == "competitive"
+
+    response = authorized_client.post("/api/v1/prices/ai/recommend", json={"product_id": product_id})
+    recommendation = response.json()
+    assert recommendation["recommended_price"] == recommendation["high"]
+
+    empty_id = create_product(authorized_client)
+    response = authorized_client.post(f"/api/v1/prices/ai/predict/{empty_id}")
+    assert response.status_code == 422
+
+    response = authorized_client.post(
+        "/api/v1/prices/ai/predict", json={"product_ids": [product_id, empty_id], "horizon_days": 1}
+    )
+    assert [p["product_id"] for p in response.json()] == [product_id]
+
+
+def test_price_models_are_refit_after_new_observations(authorized_client):
+    product_id = create_product(authorized_client)
+    report(authorized_client, product_id, [
+        {"price": 100, "observed_at": f"2025-04-{day:02d}T12:00:00Z"} for day in range(1, 11)
+    ])
+    predict_url = f"/api/v1/prices/ai/predict/{product_id}"
+    assert authorized_client.post(predict_url).json()["predicted_trend"] == "stable"
+    hits = price_models.stats()["hits"]
+    authorized_client.post(predict_url)
+    assert price_models.stats()["hits"] == hits + 1
+
+    report(authorized_client, product_id, [
+        {"price": 60, "observed_at": f"2025-04-{day:02d}T12:00:00Z"} for day in range(11, 16)
+    ])
+    assert authorized_client.post(predict_url).json()["predicted_trend"] == "downward"
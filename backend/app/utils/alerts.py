@@ -0,0 +1,242 @@
+"""Price alert evaluation.
+
+Active alerts live in an in-memory index: per product, the ABOVE and BELOW
+thresholds are kept as sorted integer-cent lists, so a report only needs two
+binary searches to find every alert it crosses, however many alerts exist.
+The database stays the source of truth: a match only fires if the alert is
+still active when it is marked triggered, so alerts deleted or fired by
+another worker never notify twice. Each worker loads the index lazily and
+re-syncs alerts created elsewhere every ``ALERT_SYNC_INTERVAL`` seconds.
+Fired alerts leave the index, and their notifications are queued, only once
+the report's transaction commits.
+"""
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.price import AlertDirection, PriceAlert
+
+
+class AlertSettings(BaseModel):
+    """Env-driven configuration for alert evaluation."""
+    ALERT_SYNC_INTERVAL: int = int(os.getenv("ALERT_SYNC_INTERVAL", 30))      # seconds
+    ALERT_QUEUE_MAX: int = int(os.getenv("ALERT_QUEUE_MAX", 10_000))          # pending notifications
+
+
+alert_settings = AlertSettings()
+
+# Alerts committed just before a sync may carry an older created_at
+_SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def to_cents(value) -> int:
+    return int((Decimal(str(value)) * 100).to_integral_value())
+
+
+class _ProductAlerts:
+    __slots__ = ("above", "above_ids", "below", "below_ids")
+
+    def __init__(self):
+        self.above: List[int] = []
+        self.above_ids: List[UUID] = []
+        self.below: List[int] = []
+        self.below_ids: List[UUID] = []
+
+    def side(self, direction: str) -> Tuple[List[int], List[UUID]]:
+        if direction == AlertDirection.ABOVE:
+            return self.above, self.above_ids
+        return self.below, self.below_ids
+
+    def __bool__(self) -> bool:
+        return bool(self.above or self.below)
+
+
+class AlertIndex:
+    """Active alerts keyed by product, ordered by threshold."""
+
+    def __init__(self):
+        self._products: Dict[UUID, _ProductAlerts] = {}
+        self._alerts: Dict[UUID, Tuple[UUID, str, int]] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self._synced_at = 0.0
+        self._watermark: Optional[datetime] = None
+
+    def add(self, alert_id: UUID, product_id: UUID, direction: str, threshold):
+        cents = to_cents(threshold)
+        with self._lock:
+            if alert_id in self._alerts:
+                return
+            entry = self._products.get(product_id)
+            if entry is None:
+                entry = self._products[product_id] = _ProductAlerts()
+            thresholds, ids = entry.side(direction)
+            i = bisect.bisect_right(thresholds, cents)
+            thresholds.insert(i, cents)
+            ids.insert(i, alert_id)
+            self._alerts[alert_id] = (product_id, direction, cents)
+
+    def remove(self, alert_id: UUID):
+        with self._lock:
+            found = self._alerts.pop(alert_id, None)
+            if found is None:
+                return
+            product_id, direction, cents = found
+            entry = self._products[product_id]
+            thresholds, ids = entry.side(direction)
+            i = bisect.bisect_left(thresholds, cents)
+            while ids[i] != alert_id:
+                i += 1
+            del thresholds[i]
+            del ids[i]
+            if not entry:
+                del self._products[product_id]
+
+    def match(self, product_id: UUID, low, high) -> Tuple[List[UUID], List[UUID]]:
+        """Alerts crossed by prices spanning ``[low, high]``: (above, below)."""
+        entry = self._products.get(product_id)
+        if entry is None:
+            return [], []
+        with self._lock:
+            above = entry.above_ids[:bisect.bisect_right(entry.above, to_cents(high))]
+            below = entry.below_ids[bisect.bisect_left(entry.below, to_cents(low)):]
+        return above, below
+
+    async def sync(self, db: AsyncSession, interval: float = alert_settings.ALERT_SYNC_INTERVAL):
+        """Load active alerts on first use, then pick up ones created by other workers."""
+        if self.loaded and time.monotonic() - self._synced_at < interval:
+            return
+        self._synced_at = time.monotonic()
+        query = select(
+            PriceAlert.id, PriceAlert.product_id, PriceAlert.direction,
+            PriceAlert.threshold, PriceAlert.created_at,
+        ).where(PriceAlert.is_active == True)
+        if self._watermark is not None:
+            query = query.where(PriceAlert.created_at >= self._watermark - _SYNC_OVERLAP)
+        watermark = self._watermark
+        for alert_id, product_id, direction, threshold, created_at in await db.execute(query):
+            self.add(alert_id, product_id, direction, threshold)
+            if watermark is None or created_at > watermark:
+                watermark = created_at
+        self._watermark = watermark
+        self.loaded = True
+
+    def clear(self):
+        with self._lock:
+            self._products.clear()
+            self._alerts.clear()
+            self.loaded = False
+            self._watermark = None
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def stats(self) -> dict:
+        return {"alerts": len(self), "products": len(self._products), "loaded": self.loaded}
+
+
+class NotificationQueue:
+    """Bounded FIFO of triggered-alert notifications awaiting delivery.
+
+    When full, the oldest notifications are dropped (and counted); the
+    triggered state is persisted on the alert either way.
+    """
+
+    def __init__(self, maxlen: int = alert_settings.ALERT_QUEUE_MAX):
+        self._items: deque = deque(maxlen=maxlen)
+        self.enqueued = 0
+        self.dropped = 0
+
+    def put(self, notification: dict):
+        if len(self._items) == self._items.maxlen:
+            self.dropped += 1
+        self._items.append(notification)
+        self.enqueued += 1
+
+    def drain(self, limit: Optional[int] = None) -> List[dict]:
+        """Pop up to ``limit`` notifications, oldest first."""
+        items = []
+        while self._items and (limit is None or len(items) < limit):
+            items.append(self._items.popleft())
+        return items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict:
+        return {"pending": len(self), "enqueued": self.enqueued, "dropped": self.dropped}
+
+
+alert_index = AlertIndex()
+notifications = NotificationQueue()
+
+
+class FiredAlerts:
+    """Alerts a report fired; ``publish()`` once the transaction has committed."""
+
+    def __init__(self):
+        self.matched: List[UUID] = []
+        self.notifications: List[dict] = []
+
+    def __len__(self) -> int:
+        return len(self.notifications)
+
+    def publish(self):
+        """Drop the matched alerts from the index and queue the notifications."""
+        for alert_id in self.matched:
+            alert_index.remove(alert_id)
+        for notification in self.notifications:
+            notifications.put(notification)
+
+
+async def evaluate_report(db: AsyncSession, product_id: UUID, prices: Iterable[Decimal]) -> FiredAlerts:
+    """Fire the alerts crossed by a price report.
+
+    Runs inside the caller's transaction; the caller commits and then calls
+    ``publish()`` on the result. If the transaction rolls back instead, the
+    alerts are still active and stay in the index.
+    """
+    fired = FiredAlerts()
+    prices = list(prices)
+    if not prices:
+        return fired
+    await alert_index.sync(db)
+    low, high = min(prices), max(prices)
+    above, below = alert_index.match(product_id, low, high)
+
+    now = datetime.now(timezone.utc)
+    for ids, price in ((above, high), (below, low)):
+        if not ids:
+            continue
+        # Only alerts still active in the database fire, exactly once
+        result = await db.execute(
+            update(PriceAlert)
+            .where(PriceAlert.id.in_(ids), PriceAlert.is_active == True)
+            .values(is_active=False, triggered_at=now, triggered_price=price)
+            .returning(PriceAlert.id, PriceAlert.user_id, PriceAlert.threshold, PriceAlert.direction)
+            .execution_options(synchronize_session=False)
+        )
+        for alert_id, user_id, threshold, direction in result:
+            fired.notifications.append({
+                "type": "price_alert",
+                "alert_id": str(alert_id),
+                "user_id": str(user_id),
+                "product_id": str(product_id),
+                "direction": direction,
+                "threshold": str(threshold),
+                "price": str(price),
+                "triggered_at": now.isoformat(),
+            })
+        # Ids that did not fire were deleted or fired elsewhere; they go too
+        fired.matched.extend(ids)
+    return fired
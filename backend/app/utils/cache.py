@@ -0,0 +1,189 @@
+"""Cache primitives: an in-process LRU with TTL and pluggable async backends."""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from pydantic import BaseModel
+
+
+class CacheSettings(BaseModel):
+    """Env-driven configuration for the shared response cache."""
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")   # memory | redis | none
+    CACHE_URL: Optional[str] = os.getenv("CACHE_URL")           # e.g. redis://localhost:6379/0
+    CACHE_TTL: int = int(os.getenv("CACHE_TTL", 30))             # seconds
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", 2048))
+    CACHE_CLIENT_MAX_AGE: int = int(os.getenv("CACHE_CLIENT_MAX_AGE", 0))
+
+
+cache_settings = CacheSettings()
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU mapping whose entries also expire after a TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+class CacheBackend:
+    """Interface for byte-valued caches shared by the HTTP layer."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        """Atomically bump a counter (used for namespace generations)."""
+        raise NotImplementedError
+
+    async def get_counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class NullCacheBackend(CacheBackend):
+    """Caching disabled: every lookup misses."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        pass
+
+    async def incr(self, key: str) -> int:
+        return 0
+
+    async def get_counter(self, key: str) -> int:
+        return 0
+
+    async def clear(self):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU; invalidations do not reach other uvicorn workers."""
+
+    def __init__(self, max_entries: int = 2048):
+        self._entries = LRUCache(max_entries=max_entries)
+        self._counters: dict = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._entries.set(key, value, ttl=ttl)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def clear(self):
+        self._entries.clear()
+        self._counters.clear()
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._entries.stats()}
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared cache for multiple workers; requires the optional ``redis`` package."""
+
+    def __init__(self, url: str, prefix: str = "crovio:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        self._client = redis.from_url(url)
+        self._prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self._client.get(self._prefix + key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        await self._client.set(self._prefix + key, value, ex=ttl)
+
+    async def incr(self, key: str) -> int:
+        return await self._client.incr(self._prefix + key)
+
+    async def get_counter(self, key: str) -> int:
+        return int(await self._client.get(self._prefix + key) or 0)
+
+    async def clear(self):
+        async for key in self._client.scan_iter(match=self._prefix + "*"):
+            await self._client.delete(key)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+def build_cache_backend(settings: CacheSettings = cache_settings) -> CacheBackend:
+    """Backend selected by CACHE_BACKEND."""
+    if settings.CACHE_BACKEND == "none":
+        return NullCacheBackend()
+    if settings.CACHE_BACKEND == "redis":
+        if not settings.CACHE_URL:
+            raise RuntimeError("CACHE_BACKEND=redis requires CACHE_URL")
+        return RedisCacheBackend(settings.CACHE_URL)
+    return MemoryCacheBackend(max_entries=settings.CACHE_MAX_ENTRIES)
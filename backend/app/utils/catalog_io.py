@@ -0,0 +1,192 @@
+"""Streaming CSV/NDJSON codecs for bulk product import and export.
+
+Uploads are parsed record by record straight off the request body, so an
+import never holds more than one batch of rows in memory whatever the file
+size. CSV needs a header row naming the ``ProductCreate`` fields; NDJSON
+takes one JSON object per line.
+"""
+import codecs
+import csv
+import io
+import json
+import os
+from collections import deque
+from datetime import datetime
+from decimal import Decimal
+from typing import AsyncIterator, Deque, Iterable, List, Literal, Optional, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel, ValidationError
+
+from app.schemas.product import ProductCreate
+
+CatalogFormat = Literal["csv", "ndjson"]
+
+EXPORT_COLUMNS = [
+    "id", "name", "description", "price", "quantity", "category", "image_url",
+    "is_active", "created_at", "updated_at",
+]
+
+
+class ImportSettings(BaseModel):
+    """Env-driven limits for bulk product imports."""
+    PRODUCT_IMPORT_BATCH_SIZE: int = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", 1000))
+    PRODUCT_IMPORT_MAX_ROWS: int = int(os.getenv("PRODUCT_IMPORT_MAX_ROWS", 100_000))
+
+
+import_settings = ImportSettings()
+
+
+def detect_format(content_type: Optional[str], requested: Optional[CatalogFormat]) -> Optional[CatalogFormat]:
+    if requested:
+        return requested
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a UTF-8 byte stream into lines (without line endings)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+class _Starved(Exception):
+    """The line feed ran dry before the end of input."""
+
+
+class _LineFeed:
+    """Synchronous line source for ``csv.reader``, filled from an async stream.
+
+    When it runs dry mid-stream it raises ``_Starved``; the lines handed out
+    since the last complete record are then put back, so the reader can
+    re-read an unfinished record once more lines arrive. ``csv.reader`` reads
+    no further than the record it returns, so nothing past it is lost.
+    """
+
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+        self.taken: List[str] = []
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.lines:
+            line = self.lines.popleft()
+            self.taken.append(line)
+            return line
+        if self.closed:
+            raise StopIteration
+        raise _Starved
+
+    def rewind(self):
+        self.lines.extendleft(reversed(self.taken))
+        self.taken.clear()
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[List[str]]:
+    """Parse CSV records with one ``csv.reader``, which tracks quoting across lines."""
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    async for line in lines:
+        feed.lines.append(line + "\n")
+        while True:
+            try:
+                record = next(reader)
+            except _Starved:
+                feed.rewind()
+                break
+            feed.taken.clear()
+            yield record
+    feed.closed = True
+    for record in reader:
+        yield record
+
+
+def _error_details(e: ValidationError) -> list:
+    return e.errors(include_url=False, include_context=False, include_input=False)
+
+
+async def iter_products(
+    chunks: AsyncIterator[bytes], fmt: CatalogFormat
+) -> AsyncIterator[Tuple[int, Optional[ProductCreate], Optional[list]]]:
+    """Yield ``(row number, product, errors)`` for each record of an upload.
+
+    Rows are numbered from 1 and exclude the CSV header; blank lines are
+    skipped. Exactly one of ``product`` and ``errors`` is set.
+    """
+    lines = iter_lines(chunks)
+    row = 0
+    if fmt == "ndjson":
+        async for line in lines:
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                yield row, ProductCreate.model_validate_json(line), None
+            except ValidationError as e:
+                yield row, None, _error_details(e)
+        return
+
+    header = None
+    async for record in iter_csv_records(lines):
+        if not any(field.strip() for field in record):
+            continue
+        if header is None:
+            header = [field.strip() for field in record]
+            continue
+        row += 1
+        if len(record) != len(header):
+            yield row, None, [{"type": "csv", "msg": f"Expected {len(header)} fields, got {len(record)}"}]
+            continue
+        # Empty cells are missing values, so optional fields fall back to defaults
+        data = {key: value for key, value in zip(header, record) if value != ""}
+        try:
+            yield row, ProductCreate.model_validate(data), None
+        except ValidationError as e:
+            yield row, None, _error_details(e)
+
+
+def export_header(fmt: CatalogFormat) -> str:
+    if fmt == "csv":
+        return _csv_line(EXPORT_COLUMNS)
+    return ""
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+def export_rows(products: Iterable, fmt: CatalogFormat) -> str:
+    """Serialize a batch of products as CSV rows or NDJSON lines."""
+    if fmt == "csv":
+        return "".join(
+            _csv_line(["" if v is None else _plain(v) for v in (getattr(p, c) for c in EXPORT_COLUMNS)])
+            for p in products
+        )
+    return "".join(
+        json.dumps({c: _plain(getattr(p, c)) for c in EXPORT_COLUMNS}) + "\n" for p in products
+    )
+
+
+def _csv_line(values) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue()
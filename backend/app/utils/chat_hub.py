@@ -0,0 +1,208 @@
+"""Real-time fan-out of chat messages to WebSocket connections.
+
+Each worker runs one ``ChatHub``. Every connection gets a bounded send queue
+drained by its own task, so one slow client never blocks delivery to the
+others: when its queue is full it is either disconnected or has messages
+dropped, per ``CHAT_SLOW_CONSUMER``. Hubs publish through a ``Broker``;
+the in-process broker delivers straight back to the local hub, and a
+networked broker (e.g. Redis pub/sub) can replace it to fan out across
+uvicorn workers without touching the hub.
+"""
+import asyncio
+import json
+import os
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import WebSocket
+from pydantic import BaseModel
+from starlette.websockets import WebSocketDisconnect, WebSocketState
+
+
+class ChatSettings(BaseModel):
+    """Env-driven configuration for real-time chat."""
+    CHAT_SEND_QUEUE_SIZE: int = int(os.getenv("CHAT_SEND_QUEUE_SIZE", 256))       # messages per connection
+    CHAT_SLOW_CONSUMER: str = os.getenv("CHAT_SLOW_CONSUMER", "disconnect")       # disconnect | drop
+    # Write-behind persistence (app.utils.message_writer)
+    CHAT_FLUSH_MAX_BATCH: int = int(os.getenv("CHAT_FLUSH_MAX_BATCH", 500))        # rows per INSERT; also flushes early
+    CHAT_FLUSH_INTERVAL: float = float(os.getenv("CHAT_FLUSH_INTERVAL", 0.05))     # seconds
+    CHAT_FLUSH_MAX_PENDING: int = int(os.getenv("CHAT_FLUSH_MAX_PENDING", 10_000)) # senders wait beyond this
+    CHAT_JOURNAL_DIR: str = os.getenv("CHAT_JOURNAL_DIR", "")                      # empty disables the journal
+    CHAT_JOURNAL_FSYNC: bool = os.getenv("CHAT_JOURNAL_FSYNC", "false").lower() == "true"
+
+
+chat_settings = ChatSettings()
+
+# Policy violation (1008) is reused for clients too slow to keep up
+SLOW_CONSUMER_CLOSE_CODE = 1008
+
+Handler = Callable[[str, str], None]
+
+
+class Broker:
+    """Pub/sub transport between hubs; payloads are pre-serialized JSON."""
+
+    async def publish(self, channel: str, payload: str):
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str, handler: Handler):
+        raise NotImplementedError
+
+    async def unsubscribe(self, channel: str, handler: Handler):
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """Delivers to hubs in this process only; single-worker deployments."""
+
+    def __init__(self):
+        self._handlers: Dict[str, Set[Handler]] = {}
+
+    async def publish(self, channel: str, payload: str):
+        for handler in list(self._handlers.get(channel, ())):
+            handler(channel, payload)
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self._handlers.setdefault(channel, set()).add(handler)
+
+    async def unsubscribe(self, channel: str, handler: Handler):
+        handlers = self._handlers.get(channel)
+        if handlers is not None:
+            handlers.discard(handler)
+            if not handlers:
+                del self._handlers[channel]
+
+
+class Connection:
+    """One WebSocket plus its bounded outbox.
+
+    Only the sender task writes to the socket; ``close()`` stops it before
+    sending the close frame, so writes never interleave.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=queue_size)
+        self.closing = False
+        self.dropped = 0
+        self.sender: Optional[asyncio.Task] = None
+        self.closer: Optional[asyncio.Task] = None
+
+    async def pump(self):
+        """Send queued payloads until the socket closes."""
+        try:
+            while True:
+                payload = await self.queue.get()
+                await self.websocket.send_text(payload)
+        except (RuntimeError, OSError, WebSocketDisconnect):
+            # The receive loop sees the disconnect and leaves the hub
+            self.closing = True
+
+    def start(self):
+        self.sender = asyncio.create_task(self.pump())
+
+    async def stop(self):
+        if self.sender is not None:
+            self.sender.cancel()
+            await asyncio.gather(self.sender, return_exceptions=True)
+
+    async def close(self, code: int, reason: str):
+        """Stop the sender, even mid-send to a stalled client, then close the socket."""
+        await self.stop()
+        if self.websocket.application_state == WebSocketState.CONNECTED:
+            try:
+                await self.websocket.close(code=code, reason=reason)
+            except RuntimeError:
+                pass
+
+
+class ChatHub:
+    """Tracks this worker's connections per channel and fans messages out."""
+
+    def __init__(self, broker: Broker, settings: ChatSettings = chat_settings):
+        self.broker = broker
+        self.settings = settings
+        self._channels: Dict[str, Set[Connection]] = {}
+        self.delivered = 0
+        self.dropped = 0
+        self.disconnected = 0
+
+    async def join(self, channel: str, websocket: WebSocket) -> Connection:
+        connection = Connection(websocket, self.settings.CHAT_SEND_QUEUE_SIZE)
+        members = self._channels.get(channel)
+        if members is None:
+            members = self._channels[channel] = set()
+            await self.broker.subscribe(channel, self.deliver)
+        members.add(connection)
+        return connection
+
+    async def leave(self, channel: str, connection: Connection):
+        members = self._channels.get(channel)
+        if members is None:
+            return
+        members.discard(connection)
+        if not members:
+            del self._channels[channel]
+            await self.broker.unsubscribe(channel, self.deliver)
+
+    async def publish(self, channel: str, message: dict):
+        """Send ``message`` to every subscriber of ``channel`` on every worker."""
+        await self.broker.publish(channel, json.dumps(message, default=str))
+
+    def deliver(self, channel: str, payload: str):
+        """Broker callback: enqueue for local connections without awaiting any."""
+        for connection in list(self._channels.get(channel, ())):
+            if connection.closing:
+                continue
+            try:
+                connection.queue.put_nowait(payload)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self._slow_consumer(connection)
+
+    def _slow_consumer(self, connection: Connection):
+        if self.settings.CHAT_SLOW_CONSUMER == "drop":
+            connection.dropped += 1
+            self.dropped += 1
+            return
+        connection.closing = True
+        self.disconnected += 1
+        # Held on the connection so the task is not garbage-collected; serve() awaits it
+        connection.closer = asyncio.create_task(connection.close(SLOW_CONSUMER_CLOSE_CODE, "Too slow"))
+
+    async def serve(
+        self, channel: str, websocket: WebSocket, on_receive: Callable[[str], Awaitable[Optional[dict]]]
+    ):
+        """Run an accepted socket until it disconnects.
+
+        Inbound frames go to ``on_receive``; a dict it returns is queued as a
+        reply to this connection only. All sends go through the outbox so the
+        socket is never written from two tasks at once.
+        """
+        connection = await self.join(channel, websocket)
+        connection.start()
+        try:
+            while not connection.closing:
+                reply = await on_receive(await websocket.receive_text())
+                if reply is not None:
+                    try:
+                        connection.queue.put_nowait(json.dumps(reply, default=str))
+                    except asyncio.QueueFull:
+                        self._slow_consumer(connection)
+        finally:
+            await self.leave(channel, connection)
+            if connection.closer is not None:
+                await asyncio.shield(connection.closer)
+            else:
+                await connection.stop()
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "connections": sum(len(members) for members in self._channels.values()),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+        }
+
+
+chat_hub = ChatHub(InProcessBroker())
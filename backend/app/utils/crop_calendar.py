@@ -0,0 +1,167 @@
+"""Planting calendar: schedules expanded into dated tasks.
+
+Each crop has a template of irrigation, fertilizing and harvest timings
+relative to the sowing date. A schedule is expanded against its crop's
+template into ``crop_schedule_tasks`` rows when it is created, so "what is
+due between two dates across all my fields" is a single scan of the
+``(user_id, due_date)`` index rather than an expansion of every schedule on
+every read.
+
+When a schedule is edited its tasks are re-expanded and diffed against the
+stored rows: only tasks that no longer apply are deleted and only new ones
+inserted, so e.g. moving the harvest estimate rewrites the tail of the
+season and leaves the rest alone. Completed and cancelled schedules have no
+tasks.
+
+A schedule with a harvest estimate stretches or squeezes its template to
+fit: fertilizing offsets scale with the season length, irrigation runs up to
+the template's cut-off before harvest.
+"""
+import os
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.crop import PlantingSchedule, ScheduleTask
+
+
+class CalendarSettings(BaseModel):
+    """Env-driven configuration for the planting calendar."""
+    CALENDAR_MAX_RANGE_DAYS: int = int(os.getenv("CALENDAR_MAX_RANGE_DAYS", 366))   # widest due-tasks query
+
+
+calendar_settings = CalendarSettings()
+
+
+class CropTemplate(NamedTuple):
+    season_days: int                            # sowing to harvest when no estimate is given
+    irrigation_every: int                       # days between irrigations, from sowing
+    irrigation_stop: int                        # no irrigation in the last n days before harvest
+    fertilizing: Tuple[Tuple[int, str], ...]    # (days after sowing, what to apply)
+    harvest_before: int                         # harvest window opens n days before the harvest date
+    harvest_after: int                          # and closes n days after it
+
+
+TEMPLATES: Dict[str, CropTemplate] = {
+    "maize": CropTemplate(110, 7, 21, ((14, "basal NPK"), (42, "urea top-dressing")), 7, 14),
+    "rice": CropTemplate(
+        120, 5, 14, ((21, "basal NPK"), (45, "urea top-dressing"), (65, "urea at panicle initiation")), 7, 10
+    ),
+    "sorghum": CropTemplate(115, 10, 21, ((21, "basal NPK"), (42, "urea top-dressing")), 7, 14),
+    "cowpea": CropTemplate(75, 7, 14, ((14, "single superphosphate"),), 5, 10),
+    "tomato": CropTemplate(90, 3, 7, ((14, "NPK"), (35, "calcium nitrate"), (55, "potash")), 0, 30),
+    "cassava": CropTemplate(300, 14, 120, ((30, "NPK"), (90, "potash")), 0, 60),
+    "yam": CropTemplate(240, 14, 60, ((60, "NPK"), (120, "potash")), 0, 45),
+}
+
+DEFAULT_TEMPLATE = CropTemplate(100, 7, 14, ((21, "NPK"),), 7, 14)
+
+ALIASES = {
+    "corn": "maize",
+    "paddy": "rice",
+    "beans": "cowpea",
+    "cowpeas": "cowpea",
+    "tomatoes": "tomato",
+    "guinea corn": "sorghum",
+}
+
+# Widest harvest window: due-task queries look back this far for windows still open
+MAX_WINDOW_DAYS = max(t.harvest_before + t.harvest_after for t in [*TEMPLATES.values(), DEFAULT_TEMPLATE])
+
+INACTIVE_STATUSES = {"completed", "cancelled"}
+
+
+class TaskSpec(NamedTuple):
+    kind: str
+    title: str
+    due_date: date
+    end_date: Optional[date]
+
+
+def template_for(crop_name: str) -> CropTemplate:
+    name = " ".join(crop_name.split()).lower()
+    return TEMPLATES.get(ALIASES.get(name, name), DEFAULT_TEMPLATE)
+
+
+def expand(crop_name: str, sowing_date: date, harvest_date_est: Optional[date], status: Optional[str]) -> List[TaskSpec]:
+    """The schedule's tasks in due order."""
+    if (status or "").lower() in INACTIVE_STATUSES:
+        return []
+    template = template_for(crop_name)
+    crop = crop_name.strip()
+    harvest = harvest_date_est or sowing_date + timedelta(days=template.season_days)
+    season = max((harvest - sowing_date).days, 1)
+    stretch = season / template.season_days
+
+    tasks = [
+        TaskSpec("fertilizing", f"Apply {what} to {crop}", sowing_date + timedelta(days=round(day * stretch)), None)
+        for day, what in template.fertilizing
+    ]
+    last_irrigation = season - template.irrigation_stop
+    tasks.extend(
+        TaskSpec("irrigation", f"Irrigate {crop}", sowing_date + timedelta(days=day), None)
+        for day in range(template.irrigation_every, last_irrigation + 1, template.irrigation_every)
+    )
+    tasks.append(TaskSpec(
+        "harvest",
+        f"Harvest {crop}",
+        harvest - timedelta(days=template.harvest_before),
+        harvest + timedelta(days=template.harvest_after),
+    ))
+    tasks.sort(key=lambda task: task.due_date)
+    return tasks
+
+
+def expand_schedule(schedule: PlantingSchedule) -> List[TaskSpec]:
+    return expand(schedule.crop_name, schedule.sowing_date, schedule.harvest_date_est, schedule.status)
+
+
+def task_rows(schedule_id: UUID, user_id: UUID, specs: Iterable[TaskSpec]) -> List[dict]:
+    return [{"schedule_id": schedule_id, "user_id": user_id, **spec._asdict()} for spec in specs]
+
+
+async def materialize(db: AsyncSession, schedules: Sequence[PlantingSchedule]):
+    """Insert tasks for newly created (flushed) schedules; caller commits."""
+    rows = [row for s in schedules for row in task_rows(s.id, s.user_id, expand_schedule(s))]
+    if rows:
+        await db.execute(insert(ScheduleTask), rows)
+
+
+async def rematerialize(db: AsyncSession, schedule: PlantingSchedule) -> Tuple[int, int]:
+    """Bring an edited schedule's tasks up to date; returns (inserted, deleted). Caller commits."""
+    stored = (await db.execute(
+        select(ScheduleTask.id, ScheduleTask.kind, ScheduleTask.title, ScheduleTask.due_date, ScheduleTask.end_date)
+        .where(ScheduleTask.schedule_id == schedule.id)
+    )).all()
+    wanted = expand_schedule(schedule)
+    keep = set(wanted)
+    kept, stale = set(), []
+    for task_id, *fields in stored:
+        spec = TaskSpec(*fields)
+        if spec in keep and spec not in kept:
+            kept.add(spec)
+        else:
+            stale.append(task_id)
+    missing = [spec for spec in wanted if spec not in kept]
+    if stale:
+        await db.execute(delete(ScheduleTask).where(ScheduleTask.id.in_(stale)))
+    if missing:
+        await db.execute(insert(ScheduleTask), task_rows(schedule.id, schedule.user_id, missing))
+    return len(missing), len(stale)
+
+
+async def due_tasks(db: AsyncSession, user_id: UUID, start: date, end: date) -> Sequence[ScheduleTask]:
+    """Tasks due from ``start`` through ``end``, plus harvest windows still open on ``start``."""
+    return (await db.scalars(
+        select(ScheduleTask)
+        .where(
+            ScheduleTask.user_id == user_id,
+            ScheduleTask.due_date.between(start - timedelta(days=MAX_WINDOW_DAYS), end),
+            or_(ScheduleTask.due_date >= start, ScheduleTask.end_date >= start),
+        )
+        .order_by(ScheduleTask.due_date, ScheduleTask.title, ScheduleTask.id)
+    )).all()
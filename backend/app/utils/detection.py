@@ -0,0 +1,500 @@
+"""Job pipeline for crop disease detection.
+
+``POST /crop/disease-detect`` only inserts a ``queued`` row and wakes the
+pipeline; clients poll the job or stream its status. ``DETECTION_WORKERS``
+background tasks per process each claim up to ``DETECTION_MAX_BATCH`` of the
+oldest queued jobs in one ``UPDATE ... RETURNING`` (with ``SKIP LOCKED`` on
+PostgreSQL, so several processes can share the queue), fetch their images
+concurrently, run the model once for the whole batch on a thread pool and
+write every result back in one executemany UPDATE.
+
+After a wake-up a worker waits ``DETECTION_BATCH_WAIT`` seconds so that
+jobs arriving together share a forward pass. Workers also poll every
+``DETECTION_POLL_INTERVAL`` seconds to pick up jobs queued by other
+processes; jobs left ``running`` by a crashed process for longer than
+``DETECTION_JOB_TIMEOUT`` are claimed again, up to ``DETECTION_MAX_ATTEMPTS``
+claims in all, after which they fail.
+
+A batch the model rejects is retried image by image so that only the image
+responsible fails; if a batch fails in any other way its jobs are marked
+failed rather than left running.
+
+Images whose digest already has a result (see ``detection_cache``) skip
+the model; each job row records the digest of the image it was answered for.
+Uploaded images (``store://`` URLs, see ``image_store``) are not fetched:
+their digest is in the URL and their tensor is mapped from disk.
+
+Image URLs come from users, so fetching them must not reach the internal
+network: every hop, redirects included, must be http(s) on a host that
+resolves only to public addresses (and, with ``DETECTION_FETCH_HOSTS`` set,
+is one of those hosts or their subdomains). Requests connect to the
+address that was checked, never to a second lookup of the host. Fetch
+failures are logged and the job only records a generic error.
+"""
+import asyncio
+import hashlib
+import ipaddress
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+from uuid import UUID
+
+import httpx
+import numpy as np
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import and_, bindparam, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.pool import Timings
+from app.db.session import AsyncSessionLocal
+from app.models.crop import DiseaseDetection
+from app.utils.detection_cache import CachedResult, DetectionResultCache, detection_cache
+from app.utils.image_store import ImageStore, image_store
+from app.utils.inference import RECOMMENDATIONS, DiseaseModel, build_model
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class DetectionSettings(BaseModel):
+    """Env-driven configuration for the detection job pipeline."""
+    DETECTION_WORKERS: int = int(os.getenv("DETECTION_WORKERS", 2))               # concurrent batches per process
+    DETECTION_MAX_BATCH: int = int(os.getenv("DETECTION_MAX_BATCH", 16))
+    DETECTION_BATCH_WAIT: float = float(os.getenv("DETECTION_BATCH_WAIT", 0.02))  # seconds to let a batch fill
+    DETECTION_POLL_INTERVAL: float = float(os.getenv("DETECTION_POLL_INTERVAL", 5.0))
+    DETECTION_JOB_TIMEOUT: float = float(os.getenv("DETECTION_JOB_TIMEOUT", 300))  # running longer => reclaimed
+    DETECTION_MAX_ATTEMPTS: int = int(os.getenv("DETECTION_MAX_ATTEMPTS", 3))      # claims before a job fails
+    DETECTION_MAX_QUEUED: int = int(os.getenv("DETECTION_MAX_QUEUED", 10_000))     # 0 disables load shedding
+    DETECTION_FETCH_TIMEOUT: float = float(os.getenv("DETECTION_FETCH_TIMEOUT", 10))
+    DETECTION_FETCH_HOSTS: str = os.getenv("DETECTION_FETCH_HOSTS", "")             # comma-separated; empty allows any public host
+    DETECTION_FETCH_REDIRECTS: int = int(os.getenv("DETECTION_FETCH_REDIRECTS", 3))
+    DETECTION_MAX_IMAGE_BYTES: int = int(os.getenv("DETECTION_MAX_IMAGE_BYTES", 10 * 1024 * 1024))
+    DETECTION_STREAM_TIMEOUT: float = float(os.getenv("DETECTION_STREAM_TIMEOUT", 60))  # per status stream
+
+
+detection_settings = DetectionSettings()
+
+
+class FetchRefused(ValueError):
+    pass
+
+
+async def resolve_host(host: str, port: int) -> List[str]:
+    """Every address ``host`` resolves to."""
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port)
+    return [sockaddr[0].split("%")[0] for *_, sockaddr in infos]
+
+
+async def check_fetch_url(url: str, allowed_hosts: str = "") -> str:
+    """The address to connect to for ``url``.
+
+    Raises ``FetchRefused`` unless ``url`` is http(s) on a public (and allowed)
+    host. Callers must connect to the returned address rather than resolving
+    the host again, which a DNS-rebinding host could answer differently.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        raise FetchRefused("Unsupported image URL")
+    allowed = [h.strip().lower() for h in allowed_hosts.split(",") if h.strip()]
+    if allowed and not any(host == h or host.endswith("." + h) for h in allowed):
+        raise FetchRefused(f"Host {host} is not allowed")
+    try:
+        addresses = await resolve_host(host, parts.port or 0)
+    except OSError:
+        raise FetchRefused(f"Could not resolve {host}")
+    if not addresses:
+        raise FetchRefused(f"Could not resolve {host}")
+    for address in addresses:
+        if not ipaddress.ip_address(address).is_global:
+            raise FetchRefused(f"Host {host} resolves to non-public address {address}")
+    return addresses[0]
+
+
+def pinned_request(client: httpx.AsyncClient, url: str, address: str) -> httpx.Request:
+    """A GET for ``url`` sent to ``address``, keeping its Host header and TLS server name.
+
+    Pooled connections are keyed by the address too, so a kept-alive
+    connection is only reused for an address that was checked.
+    """
+    target = httpx.URL(url)
+    extensions = {"sni_hostname": target.host} if target.scheme == "https" else {}
+    return client.build_request(
+        "GET",
+        target.copy_with(host=address),
+        headers={"Host": target.netloc.decode("ascii")},
+        extensions=extensions,
+    )
+
+
+async def claim_jobs(db: AsyncSession, limit: int, stale_before: datetime) -> List[Tuple[UUID, str, datetime, int]]:
+    """Mark up to ``limit`` of the oldest claimable jobs running; caller commits."""
+    jobs = DiseaseDetection.__table__
+    candidates = (
+        select(jobs.c.id)
+        .where(or_(
+            jobs.c.status == "queued",
+            and_(jobs.c.status == "running", jobs.c.started_at < stale_before),
+        ))
+        .order_by(jobs.c.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(jobs)
+        .where(jobs.c.id.in_(candidates.scalar_subquery()))
+        .values(status="running", started_at=datetime.now(timezone.utc), attempts=jobs.c.attempts + 1)
+        .returning(jobs.c.id, jobs.c.image_url, jobs.c.created_at, jobs.c.attempts)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def write_results(db: AsyncSession, results: List[dict]):
+    """Store finished jobs; caller commits."""
+    jobs = DiseaseDetection.__table__
+    await db.execute(
+        update(jobs)
+        .where(jobs.c.id == bindparam("job_id"))
+        .values(
+            status=bindparam("new_status"),
+            image_digest=bindparam("digest"),
+            detected_disease=bindparam("disease"),
+            confidence_score=bindparam("confidence"),
+            recommendation=bindparam("advice"),
+            error=bindparam("reason"),
+            completed_at=bindparam("finished_at"),
+        ),
+        results,
+    )
+
+
+class DetectionPipeline:
+    """Claims queued detection jobs and runs them through the model in batches."""
+
+    def __init__(
+        self,
+        model: Optional[DiseaseModel] = None,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        settings: DetectionSettings = detection_settings,
+        cache: DetectionResultCache = detection_cache,
+        store: ImageStore = image_store,
+    ):
+        self.model = model
+        self.cache = cache
+        self.store = store
+        self.session_factory = session_factory
+        self.settings = settings
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._waiters: Dict[UUID, Set[asyncio.Event]] = {}
+        self.inference_latency = Timings()
+        self.job_latency = Timings()
+        self.batches = 0
+        self.inferred = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def admit(self, db: AsyncSession):
+        """Shed load with a 503 once too many jobs are waiting."""
+        limit = self.settings.DETECTION_MAX_QUEUED
+        if not limit:
+            return
+        queued = await db.scalar(
+            select(func.count()).select_from(DiseaseDetection).where(DiseaseDetection.status == "queued")
+        )
+        if queued >= limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Disease detection is busy, please retry shortly.",
+                headers={"Retry-After": "5"},
+            )
+
+    def wake(self):
+        """Tell the workers new jobs were queued."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def wait(self, job_id: UUID, timeout: float):
+        """Return when this process next updates the job, or after ``timeout``."""
+        event = asyncio.Event()
+        self._waiters.setdefault(job_id, set()).add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters = self._waiters.get(job_id)
+            if waiters is not None:
+                waiters.discard(event)
+                if not waiters:
+                    del self._waiters[job_id]
+
+    def _notify(self, job_ids):
+        for job_id in job_ids:
+            for event in self._waiters.pop(job_id, ()):
+                event.set()
+
+    async def fetch(self, url: str) -> bytes:
+        """Download an image, refusing anything over DETECTION_MAX_IMAGE_BYTES.
+
+        Redirects are followed by hand so that every hop is checked, and each
+        request is sent to the address that passed the check.
+        """
+        if self._http is None:
+            # No proxies from the environment: requests must go to the checked address
+            self._http = httpx.AsyncClient(
+                timeout=self.settings.DETECTION_FETCH_TIMEOUT, follow_redirects=False, trust_env=False
+            )
+        for _ in range(self.settings.DETECTION_FETCH_REDIRECTS + 1):
+            address = await check_fetch_url(url, self.settings.DETECTION_FETCH_HOSTS)
+            response = await self._http.send(pinned_request(self._http, url, address), stream=True)
+            try:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers["location"])
+                    continue
+                response.raise_for_status()
+                data = bytearray()
+                async for chunk in response.aiter_bytes():
+                    data += chunk
+                    if len(data) > self.settings.DETECTION_MAX_IMAGE_BYTES:
+                        raise ValueError("Image is too large")
+                return bytes(data)
+            finally:
+                await response.aclose()
+        raise FetchRefused("Too many redirects")
+
+    async def _load(self, url: str) -> Tuple[str, Optional[bytes]]:
+        """``(digest, bytes)`` for a job's image; uploaded images are left on disk."""
+        digest = self.store.digest_of(url)
+        if digest is None:
+            data = await self.fetch(url)
+            return hashlib.sha256(data).hexdigest(), data
+        if not self.store.exists(digest):
+            raise FileNotFoundError("Uploaded image is missing")
+        return digest, None
+
+    def _infer(self, images: List[Tuple[str, Optional[bytes]]]) -> List[Tuple[Optional[int], float, Optional[str]]]:
+        """(label index, confidence, error) per image; runs on the thread pool."""
+        outcomes: List[Tuple[Optional[int], float, Optional[str]]] = [(None, 0.0, None)] * len(images)
+        tensors, positions = [], []
+        for i, (digest, data) in enumerate(images):
+            try:
+                tensors.append(self.model.preprocess(data) if data is not None else self.store.tensor(digest, self.model))
+                positions.append(i)
+            except Exception:
+                logger.info("Could not read image %s", digest, exc_info=True)
+                outcomes[i] = (None, 0.0, "Could not read image")
+        if not tensors:
+            return outcomes
+        try:
+            groups = [(positions, self._predict(np.stack(tensors)))]
+        except Exception:
+            logger.warning("Inference failed for a batch of %d; retrying images one by one", len(tensors), exc_info=True)
+            groups = []
+            for i, tensor in zip(positions, tensors):
+                try:
+                    groups.append(([i], self._predict(tensor[None])))
+                except Exception:
+                    logger.warning("Inference failed for image %s", images[i][0], exc_info=True)
+                    outcomes[i] = (None, 0.0, "Could not analyze image")
+        for group, probabilities in groups:
+            labels = probabilities.argmax(axis=1)
+            for i, label, p in zip(group, labels, probabilities[np.arange(len(labels)), labels]):
+                outcomes[i] = (int(label), float(p), None)
+        return outcomes
+
+    def _predict(self, batch: np.ndarray) -> np.ndarray:
+        started = time.perf_counter()
+        probabilities = self.model.predict(batch)
+        self.inference_latency.add(time.perf_counter() - started)
+        return probabilities
+
+    async def lookup(self, db: AsyncSession, url: str) -> Optional[Tuple[str, CachedResult]]:
+        """Cached ``(digest, result)`` for a previously detected image URL."""
+        if self.model is None:
+            return None
+        return await self.cache.by_url(db, url, self.model.version)
+
+    async def lookup_digest(self, db: AsyncSession, digest: str) -> Optional[CachedResult]:
+        """Cached result for an image's bytes."""
+        if self.model is None:
+            return None
+        return (await self.cache.by_digests(db, [digest], self.model.version)).get(digest)
+
+    async def prepare(self, digest: str):
+        """Build a stored image's input tensor ahead of its job; raises if it cannot be decoded."""
+        if self.model is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.store.tensor, digest, self.model)
+
+    async def run_once(self) -> int:
+        """Claim and process one batch; returns the number of jobs claimed."""
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=self.settings.DETECTION_JOB_TIMEOUT)
+        async with self.session_factory() as db:
+            jobs = await claim_jobs(db, self.settings.DETECTION_MAX_BATCH, stale_before)
+            await db.commit()
+        if not jobs:
+            return 0
+        self._notify(job_id for job_id, *_ in jobs)
+        try:
+            await self._process(jobs)
+        except Exception:
+            logger.exception("Disease detection batch failed; failing its %d jobs", len(jobs))
+            await self._fail([job_id for job_id, *_ in jobs], "Detection failed")
+        return len(jobs)
+
+    async def _fail(self, job_ids: List[UUID], reason: str):
+        """Mark jobs failed, best effort: if this fails too they are reclaimed later."""
+        finished_at = datetime.now(timezone.utc)
+        try:
+            async with self.session_factory() as db:
+                await write_results(db, [
+                    {"job_id": job_id, "new_status": "failed", "digest": None, "disease": None,
+                     "confidence": None, "advice": None, "reason": reason, "finished_at": finished_at}
+                    for job_id in job_ids
+                ])
+                await db.commit()
+        except Exception:
+            logger.exception("Could not mark %d detection jobs failed", len(job_ids))
+            return
+        self.failed += len(job_ids)
+        self._notify(job_ids)
+
+    async def _process(self, jobs: List[Tuple[UUID, str, datetime, int]]):
+        # Jobs claimed too often keep killing their worker (or its process); give up on them
+        exhausted = [job_id for job_id, _, _, attempts in jobs if attempts > self.settings.DETECTION_MAX_ATTEMPTS]
+        if exhausted:
+            await self._fail(exhausted, "Detection did not complete")
+            jobs = [job for job in jobs if job[3] <= self.settings.DETECTION_MAX_ATTEMPTS]
+            if not jobs:
+                return
+
+        fetched = await asyncio.gather(*(self._load(url) for _, url, _, _ in jobs), return_exceptions=True)
+        digests: List[Optional[str]] = []
+        images: Dict[str, Optional[bytes]] = {}
+        for loaded in fetched:
+            digest = None
+            if not isinstance(loaded, BaseException):
+                digest, data = loaded
+                images[digest] = data
+            digests.append(digest)
+
+        # Only images never seen before reach the model, each once per batch
+        version = self.model.version
+        async with self.session_factory() as db:
+            known = await self.cache.by_digests(db, images, version)
+        unseen = [digest for digest in images if digest not in known]
+        outcomes = []
+        if unseen:
+            outcomes = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._infer, [(digest, images[digest]) for digest in unseen]
+            )
+        fresh: Dict[str, CachedResult] = {}
+        errors: Dict[str, str] = {}
+        for digest, (label, confidence, reason) in zip(unseen, outcomes):
+            if reason is None:
+                disease = self.model.labels[label]
+                fresh[digest] = CachedResult(disease, confidence, RECOMMENDATIONS.get(disease))
+            else:
+                errors[digest] = reason
+
+        finished_at = datetime.now(timezone.utc)
+        results = []
+        urls = {}
+        for (job_id, url, created_at, _), data, digest in zip(jobs, fetched, digests):
+            if digest is None:
+                # The cause stays in the log: it can describe hosts the client must not learn about
+                logger.info("Could not fetch image for detection job %s: %r", job_id, data)
+                result, reason = None, "Could not fetch image"
+            else:
+                result, reason = known.get(digest) or fresh.get(digest), errors.get(digest)
+            if result is not None:
+                urls[url] = digest
+            results.append({
+                "job_id": job_id,
+                "new_status": "completed" if result else "failed",
+                "digest": digest,
+                "disease": result.detected_disease if result else None,
+                "confidence": result.confidence_score if result else None,
+                "advice": result.recommendation if result else None,
+                "reason": reason,
+                "finished_at": finished_at,
+            })
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            self.job_latency.add((finished_at - created_at).total_seconds())
+
+        async with self.session_factory() as db:
+            await self.cache.store(db, version, fresh)
+            await write_results(db, results)
+            await db.commit()
+        self.cache.remember(version, fresh, urls)
+        self.batches += 1
+        self.inferred += len(unseen)
+        self.failed += sum(1 for r in results if r["reason"])
+        self.completed += sum(1 for r in results if not r["reason"])
+        self._notify(job_id for job_id, *_ in jobs)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.settings.DETECTION_POLL_INTERVAL)
+                self._wake.clear()
+                # Let jobs submitted together share a forward pass
+                await asyncio.sleep(self.settings.DETECTION_BATCH_WAIT)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                while await self.run_once():
+                    pass
+            except Exception:
+                logger.exception("Disease detection batch failed")
+
+    async def start(self):
+        """Load the model and start the workers until ``stop()``."""
+        if self.model is None:
+            self.model = build_model()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.settings.DETECTION_WORKERS, thread_name_prefix="disease-detect"
+        )
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.settings.DETECTION_WORKERS)]
+
+    async def stop(self):
+        """Stop the workers; jobs they were running are reclaimed after DETECTION_JOB_TIMEOUT."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wake = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "batches": self.batches,
+            "inferred": self.inferred,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_batch": (self.completed + self.failed) / self.batches if self.batches else 0.0,
+            "inference_latency": self.inference_latency.snapshot(),
+            "job_latency": self.job_latency.snapshot(),
+        }
+
+
+detection_pipeline = DetectionPipeline()
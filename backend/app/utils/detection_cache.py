@@ -0,0 +1,155 @@
+"""Content-addressed cache of disease detection results.
+
+Results are keyed by the SHA-256 of the image bytes and the model version,
+so the same photo is only run through the model once however many times,
+and under whatever URLs, it is submitted. Two tiers sit in front of
+inference:
+
+- an in-process LRU of ``(model version, digest) -> result``, plus a map of
+  recently seen ``image_url -> digest`` (expiring after
+  ``DETECTION_URL_TTL`` seconds, since the content behind a URL can change);
+- the ``crop_detection_results`` table, shared by every process and kept
+  across restarts. A URL lookup that misses memory joins the URL's latest
+  completed job, within the same TTL, to its stored result.
+
+A resubmitted URL is answered at POST time without fetching anything; the
+same bytes under a new URL are caught by the workers after the fetch, before
+inference.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.crop import DetectionResult, DiseaseDetection
+from app.utils.cache import LRUCache
+
+
+class DetectionCacheSettings(BaseModel):
+    """Env-driven configuration for the detection result cache."""
+    DETECTION_CACHE_SIZE: int = int(os.getenv("DETECTION_CACHE_SIZE", 10_000))   # results kept in memory
+    DETECTION_URL_TTL: int = int(os.getenv("DETECTION_URL_TTL", 86_400))          # seconds; 0 disables URL keys
+
+
+detection_cache_settings = DetectionCacheSettings()
+
+
+class CachedResult(NamedTuple):
+    detected_disease: str
+    confidence_score: float
+    recommendation: Optional[str]
+
+
+class DetectionResultCache:
+    """Memory and table tiers over detection results."""
+
+    def __init__(self, settings: DetectionCacheSettings = detection_cache_settings):
+        self.settings = settings
+        self.results = LRUCache(max_entries=settings.DETECTION_CACHE_SIZE)
+        self.urls = LRUCache(max_entries=settings.DETECTION_CACHE_SIZE, ttl=settings.DETECTION_URL_TTL)
+        self.memory_hits = 0
+        self.table_hits = 0
+        self.misses = 0
+
+    async def by_url(self, db: AsyncSession, url: str, version: str) -> Optional[Tuple[str, CachedResult]]:
+        """``(digest, result)`` for an image URL seen within the TTL."""
+        if not self.settings.DETECTION_URL_TTL:
+            return None
+        digest = self.urls.get(url)
+        if digest is not None:
+            result = self.results.get((version, digest))
+            if result is not None:
+                self.memory_hits += 1
+                return digest, result
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.settings.DETECTION_URL_TTL)
+        row = await db.scalar(
+            select(DetectionResult)
+            .join(DiseaseDetection, DiseaseDetection.image_digest == DetectionResult.digest)
+            .where(
+                DiseaseDetection.image_url == url,
+                DiseaseDetection.completed_at >= cutoff,
+                DetectionResult.model_version == version,
+            )
+            .order_by(DiseaseDetection.completed_at.desc())
+            .limit(1)
+        )
+        if row is None:
+            self.misses += 1
+            return None
+        self.table_hits += 1
+        result = CachedResult(row.detected_disease, row.confidence_score, row.recommendation)
+        self.remember(version, {row.digest: result}, {url: row.digest})
+        return row.digest, result
+
+    async def by_digests(self, db: AsyncSession, digests: Iterable[str], version: str) -> Dict[str, CachedResult]:
+        """Cached results among ``digests``; one query for whatever memory lacks."""
+        found: Dict[str, CachedResult] = {}
+        missing = []
+        for digest in set(digests):
+            result = self.results.get((version, digest))
+            if result is None:
+                missing.append(digest)
+            else:
+                found[digest] = result
+        self.memory_hits += len(found)
+        if missing:
+            rows = await db.scalars(
+                select(DetectionResult).where(
+                    DetectionResult.model_version == version, DetectionResult.digest.in_(missing)
+                )
+            )
+            stored = {
+                row.digest: CachedResult(row.detected_disease, row.confidence_score, row.recommendation)
+                for row in rows
+            }
+            self.table_hits += len(stored)
+            self.misses += len(missing) - len(stored)
+            self.remember(version, stored)
+            found.update(stored)
+        return found
+
+    async def store(self, db: AsyncSession, version: str, results: Dict[str, CachedResult]):
+        """Persist new results (first writer wins); caller commits."""
+        if not results:
+            return
+        dialect = db.get_bind().dialect.name
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        await db.execute(
+            insert(DetectionResult)
+            .values([
+                {"digest": digest, "model_version": version, **result._asdict()}
+                for digest, result in results.items()
+            ])
+            .on_conflict_do_nothing(index_elements=["digest", "model_version"])
+        )
+
+    def remember(self, version: str, results: Dict[str, CachedResult], urls: Optional[Dict[str, str]] = None):
+        for digest, result in results.items():
+            self.results.set((version, digest), result)
+        if self.settings.DETECTION_URL_TTL:
+            for url, digest in (urls or {}).items():
+                self.urls.set(url, digest)
+
+    def clear(self):
+        self.results.clear()
+        self.urls.clear()
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.table_hits + self.misses
+        return {
+            "entries": len(self.results),
+            "urls": len(self.urls),
+            "memory_hits": self.memory_hits,
+            "table_hits": self.table_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.memory_hits + self.table_hits) / lookups if lookups else 0.0,
+        }
+
+
+detection_cache = DetectionResultCache()
@@ -0,0 +1,106 @@
+"""Hot ranking for the community feed.
+
+A post's score is ``log10(engagement) + age bonus``, where the age bonus
+grows linearly with the post's creation time (one point per
+``FEED_SCORE_DECAY`` seconds). Newer posts therefore start higher and older
+ones need ten times the engagement to keep up every decay period; the score
+of a post only changes when its likes or comments do, so it can be stored
+in an indexed column and the hot feed read as an index range scan.
+
+Writes refresh the score of the post they touch. ``rescore_periodically``
+recomputes every score in the background to repair drift (e.g. counts
+edited outside the API, or a change of weights or decay).
+"""
+import asyncio
+import logging
+import math
+import os
+from datetime import datetime, timezone
+from typing import Iterable
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.community import Post
+
+logger = logging.getLogger(__name__)
+
+
+class FeedSettings(BaseModel):
+    """Env-driven configuration for feed ranking."""
+    FEED_SCORE_DECAY: float = float(os.getenv("FEED_SCORE_DECAY", 45_000))       # seconds per 10x engagement
+    FEED_COMMENT_WEIGHT: float = float(os.getenv("FEED_COMMENT_WEIGHT", 2.0))     # a comment counts as n likes
+    FEED_RESCORE_INTERVAL: float = float(os.getenv("FEED_RESCORE_INTERVAL", 3600))
+    FEED_RESCORE_BATCH: int = int(os.getenv("FEED_RESCORE_BATCH", 1000))
+
+
+feed_settings = FeedSettings()
+
+# Scores are relative to this instant to keep them small
+SCORE_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def hot_score(likes: int, comments: int, created_at: datetime, settings: FeedSettings = feed_settings) -> float:
+    """Time-decayed ranking score for a post."""
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    engagement = max(likes + settings.FEED_COMMENT_WEIGHT * comments, 1)
+    age_bonus = (created_at - SCORE_EPOCH).total_seconds() / settings.FEED_SCORE_DECAY
+    return round(math.log10(engagement) + age_bonus, 7)
+
+
+async def refresh_scores(db: AsyncSession, post_ids: Iterable[UUID]):
+    """Recompute the given posts' scores inside the caller's transaction."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return
+    rows = (await db.execute(
+        select(Post.id, Post.likes_count, Post.comments_count, Post.created_at).where(Post.id.in_(post_ids))
+    )).all()
+    await _write_scores(db, rows)
+
+
+async def _write_scores(db: AsyncSession, rows):
+    posts = Post.__table__
+    if rows:
+        await db.execute(
+            update(posts)
+            .where(posts.c.id == bindparam("post_id"))
+            # Ranking is not an edit: keep updated_at as it was
+            .values(score=bindparam("new_score"), updated_at=posts.c.updated_at),
+            [
+                {"post_id": post_id, "new_score": hot_score(likes or 0, comments, created_at)}
+                for post_id, likes, comments, created_at in rows
+            ],
+        )
+
+
+async def rescore(db: AsyncSession, batch: int = feed_settings.FEED_RESCORE_BATCH) -> int:
+    """Recompute every post's score in id-ordered batches; commits per batch."""
+    rescored = 0
+    last_id = None
+    while True:
+        query = select(Post.id, Post.likes_count, Post.comments_count, Post.created_at).order_by(Post.id).limit(batch)
+        if last_id is not None:
+            query = query.where(Post.id > last_id)
+        rows = (await db.execute(query)).all()
+        if not rows:
+            return rescored
+        await _write_scores(db, rows)
+        await db.commit()
+        rescored += len(rows)
+        last_id = rows[-1][0]
+
+
+async def rescore_periodically(session_factory, interval: float = feed_settings.FEED_RESCORE_INTERVAL):
+    """Background task: recompute all scores every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as db:
+                rescored = await rescore(db)
+            logger.info("Rescored %d community posts", rescored)
+        except Exception:
+            logger.exception("Community feed rescoring failed")
@@ -0,0 +1,201 @@
+"""Content-addressed local storage for uploaded crop images.
+
+Uploads are parsed straight off the request body and written to a temporary
+file chunk by chunk while being hashed, so an upload never sits in memory
+whole. The finished file is renamed to its SHA-256 digest; if that digest is
+already stored the new copy is dropped, so identical uploads share one file.
+Stored images are referenced as ``store://<digest>``.
+
+Next to each image the store keeps its model input tensor, built once per
+model version through a memory-mapped ``.npy`` file. Inference workers map
+the tensor instead of re-reading and re-decoding the image.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from typing import AsyncIterator, NamedTuple, Optional
+
+import numpy as np
+from pydantic import BaseModel
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.utils.inference import DiseaseModel
+
+STORE_SCHEME = "store://"
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+class ImageStoreSettings(BaseModel):
+    """Env-driven configuration for uploaded image storage."""
+    IMAGE_STORE_DIR: str = os.getenv("IMAGE_STORE_DIR", "media/images")
+    IMAGE_UPLOAD_FIELD: str = os.getenv("IMAGE_UPLOAD_FIELD", "image")    # multipart field holding the file
+
+
+image_store_settings = ImageStoreSettings()
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class StoredImage(NamedTuple):
+    digest: str
+    size: int
+    created: bool   # False when identical bytes were already stored
+
+
+async def iter_multipart_file(chunks: AsyncIterator[bytes], content_type: str, field: str) -> AsyncIterator[bytes]:
+    """Yield the contents of multipart file field ``field`` as the body arrives."""
+    media_type, options = parse_options_header(content_type)
+    if media_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise ValueError("Expected a multipart/form-data body")
+
+    name = field.encode()
+    part = {"field": b"", "value": b"", "headers": {}, "selected": False}
+    found = []
+    pending = []
+
+    def on_part_begin():
+        part["headers"] = {}
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"], part["value"] = b"", b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        # Only the first part with the field's name is the upload
+        part["selected"] = disposition.get(b"name") == name and not found
+        if part["selected"]:
+            found.append(True)
+
+    def on_part_data(data, start, end):
+        if part["selected"]:
+            pending.append(bytes(data[start:end]))
+
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+    async for chunk in chunks:
+        parser.write(chunk)
+        if pending:
+            yield b"".join(pending)
+            pending.clear()
+    parser.finalize()
+    if not found:
+        raise ValueError(f"Missing file field '{field}'")
+
+
+class ImageStore:
+    """Images under ``<dir>/images``, tensors under ``<dir>/tensors/<model version>``."""
+
+    def __init__(self, settings: ImageStoreSettings = image_store_settings):
+        self.directory = settings.IMAGE_STORE_DIR
+
+    @staticmethod
+    def url(digest: str) -> str:
+        return STORE_SCHEME + digest
+
+    @staticmethod
+    def digest_of(url: str) -> Optional[str]:
+        """The digest a ``store://`` URL refers to; None for other URLs."""
+        if not url.startswith(STORE_SCHEME):
+            return None
+        digest = url[len(STORE_SCHEME):]
+        if not _DIGEST.fullmatch(digest):
+            raise ValueError("Malformed store URL")
+        return digest
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, "images", digest[:2], digest)
+
+    def tensor_path(self, digest: str, version: str) -> str:
+        version = re.sub(r"[^A-Za-z0-9_.-]", "-", version)
+        return os.path.join(self.directory, "tensors", version, digest[:2], f"{digest}.npy")
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def _temp_path(self) -> str:
+        directory = os.path.join(self.directory, "tmp")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, uuid.uuid4().hex)
+
+    def _write(self, f, digest, chunk: bytes):
+        digest.update(chunk)
+        f.write(chunk)
+
+    def _commit(self, temp: str, digest: str, size: int) -> StoredImage:
+        final = self.path(digest)
+        if os.path.exists(final):
+            os.remove(temp)
+            return StoredImage(digest, size, False)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(temp, final)
+        return StoredImage(digest, size, True)
+
+    @staticmethod
+    def _discard(temp: str):
+        if os.path.exists(temp):
+            os.remove(temp)
+
+    async def save(self, chunks: AsyncIterator[bytes], max_bytes: int) -> StoredImage:
+        """Stream ``chunks`` to disk; raises ``UploadTooLarge`` past ``max_bytes``.
+
+        File I/O runs in worker threads so large uploads don't block the event loop.
+        """
+        temp = await asyncio.to_thread(self._temp_path)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            f = await asyncio.to_thread(open, temp, "wb")
+            try:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLarge(f"Image exceeds {max_bytes} bytes")
+                    await asyncio.to_thread(self._write, f, digest, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+            if not size:
+                raise ValueError("Empty upload")
+            return await asyncio.to_thread(self._commit, temp, digest.hexdigest(), size)
+        except BaseException:
+            # Shielded so a cancelled upload still removes its temp file
+            await asyncio.shield(asyncio.to_thread(self._discard, temp))
+            raise
+
+    def tensor(self, digest: str, model: DiseaseModel) -> np.ndarray:
+        """The image's input tensor for ``model``, memory-mapped read-only; built on first use."""
+        path = self.tensor_path(digest, model.version)
+        try:
+            return np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            pass
+        array = model.preprocess_file(self.path(digest))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{uuid.uuid4().hex}.tmp"
+        mapped = np.lib.format.open_memmap(temp, mode="w+", dtype=array.dtype, shape=array.shape)
+        mapped[...] = array
+        mapped.flush()
+        del mapped
+        # Concurrent builders write identical files; the last rename wins
+        os.replace(temp, path)
+        return np.load(path, mmap_mode="r")
+
+
+image_store = ImageStore()
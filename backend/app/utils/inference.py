@@ -0,0 +1,191 @@
+"""CPU inference backends for crop disease detection.
+
+A backend turns image bytes into an input tensor (``preprocess``) and a
+stacked batch of tensors into class probabilities (``predict``); the
+detection pipeline batches images from many jobs into one ``predict`` call.
+``DETECTION_BACKEND`` selects the implementation:
+
+- ``stub``: deterministic scores derived from the image digest; no model
+  file or image decoding. The default, and what the tests use.
+- ``numpy``: a linear classifier over downscaled pixels loaded from an
+  ``.npz`` file with ``weights`` (pixels x classes) and ``bias`` arrays.
+- ``onnx``: any ONNX image classifier taking NCHW float32 input; requires
+  the optional ``onnxruntime`` package.
+
+The real backends decode images with the optional ``Pillow`` package.
+"""
+import hashlib
+import io
+import mmap
+import os
+import time
+from typing import Optional, Sequence, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+
+class InferenceSettings(BaseModel):
+    """Env-driven configuration for the disease model."""
+    DETECTION_BACKEND: str = os.getenv("DETECTION_BACKEND", "stub")       # stub | numpy | onnx
+    DETECTION_MODEL_PATH: Optional[str] = os.getenv("DETECTION_MODEL_PATH")
+    DETECTION_IMAGE_SIZE: int = int(os.getenv("DETECTION_IMAGE_SIZE", 224))   # model input is size x size RGB
+    DETECTION_THREADS: int = int(os.getenv("DETECTION_THREADS", 1))           # intra-op threads per batch (onnx)
+
+
+inference_settings = InferenceSettings()
+
+DISEASE_LABELS = [
+    "Healthy",
+    "Leaf Blight",
+    "Leaf Spot",
+    "Powdery Mildew",
+    "Rust",
+    "Mosaic Virus",
+]
+
+RECOMMENDATIONS = {
+    "Healthy": "No disease detected. Keep monitoring the crop.",
+    "Leaf Blight": "Apply fungicide and improve air circulation.",
+    "Leaf Spot": "Remove infected leaves and avoid overhead irrigation.",
+    "Powdery Mildew": "Apply sulfur-based fungicide and reduce humidity around plants.",
+    "Rust": "Remove infected plants and apply a protective fungicide.",
+    "Mosaic Virus": "Remove infected plants and control aphids and other vectors.",
+}
+
+# ImageNet statistics, which most pretrained vision models expect
+_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def decode_image(source: Union[bytes, str], size: int) -> np.ndarray:
+    """Decode image bytes or a file and resize to a (size, size, 3) float32 array in [0, 1]."""
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError("Decoding images requires the 'Pillow' package") from e
+    with Image.open(source if isinstance(source, str) else io.BytesIO(source)) as image:
+        # JPEGs can be decoded straight at a reduced scale
+        image.draft("RGB", (size, size))
+        pixels = image.convert("RGB").resize((size, size))
+    return np.asarray(pixels, dtype=np.float32) / 255.0
+
+
+class DiseaseModel:
+    """Interface for inference backends; ``predict`` must be thread-safe.
+
+    ``version`` identifies the weights: cached results are only reused for
+    the version that produced them.
+    """
+    labels: Sequence[str] = DISEASE_LABELS
+    version: str = "unversioned"
+
+    def preprocess(self, data: bytes) -> np.ndarray:
+        raise NotImplementedError
+
+    def preprocess_file(self, path: str) -> np.ndarray:
+        """``preprocess`` for a stored image, mapping the file instead of reading it."""
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return self.preprocess(data)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """Class probabilities, shape ``(len(batch), len(labels))``."""
+        raise NotImplementedError
+
+
+class StubModel(DiseaseModel):
+    """Deterministic pseudo-model: the same bytes always get the same result.
+
+    ``delay`` simulates the cost of a forward pass, charged once per batch.
+    """
+
+    version = "stub"
+
+    def __init__(self, delay: float = 0.0, labels: Sequence[str] = DISEASE_LABELS):
+        self.delay = delay
+        self.labels = labels
+        self._weights = np.random.default_rng(0).normal(size=(32, len(labels))).astype(np.float32)
+
+    def preprocess(self, data: bytes) -> np.ndarray:
+        return np.frombuffer(hashlib.sha256(data).digest(), dtype=np.uint8).astype(np.float32) / 255.0
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        if self.delay:
+            time.sleep(self.delay)
+        return softmax(batch @ self._weights * 4)
+
+
+class NumpyModel(DiseaseModel):
+    """Linear classifier over normalized pixels, evaluated as one matmul per batch."""
+
+    def __init__(self, path: str, size: int, labels: Sequence[str] = DISEASE_LABELS):
+        params = np.load(path)
+        self.version = f"numpy:{file_digest(path)[:16]}"
+        self.size = size
+        self.weights = params["weights"].astype(np.float32)
+        self.bias = params["bias"].astype(np.float32)
+        self.labels = [str(label) for label in params["labels"]] if "labels" in params else labels
+        if self.weights.shape != (size * size * 3, len(self.labels)):
+            raise RuntimeError(f"Model weights in {path} do not match a {size}x{size} input")
+
+    def preprocess(self, data: Union[bytes, str]) -> np.ndarray:
+        return ((decode_image(data, self.size) - _MEAN) / _STD).reshape(-1)
+
+    preprocess_file = preprocess
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return softmax(batch @ self.weights + self.bias)
+
+
+class OnnxModel(DiseaseModel):
+    """ONNX Runtime on the CPU; the model's first output is taken as logits."""
+
+    def __init__(self, path: str, size: int, threads: int = 1, labels: Sequence[str] = DISEASE_LABELS):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise RuntimeError("DETECTION_BACKEND=onnx requires the 'onnxruntime' package") from e
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.version = f"onnx:{file_digest(path)[:16]}"
+        self.size = size
+        self.labels = labels
+
+    def preprocess(self, data: Union[bytes, str]) -> np.ndarray:
+        return ((decode_image(data, self.size) - _MEAN) / _STD).transpose(2, 0, 1)
+
+    preprocess_file = preprocess
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        logits = self.session.run(None, {self.input_name: batch.astype(np.float32, copy=False)})[0]
+        return softmax(logits)
+
+
+def build_model(settings: InferenceSettings = inference_settings) -> DiseaseModel:
+    """Backend selected by DETECTION_BACKEND."""
+    backend = settings.DETECTION_BACKEND
+    if backend == "stub":
+        return StubModel()
+    if backend not in ("numpy", "onnx"):
+        raise RuntimeError(f"Unknown DETECTION_BACKEND: {backend}")
+    if not settings.DETECTION_MODEL_PATH:
+        raise RuntimeError(f"DETECTION_BACKEND={backend} requires DETECTION_MODEL_PATH")
+    if backend == "numpy":
+        return NumpyModel(settings.DETECTION_MODEL_PATH, settings.DETECTION_IMAGE_SIZE)
+    return OnnxModel(settings.DETECTION_MODEL_PATH, settings.DETECTION_IMAGE_SIZE, settings.DETECTION_THREADS)
@@ -1,47 +1,147 @@
-"""Utility functions for creating JWT tokens."""
+"""Utility functions for creating and verifying JWT tokens.
 
-from datetime import datetime, timedelta
-from jose import jwt, JWTError
+Encoding and decoding go through a pluggable ``JWTBackend`` selected by
+``JWT_BACKEND`` (python-jose by default, PyJWT when installed). Every backend
+raises ``TokenError`` so callers never depend on a specific library.
+"""
+
+import hashlib
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+
+from jose import jwt as jose_jwt, JWTError
 from app.schemas.token import (
+    Settings,
     settings,
     get_access_token_expiry,
     get_refresh_token_expiry,
 )
+from app.utils.cache import LRUCache
+
+
+class TokenError(Exception):
+    """Raised for any invalid, expired or malformed token."""
+
+
+class JWTBackend:
+    """Interface for JWT libraries."""
+    name = "base"
+
+    def encode(self, claims: dict, key: str, algorithm: str) -> str:
+        raise NotImplementedError
+
+    def decode(self, token: str, key: str, algorithms: List[str]) -> dict:
+        raise NotImplementedError
+
+
+class JoseBackend(JWTBackend):
+    name = "jose"
+
+    def encode(self, claims: dict, key: str, algorithm: str) -> str:
+        return jose_jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithms: List[str]) -> dict:
+        try:
+            return jose_jwt.decode(token, key, algorithms=algorithms)
+        except JWTError as e:
+            raise TokenError(str(e)) from e
+
+
+class PyJWTBackend(JWTBackend):
+    """Faster HMAC verification; requires the optional ``pyjwt`` package."""
+    name = "pyjwt"
+
+    def __init__(self):
+        try:
+            import jwt
+        except ImportError as e:
+            raise RuntimeError("JWT_BACKEND=pyjwt requires the 'pyjwt' package") from e
+        self._jwt = jwt
+
+    def encode(self, claims: dict, key: str, algorithm: str) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithms: List[str]) -> dict:
+        try:
+            return self._jwt.decode(token, key, algorithms=algorithms)
+        except self._jwt.PyJWTError as e:
+            raise TokenError(str(e)) from e
+
+
+def build_jwt_backend(settings: Settings = settings) -> JWTBackend:
+    """Backend selected by JWT_BACKEND."""
+    if settings.JWT_BACKEND == "pyjwt":
+        return PyJWTBackend()
+    if settings.JWT_BACKEND != "jose":
+        raise RuntimeError(f"Unknown JWT_BACKEND {settings.JWT_BACKEND!r}")
+    return JoseBackend()
+
+
+jwt_backend = build_jwt_backend()
+
+
+class VerifiedTokenCache:
+    """LRU of already-verified tokens, keyed by digest and expiring with ``exp``.
+
+    A hit skips signature verification entirely, so entries must never
+    outlive the token itself.
+    """
+
+    def __init__(self, max_entries: int):
+        self._entries = LRUCache(max_entries=max_entries) if max_entries > 0 else None
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Any]:
+        if self._entries is None:
+            return None
+        return self._entries.get(self._key(token))
+
+    def put(self, token: str, value: Any, exp: Optional[float]):
+        if self._entries is None or exp is None:
+            return
+        ttl = exp - time.time()
+        if ttl > 0:
+            self._entries.set(self._key(token), value, ttl=ttl)
+
+    def clear(self):
+        if self._entries is not None:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        if self._entries is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._entries.stats()}
+
+
+verified_tokens = VerifiedTokenCache(settings.JWT_CACHE_MAX_ENTRIES)
 
 
 def create_access_token(data: dict):
     """Create a JWT access token."""
     to_encode = data.copy()
-    expire = datetime.utcnow() + get_access_token_expiry()
+    expire = datetime.now(timezone.utc) + get_access_token_expiry()
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm="HS256")
+    return jwt_backend.encode(to_encode, settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
 
 
 def create_refresh_token(data: dict):
-    """Create a JWT refresh token."""
+    """Create a JWT refresh token with a unique jti, so it can be revoked."""
     to_encode = data.copy()
-    expire = datetime.utcnow() + get_refresh_token_expiry()
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.JWT_REFRESH_SECRET_KEY, algorithm="HS256")
+    expire = datetime.now(timezone.utc) + get_refresh_token_expiry()
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    return jwt_backend.encode(to_encode, settings.JWT_REFRESH_SECRET_KEY, settings.JWT_ALGORITHM)
 
 
 def decode_access_token(token: str):
-    """Decode a JWT access token."""
-    try:
-        payload = jwt.decode(
-            token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-        )
-        return payload
-    except JWTError as e:
-        raise e
+    """Decode and verify a JWT access token; raises TokenError."""
+    return jwt_backend.decode(token, settings.JWT_SECRET_KEY, [settings.JWT_ALGORITHM])
 
 
 def decode_refresh_token(token: str):
-    """Decode a JWT refresh token."""
-    try:
-        payload = jwt.decode(
-            token, settings.JWT_REFRESH_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-        )
-        return payload
-    except JWTError as e:
-        raise e
+    """Decode and verify a JWT refresh token; raises TokenError."""
+    return jwt_backend.decode(token, settings.JWT_REFRESH_SECRET_KEY, [settings.JWT_ALGORITHM])
@@ -0,0 +1,119 @@
+"""Coalesced like counters for community posts.
+
+Likes are recorded one row per user in ``community_post_likes``; the
+denormalized ``likes_count`` on the post is updated in the background.
+Each like or unlike adds ±1 to an in-memory delta for its post, and every
+``LIKES_FLUSH_INTERVAL`` seconds the deltas are applied as one
+``UPDATE ... SET likes_count = likes_count + n`` per touched post, so a
+viral post takes one row write per interval instead of one per click.
+
+Counts served to clients are eventually consistent. Deltas are per worker
+and additive, so several workers flushing independently stay correct;
+deltas still buffered when a worker crashes are lost, which
+``scripts/reconcile_post_counts.py`` repairs from the likes table.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.pool import Timings
+from app.models.community import Post
+from app.utils.feed import refresh_scores
+
+logger = logging.getLogger(__name__)
+
+
+class LikeSettings(BaseModel):
+    """Env-driven configuration for like counting."""
+    LIKES_FLUSH_INTERVAL: float = float(os.getenv("LIKES_FLUSH_INTERVAL", 1.0))   # seconds
+
+
+like_settings = LikeSettings()
+
+
+class LikeBuffer:
+    """Pending likes_count deltas per post."""
+
+    def __init__(self):
+        self._deltas: Dict[UUID, int] = {}
+        self.flush_latency = Timings()
+        self.applied = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def add(self, post_id: UUID, delta: int):
+        if post_id in self._deltas:
+            self.coalesced += 1
+        self._deltas[post_id] = self._deltas.get(post_id, 0) + delta
+
+    def pending(self, post_id: UUID) -> int:
+        """Delta not yet applied to the post's stored likes_count."""
+        return self._deltas.get(post_id, 0)
+
+    def clear(self):
+        self._deltas.clear()
+
+    def __len__(self) -> int:
+        return len(self._deltas)
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Apply and commit every pending delta; returns the number of posts updated."""
+        # Swapped out before the first await, so likes arriving meanwhile start a new batch
+        deltas, self._deltas = {k: v for k, v in self._deltas.items() if v}, {}
+        if not deltas:
+            return 0
+
+        posts = Post.__table__
+        started = time.perf_counter()
+        try:
+            # Fixed lock order keeps concurrent flushes from different workers deadlock-free
+            await db.execute(
+                update(posts)
+                .where(posts.c.id == bindparam("post_id"))
+                .values(likes_count=posts.c.likes_count + bindparam("delta"), updated_at=posts.c.updated_at),
+                [{"post_id": post_id, "delta": deltas[post_id]} for post_id in sorted(deltas)],
+            )
+            await refresh_scores(db, deltas)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            self.failures += 1
+            for post_id, delta in deltas.items():
+                self.add(post_id, delta)
+            raise
+        self.flush_latency.add(time.perf_counter() - started)
+        self.applied += len(deltas)
+        return len(deltas)
+
+    def stats(self) -> dict:
+        return {
+            "pending_posts": len(self),
+            "applied": self.applied,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "flush_latency": self.flush_latency.snapshot(),
+        }
+
+
+like_buffer = LikeBuffer()
+
+
+async def flush_periodically(session_factory, on_flush=None, interval: float = like_settings.LIKES_FLUSH_INTERVAL):
+    """Background task: apply buffered deltas every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        if not len(like_buffer):
+            continue
+        try:
+            async with session_factory() as db:
+                if await like_buffer.flush(db) and on_flush is not None:
+                    await on_flush()
+        except Exception:
+            logger.exception("Like counter flush failed; deltas kept for the next run")
@@ -0,0 +1,319 @@
+"""Write-behind persistence for chat messages.
+
+Senders are acknowledged once a message is queued (and journaled); a
+background task flushes the queue every ``CHAT_FLUSH_INTERVAL`` seconds, or
+as soon as ``CHAT_FLUSH_MAX_BATCH`` messages are waiting, as multi-row
+INSERTs plus one ``last_message_at`` bump per conversation in a single
+transaction. That is one commit per batch instead of one per message.
+
+Ids and timestamps are assigned at enqueue and inserts skip ids that already
+exist, so replaying a batch is idempotent. With ``CHAT_JOURNAL_DIR`` set,
+queued messages are also appended to NDJSON segments that are deleted only
+once their batch commits; ``start()`` replays whatever a crash left behind.
+Without a journal, messages acknowledged but not yet flushed are lost if the
+process dies.
+
+A batch that fails on connection or operational errors is requeued whole.
+Any other database error (e.g. a foreign key violation after a conversation
+was deleted) is isolated by writing the rows one by one inside savepoints;
+rows that still fail are logged and dropped, so one bad row cannot hold up
+the queue.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, TimeoutError as PoolTimeout
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.pool import Timings
+from app.db.session import AsyncSessionLocal
+from app.models.conversation import Conversation, Message
+from app.utils.chat_hub import ChatSettings, chat_settings
+
+logger = logging.getLogger(__name__)
+
+
+class MessageJournal:
+    """Append-only NDJSON segments covering messages not yet committed."""
+
+    def __init__(self, directory: str, fsync: bool = False):
+        self.directory = directory
+        self.fsync = fsync
+        self._file = None
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _segments(self) -> List[str]:
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(".ndjson"))
+        return [os.path.join(self.directory, n) for n in names]
+
+    def recover(self) -> List[dict]:
+        """Rows from segments left by a previous process; call before appending."""
+        rows = []
+        for path in self._segments():
+            with open(path) as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        break  # torn final write
+            self._sequence = max(self._sequence, int(os.path.basename(path).split(".")[0]))
+        return rows
+
+    def append(self, row: dict):
+        if self._file is None:
+            self._sequence += 1
+            self._file = open(os.path.join(self.directory, f"{self._sequence:012d}.ndjson"), "a")
+        self._file.write(json.dumps(row, default=str) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self) -> int:
+        """Close the current segment; returns the last sequence it covers."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return self._sequence
+
+    def discard(self, through: int):
+        """Delete segments up to and including ``through`` (their rows are committed)."""
+        for path in self._segments():
+            if int(os.path.basename(path).split(".")[0]) <= through:
+                os.remove(path)
+
+
+async def write_batch(db: AsyncSession, rows: List[dict], chunk_size: int):
+    """Insert ``rows`` with multi-row INSERTs and bump their conversations; caller commits."""
+    dialect = db.get_bind().dialect.name
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    for start in range(0, len(rows), chunk_size):
+        await db.execute(
+            insert(Message).values(rows[start:start + chunk_size]).on_conflict_do_nothing(index_elements=["id"])
+        )
+
+    latest: Dict[UUID, datetime] = {}
+    for row in rows:
+        chat_id = row["conversation_id"]
+        latest[chat_id] = max(latest.get(chat_id, row["created_at"]), row["created_at"])
+    conversations = Conversation.__table__
+    await db.execute(
+        update(conversations)
+        .where(conversations.c.id == bindparam("chat_id"))
+        .where(or_(conversations.c.last_message_at.is_(None), conversations.c.last_message_at < bindparam("at")))
+        .values(last_message_at=bindparam("at")),
+        [{"chat_id": chat_id, "at": at} for chat_id, at in latest.items()],
+    )
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed flush should be retried as is rather than isolated.
+
+    Only connectivity problems and timeouts are; anything else (constraint
+    violations, rows that cannot be bound, programming errors) would fail the
+    same way on every retry.
+    """
+    if isinstance(error, DBAPIError):
+        return error.connection_invalidated or isinstance(error, (OperationalError, InterfaceError))
+    # OSError covers TimeoutError and refused or reset connections
+    return isinstance(error, (OSError, PoolTimeout))
+
+
+async def write_rows(db: AsyncSession, rows: List[dict], chunk_size: int) -> List[dict]:
+    """Write rows one by one inside savepoints and commit; returns the rows the database rejected."""
+    rejected = []
+    for row in rows:
+        try:
+            async with db.begin_nested():
+                await write_batch(db, [row], chunk_size)
+        except Exception as e:
+            if is_transient(e):
+                raise
+            rejected.append(row)
+            logger.error(
+                "Dropping chat message %s for conversation %s: %s",
+                row["id"], row["conversation_id"], getattr(e, "orig", None) or e,
+            )
+    await db.commit()
+    return rejected
+
+
+class MessageWriter:
+    """Queues chat messages and persists them in batches."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        settings: ChatSettings = chat_settings,
+    ):
+        self.session_factory = session_factory
+        self.settings = settings
+        self.journal: Optional[MessageJournal] = None
+        if settings.CHAT_JOURNAL_DIR:
+            self.journal = MessageJournal(settings.CHAT_JOURNAL_DIR, settings.CHAT_JOURNAL_FSYNC)
+        self._pending: List[dict] = []
+        self._pending_chats: Dict[UUID, int] = {}
+        self._flushing_chats: Dict[UUID, int] = {}    # taken by the flush in progress, not yet committed
+        self._lock = asyncio.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flush_latency = Timings()
+        self.peak_pending = 0
+        self.flushed = 0
+        self.failures = 0
+        self.dropped = 0
+        self.replayed = 0
+
+    def _queue(self, row: dict):
+        self._pending.append(row)
+        chat_id = row["conversation_id"]
+        self._pending_chats[chat_id] = self._pending_chats.get(chat_id, 0) + 1
+        self.peak_pending = max(self.peak_pending, len(self._pending))
+
+    async def enqueue(self, conversation_id: UUID, sender_id: UUID, content: str) -> dict:
+        """Queue a message and return its row; it is durable once flushed."""
+        if len(self._pending) >= self.settings.CHAT_FLUSH_MAX_PENDING:
+            # Backpressure: the sender pays for the flush it is waiting on
+            try:
+                await self.flush()
+            except Exception:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Chat is temporarily unavailable",
+                    headers={"Retry-After": "1"},
+                )
+
+        row = {
+            "id": uuid.uuid4(),
+            "conversation_id": conversation_id,
+            "sender_id": sender_id,
+            "content": content,
+            "created_at": datetime.now(timezone.utc),
+        }
+        if self.journal is not None:
+            self.journal.append(row)
+        self._queue(row)
+        if self._wake is not None and len(self._pending) >= self.settings.CHAT_FLUSH_MAX_BATCH:
+            self._wake.set()
+        return row
+
+    def has_pending(self, conversation_id: UUID) -> bool:
+        return conversation_id in self._pending_chats or conversation_id in self._flushing_chats
+
+    async def sync(self, conversation_id: UUID):
+        """Flush if the conversation has queued or in-flight messages, so reads see them.
+
+        A flush already in progress holds the lock, so this waits for its commit.
+        """
+        if self.has_pending(conversation_id):
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Persist everything queued so far; returns the number of rows written."""
+        async with self._lock:
+            if not self._pending:
+                return 0
+            batch, counts = self._pending, self._pending_chats
+            self._pending, self._pending_chats = [], {}
+            self._flushing_chats = counts
+            through = self.journal.rotate() if self.journal is not None else 0
+
+            started = time.perf_counter()
+            rejected = []
+            try:
+                try:
+                    async with self.session_factory() as db:
+                        await write_batch(db, batch, self.settings.CHAT_FLUSH_MAX_BATCH)
+                        await db.commit()
+                except Exception as e:
+                    if is_transient(e):
+                        raise
+                    self.failures += 1
+                    async with self.session_factory() as db:
+                        rejected = await write_rows(db, batch, self.settings.CHAT_FLUSH_MAX_BATCH)
+            except Exception:
+                # Put the batch back in front; the retry is idempotent
+                self.failures += 1
+                self._pending = batch + self._pending
+                for chat_id, n in counts.items():
+                    self._pending_chats[chat_id] = self._pending_chats.get(chat_id, 0) + n
+                raise
+            finally:
+                self._flushing_chats = {}
+            self.flush_latency.add(time.perf_counter() - started)
+            self.flushed += len(batch) - len(rejected)
+            self.dropped += len(rejected)
+            if self.journal is not None:
+                self.journal.discard(through)
+            return len(batch) - len(rejected)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.settings.CHAT_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Chat message flush failed; retrying")
+
+    async def start(self):
+        """Replay the journal, then flush in the background until ``stop()``."""
+        if self.journal is not None:
+            for row in self.journal.recover():
+                row["id"] = UUID(row["id"])
+                row["conversation_id"] = UUID(row["conversation_id"])
+                row["sender_id"] = UUID(row["sender_id"])
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+                self._queue(row)
+                self.replayed += 1
+            if self.replayed:
+                logger.info("Replaying %d journaled chat messages", self.replayed)
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and flush what is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wake = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Final chat flush failed; %d messages left unwritten", len(self._pending))
+
+    def clear(self):
+        """Drop queued messages without writing them."""
+        self._pending, self._pending_chats = [], {}
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "peak_pending": self.peak_pending,
+            "flushed": self.flushed,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "replayed": self.replayed,
+            "flush_latency": self.flush_latency.snapshot(),
+        }
+
+
+message_writer = MessageWriter()
@@ -0,0 +1,96 @@
+"""Helpers for keyset (cursor) pagination and optional row counts."""
+import base64
+import json
+from datetime import datetime
+from typing import Literal, Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import String, Uuid, func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+CountMode = Literal["exact", "estimated", "none"]
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Opaque cursor pointing just past the given (created_at, id) row."""
+    raw = json.dumps([created_at.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor produced by ``encode_cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_page(query: Select, model, cursor: Optional[str], dialect: str, newest_first: bool = True) -> Select:
+    """Order newest (or oldest) first by (created_at, id) and seek past ``cursor``.
+
+    With a (created_at, id) index this is a range scan no matter how deep the
+    client has scrolled, unlike OFFSET which walks every skipped row.
+    """
+    if newest_first:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at, model.id)
+    if cursor is None:
+        return query
+
+    created_at, row_id = decode_cursor(cursor)
+    if dialect == "sqlite":
+        # SQLite compares DATETIME columns as text and server defaults are
+        # stored without microseconds, so bind the same textual form
+        bound_at = literal(created_at.replace(tzinfo=None).isoformat(sep=" "), String)
+    else:
+        bound_at = literal(created_at, model.created_at.type)
+    key, bound = tuple_(model.created_at, model.id), tuple_(bound_at, literal(row_id, Uuid))
+    return query.where(key < bound if newest_first else key > bound)
+
+
+class ExplainJSON(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a query, keeping its bound parameters.
+
+    The query is compiled with the connection's own parameter style, so values
+    such as search terms travel as parameters instead of being inlined.
+    """
+    inherit_cache = False
+
+    def __init__(self, query: Select):
+        self.query = query
+
+
+@compiles(ExplainJSON, "postgresql")
+def _compile_explain_json(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.query, **kw)
+
+
+def next_cursor(items: Sequence, limit: int) -> Optional[str]:
+    """Cursor for the page after ``items`` (fetched with ``limit + 1``)."""
+    if len(items) <= limit:
+        return None
+    last = items[limit - 1]
+    return encode_cursor(last.created_at, last.id)
+
+
+async def count_rows(db: AsyncSession, query: Select, mode: CountMode) -> Optional[int]:
+    """Total rows matched by ``query``: exact, planner estimate, or skipped."""
+    if mode == "none":
+        return None
+
+    bind = db.get_bind()
+    if mode == "estimated" and bind.dialect.name == "postgresql":
+        # The planner's row estimate avoids a full COUNT(*) scan
+        plan = await db.scalar(ExplainJSON(query))
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    return await db.scalar(select(func.count()).select_from(query.subquery()))
@@ -0,0 +1,202 @@
+"""Vectorized price analytics over observation history.
+
+A product's most recent observations are loaded into NumPy arrays and
+reduced to a ``PriceModel``: moving average, volatility, quartiles and a
+least-squares trend line, either plain (``linear``) or exponentially
+weighted toward recent points (``ewm``). Fitted models are cached per
+product and method; an entry is reused only while the product's
+``latest_prices`` row still matches, and ingest drops it eagerly.
+"""
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.price import LatestPrice, PriceObservation
+from app.schemas.price import PriceModel, PricePrediction, as_utc
+from app.utils.cache import LRUCache
+
+
+class AnalyticsSettings(BaseModel):
+    """Env-driven configuration for price models."""
+    PRICE_MODEL_MAX_POINTS: int = int(os.getenv("PRICE_MODEL_MAX_POINTS", 2000))    # most recent observations used
+    PRICE_MODEL_MIN_POINTS: int = int(os.getenv("PRICE_MODEL_MIN_POINTS", 3))
+    PRICE_MA_WINDOW: int = int(os.getenv("PRICE_MA_WINDOW", 7))
+    PRICE_EWM_HALFLIFE_DAYS: float = float(os.getenv("PRICE_EWM_HALFLIFE_DAYS", 14))
+    PRICE_STABLE_BAND: float = float(os.getenv("PRICE_STABLE_BAND", 0.01))          # relative move counted as flat
+    PRICE_MODEL_CACHE_SIZE: int = int(os.getenv("PRICE_MODEL_CACHE_SIZE", 4096))
+    PRICE_MODEL_CACHE_TTL: int = int(os.getenv("PRICE_MODEL_CACHE_TTL", 600))       # seconds
+
+
+analytics_settings = AnalyticsSettings()
+
+SECONDS_PER_DAY = 86_400.0
+
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over ``window`` points (fewer at the start of the series)."""
+    sums = np.cumsum(values, dtype=float)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums / np.minimum(np.arange(1, len(values) + 1), window)
+
+
+def fit_trend(days: np.ndarray, prices: np.ndarray, method: str, halflife: float) -> Tuple[float, float]:
+    """Least-squares (slope per day, intercept at day 0) over ``days`` <= 0."""
+    if np.ptp(days) == 0:
+        return 0.0, float(prices.mean())
+    weights = None
+    if method == "ewm":
+        # polyfit weights multiply residuals, so take the root of the point weights
+        weights = np.sqrt(0.5 ** (-days / halflife))
+    slope, intercept = np.polyfit(days, prices, 1, w=weights)
+    return float(slope), float(intercept)
+
+
+def volatility(prices: np.ndarray) -> float:
+    """Standard deviation of log returns between consecutive observations."""
+    if len(prices) < 2:
+        return 0.0
+    return float(np.std(np.diff(np.log(prices))))
+
+
+def percentile_of(sorted_prices: np.ndarray, price: float) -> float:
+    """Share of observations at or below ``price``, 0-100."""
+    return float(np.searchsorted(sorted_prices, price, side="right") / len(sorted_prices) * 100)
+
+
+def fit_model(
+    product_id: UUID, times: np.ndarray, prices: np.ndarray, method: str,
+    settings: AnalyticsSettings = analytics_settings,
+) -> PriceModel:
+    """Reduce one product's series (epoch seconds, prices; oldest first) to a model."""
+    days = (times - times[-1]) / SECONDS_PER_DAY
+    slope, intercept = fit_trend(days, prices, method, settings.PRICE_EWM_HALFLIFE_DAYS)
+    p25, p50, p75 = np.percentile(prices, [25, 50, 75])
+    return PriceModel(
+        product_id=product_id,
+        method=method,
+        points=len(prices),
+        last_price=float(prices[-1]),
+        last_observed_at=datetime.fromtimestamp(float(times[-1]), timezone.utc),
+        moving_average=float(moving_average(prices, settings.PRICE_MA_WINDOW)[-1]),
+        volatility=volatility(prices),
+        slope_per_day=slope,
+        intercept=intercept,
+        p25=float(p25),
+        p50=float(p50),
+        p75=float(p75),
+    )
+
+
+def trend_label(change: float, reference: float, band: float = analytics_settings.PRICE_STABLE_BAND) -> str:
+    if reference and change / reference > band:
+        return "upward"
+    if reference and change / reference < -band:
+        return "downward"
+    return "stable"
+
+
+def predict(model: PriceModel, horizon_days: int) -> PricePrediction:
+    """Extrapolate the fitted line ``horizon_days`` past the last observation."""
+    predicted = max(model.intercept + model.slope_per_day * horizon_days, 0.0)
+    return PricePrediction(
+        **model.model_dump(),
+        horizon_days=horizon_days,
+        predicted_price=round(predicted, 2),
+        predicted_trend=trend_label(predicted - model.intercept, model.last_price),
+    )
+
+
+async def load_series(
+    db: AsyncSession, product_ids: Sequence[UUID], max_points: int = analytics_settings.PRICE_MODEL_MAX_POINTS,
+) -> Dict[UUID, Tuple[np.ndarray, np.ndarray]]:
+    """Most recent ``max_points`` observations per product, in one query."""
+    ranked = (
+        select(
+            PriceObservation.product_id,
+            PriceObservation.observed_at,
+            PriceObservation.price,
+            func.row_number().over(
+                partition_by=PriceObservation.product_id,
+                order_by=(PriceObservation.observed_at.desc(), PriceObservation.id.desc()),
+            ).label("rn"),
+        )
+        .where(PriceObservation.product_id.in_(set(product_ids)))
+        .subquery()
+    )
+    rows = (await db.execute(
+        select(ranked.c.product_id, ranked.c.observed_at, ranked.c.price)
+        .where(ranked.c.rn <= max_points)
+        .order_by(ranked.c.product_id, ranked.c.observed_at)
+    )).all()
+
+    count = len(rows)
+    times = np.fromiter((as_utc(r.observed_at).timestamp() for r in rows), dtype=float, count=count)
+    prices = np.fromiter((r.price for r in rows), dtype=float, count=count)
+    bounds = [0] + [i for i in range(1, count) if rows[i].product_id != rows[i - 1].product_id] + [count]
+    return {
+        rows[start].product_id: (times[start:end], prices[start:end])
+        for start, end in zip(bounds, bounds[1:])
+        if end > start
+    }
+
+
+class FittedModel(NamedTuple):
+    model: PriceModel
+    sorted_prices: np.ndarray
+    version: object  # latest_prices.observed_at the model was fitted at
+
+
+class PriceModelCache:
+    """LRU of fitted models keyed by (product, method)."""
+
+    def __init__(self, settings: AnalyticsSettings = analytics_settings):
+        self.settings = settings
+        self._entries = LRUCache(max_entries=settings.PRICE_MODEL_CACHE_SIZE, ttl=settings.PRICE_MODEL_CACHE_TTL)
+
+    def invalidate(self, product_id: UUID):
+        for method in ("linear", "ewm"):
+            self._entries.delete((product_id, method))
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+    async def get_many(self, db: AsyncSession, product_ids: Sequence[UUID], method: str) -> Dict[UUID, FittedModel]:
+        """Fitted models for products with enough history; refits stale ones in one batch."""
+        versions = dict((await db.execute(
+            select(LatestPrice.product_id, LatestPrice.observed_at)
+            .where(LatestPrice.product_id.in_(set(product_ids)))
+        )).all())
+
+        fitted: Dict[UUID, FittedModel] = {}
+        stale: List[UUID] = []
+        for product_id in versions:
+            entry = self._entries.get((product_id, method))
+            if entry is not None and entry.version == versions[product_id]:
+                fitted[product_id] = entry
+            else:
+                stale.append(product_id)
+
+        if stale:
+            for product_id, (times, prices) in (await load_series(db, stale, self.settings.PRICE_MODEL_MAX_POINTS)).items():
+                if len(prices) < self.settings.PRICE_MODEL_MIN_POINTS:
+                    continue
+                entry = FittedModel(
+                    fit_model(product_id, times, prices, method, self.settings),
+                    np.sort(prices),
+                    versions[product_id],
+                )
+                self._entries.set((product_id, method), entry)
+                fitted[product_id] = entry
+        return fitted
+
+
+price_models = PriceModelCache()
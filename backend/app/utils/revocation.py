@@ -0,0 +1,139 @@
+"""Refresh-token revocation.
+
+Refresh tokens carry a ``jti``; logging out or rotating a token records that
+jti here until the token's own ``exp``, after which the entry is useless and
+is compacted away. Access tokens are never checked against the store, so the
+authenticated request path stays free of database round-trips.
+"""
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.token import RevokedToken
+from app.schemas.token import Settings, settings
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationStore:
+    """Interface for revoked-jti stores.
+
+    Methods take the request's session, which the database backend uses and
+    commits; in-memory backends ignore it.
+    """
+
+    async def revoke(self, db: Optional[AsyncSession], jti: str, exp: float) -> bool:
+        """Revoke ``jti`` until ``exp``; False if it was already revoked."""
+        raise NotImplementedError
+
+    async def is_revoked(self, db: Optional[AsyncSession], jti: str) -> bool:
+        raise NotImplementedError
+
+    async def compact(self, db: Optional[AsyncSession]) -> int:
+        """Drop entries whose tokens have expired; returns how many."""
+        raise NotImplementedError
+
+
+class MemoryRevocationStore(RevocationStore):
+    """Per-process dict of jti -> exp; revocations do not reach other workers."""
+
+    def __init__(self):
+        self._revoked: dict = {}
+        self._expiry: list = []  # heap of (exp, jti) for compaction
+        self._lock = threading.Lock()
+
+    async def revoke(self, db, jti: str, exp: float) -> bool:
+        with self._lock:
+            current = self._revoked.get(jti)
+            if current is not None and current > time.time():
+                return False
+            self._revoked[jti] = exp
+            heapq.heappush(self._expiry, (exp, jti))
+            return True
+
+    async def is_revoked(self, db, jti: str) -> bool:
+        exp = self._revoked.get(jti)
+        return exp is not None and exp > time.time()
+
+    async def compact(self, db=None) -> int:
+        now = time.time()
+        removed = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                exp, jti = heapq.heappop(self._expiry)
+                if self._revoked.get(jti) == exp:
+                    del self._revoked[jti]
+                    removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+class DatabaseRevocationStore(RevocationStore):
+    """Shared across workers via the ``revoked_tokens`` table."""
+
+    @staticmethod
+    def _as_datetime(exp: float) -> datetime:
+        return datetime.fromtimestamp(exp, timezone.utc)
+
+    async def revoke(self, db: AsyncSession, jti: str, exp: float) -> bool:
+        dialect = db.get_bind().dialect.name
+        upsert = pg_insert if dialect == "postgresql" else sqlite_insert
+        result = await db.execute(
+            upsert(RevokedToken)
+            .values(jti=jti, expires_at=self._as_datetime(exp))
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+        await db.commit()
+        # A concurrent revoke of the same jti inserts nothing
+        return result.rowcount == 1
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        found = await db.scalar(
+            select(RevokedToken.jti).where(
+                RevokedToken.jti == jti,
+                RevokedToken.expires_at > self._as_datetime(time.time()),
+            )
+        )
+        return found is not None
+
+    async def compact(self, db: AsyncSession) -> int:
+        result = await db.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at <= self._as_datetime(time.time()))
+        )
+        await db.commit()
+        return result.rowcount
+
+
+def build_revocation_store(settings: Settings = settings) -> RevocationStore:
+    """Store selected by REVOCATION_BACKEND."""
+    if settings.REVOCATION_BACKEND == "memory":
+        return MemoryRevocationStore()
+    if settings.REVOCATION_BACKEND != "database":
+        raise RuntimeError(f"Unknown REVOCATION_BACKEND {settings.REVOCATION_BACKEND!r}")
+    return DatabaseRevocationStore()
+
+
+revocation_store = build_revocation_store()
+
+
+async def compact_periodically(session_factory, interval: float = settings.REVOCATION_COMPACT_INTERVAL):
+    """Background task: compact the store every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as db:
+                removed = await revocation_store.compact(db)
+            logger.info("Compacted %d expired token revocations", removed)
+        except Exception:
+            logger.exception("Token revocation compaction failed")
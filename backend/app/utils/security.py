@@ -1,7 +1,45 @@
-""""Helper functions for password hashing and verification."""
+""""Helper functions for password hashing and verification.
+
+Hashing is deliberately slow, so request handlers never run it inline: they
+await ``password_hasher``, a bounded worker pool that sheds load with a 503
+once too many hashes are queued instead of starving every other route.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from pydantic import BaseModel
+
+
+class PasswordSettings(BaseModel):
+    """Env-driven configuration for password hashing."""
+    PASSWORD_SCHEME: str = os.getenv("PASSWORD_SCHEME", "argon2")            # any passlib scheme, e.g. argon2
+    PASSWORD_ROUNDS: Optional[int] = int(os.getenv("PASSWORD_ROUNDS")) if os.getenv("PASSWORD_ROUNDS") else None
+    PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # thread | process
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    # Queued + running hashes before shedding load; bounds the wait to a few hash times
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 4 * PASSWORD_HASH_WORKERS))
+    PASSWORD_HASH_RETRY_AFTER: int = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", 1))   # seconds
+
+
+password_settings = PasswordSettings()
 
-pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
+# Hashes from older schemes still verify and are upgraded on the next login
+LEGACY_SCHEMES = ["argon2", "sha256_crypt"]
+
+
+def build_context(settings: PasswordSettings = password_settings) -> CryptContext:
+    scheme = settings.PASSWORD_SCHEME
+    options = {f"{scheme}__rounds": settings.PASSWORD_ROUNDS} if settings.PASSWORD_ROUNDS else {}
+    schemes = [scheme] + [s for s in LEGACY_SCHEMES if s != scheme]
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+pwd_context = build_context()
 
 def hash_password(password: str) -> str:
     """Hash a plaintext password."""
@@ -10,3 +48,71 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plaintext password against a hashed password."""
     return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also returns a fresh hash when the stored one is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs hashing on a dedicated bounded pool with load shedding."""
+
+    def __init__(self, settings: PasswordSettings = password_settings):
+        self.settings = settings
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            workers = self.settings.PASSWORD_HASH_WORKERS
+            if self.settings.PASSWORD_HASH_EXECUTOR == "process":
+                self._executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    def _release(self, _future):
+        with self._lock:
+            self.pending -= 1
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.settings.PASSWORD_HASH_MAX_PENDING:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-in attempts in progress, please retry shortly.",
+                    headers={"Retry-After": str(self.settings.PASSWORD_HASH_RETRY_AFTER)},
+                )
+            self.pending += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update, password, hashed)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "scheme": self.settings.PASSWORD_SCHEME,
+            "workers": self.settings.PASSWORD_HASH_WORKERS,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher()
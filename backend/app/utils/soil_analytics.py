@@ -0,0 +1,302 @@
+"""Vectorized analytics over soil samples.
+
+A user's samples are fetched in one query as columns and reduced with
+NumPy: latest values, changes between consecutive samples, means and a
+least-squares trend for every measurement at once. Missing measurements are
+NaN and masked out of each column separately.
+
+Latest values are placed within their region (the normalized sample
+location). Each process keeps a region's samples as sorted columns in
+``soil_regions``; a read compares the cached entry with the table's sample
+count and newest timestamp for the region, loads only samples newer than
+the entry's watermark when rows were added, and reloads the region when the
+counts do not add up. Samples recorded through this process are applied to
+the cache directly.
+
+Recommendations compare each latest value with a fixed optimal band
+(``OPTIMAL_BANDS``) and project declining trends ``SOIL_TREND_HORIZON_DAYS``
+ahead.
+"""
+import os
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.crop import SoilAnalysis
+from app.schemas.crop import (
+    SoilAnalyticsResponse, SoilDelta, SoilMetricSummary, SoilRecommendation,
+)
+from app.schemas.price import as_utc
+from app.utils.cache import LRUCache
+from app.utils.price_analytics import SECONDS_PER_DAY, percentile_of
+
+
+class SoilSettings(BaseModel):
+    """Env-driven configuration for soil analytics."""
+    SOIL_ANALYTICS_MAX_SAMPLES: int = int(os.getenv("SOIL_ANALYTICS_MAX_SAMPLES", 1000))   # most recent per user
+    SOIL_TREND_HORIZON_DAYS: float = float(os.getenv("SOIL_TREND_HORIZON_DAYS", 90))
+    SOIL_REGION_CACHE_SIZE: int = int(os.getenv("SOIL_REGION_CACHE_SIZE", 256))
+
+
+soil_settings = SoilSettings()
+
+METRICS = ["ph_level", "nitrogen", "phosphorus", "potassium", "moisture"]
+
+LABELS = {
+    "ph_level": "pH",
+    "nitrogen": "Nitrogen",
+    "phosphorus": "Phosphorus",
+    "potassium": "Potassium",
+    "moisture": "Moisture",
+}
+
+# Optimal [low, high] per metric, in METRICS order; nutrients in mg/kg, moisture in %
+OPTIMAL_BANDS = np.array([
+    [5.5, 7.5],
+    [20.0, 60.0],
+    [15.0, 50.0],
+    [120.0, 300.0],
+    [15.0, 40.0],
+])
+
+ADVICE = {
+    ("ph_level", "deficient"): "Soil is too acidic; apply agricultural lime.",
+    ("ph_level", "excess"): "Soil is too alkaline; apply elemental sulfur or an acidifying fertilizer.",
+    ("nitrogen", "deficient"): "Apply a nitrogen fertilizer such as urea, or well-rotted manure.",
+    ("nitrogen", "excess"): "Cut back nitrogen; excess leaches away and encourages disease-prone growth.",
+    ("phosphorus", "deficient"): "Apply a phosphate fertilizer such as DAP or single superphosphate.",
+    ("phosphorus", "excess"): "Skip phosphate fertilizer this season.",
+    ("potassium", "deficient"): "Apply potash (muriate or sulfate of potash).",
+    ("potassium", "excess"): "Skip potash this season.",
+    ("moisture", "deficient"): "Soil is dry; irrigate or mulch to hold moisture.",
+    ("moisture", "excess"): "Soil is waterlogged; improve drainage before planting.",
+}
+
+_COLUMNS = [getattr(SoilAnalysis, metric) for metric in METRICS]
+
+
+def normalize_region(location: Optional[str]) -> Optional[str]:
+    """Region key for a sample location: case and spacing are ignored."""
+    if not location:
+        return None
+    return " ".join(location.split()).lower() or None
+
+
+def as_matrix(rows: Sequence[Sequence]) -> np.ndarray:
+    """Rows of metric values (None for missing) as a float matrix with NaNs."""
+    return np.array(rows, dtype=float).reshape(len(rows), len(METRICS))
+
+
+async def load_user_samples(
+    db: AsyncSession, user_id: UUID, max_samples: int = soil_settings.SOIL_ANALYTICS_MAX_SAMPLES,
+) -> Tuple[np.ndarray, np.ndarray, Optional[str]]:
+    """(epoch seconds, values, region of the latest located sample), oldest first, in one query."""
+    rows = (await db.execute(
+        select(SoilAnalysis.created_at, SoilAnalysis.region, *_COLUMNS)
+        .where(SoilAnalysis.user_id == user_id)
+        .order_by(SoilAnalysis.created_at.desc(), SoilAnalysis.id.desc())
+        .limit(max_samples)
+    )).all()
+    rows.reverse()
+    times = np.fromiter((as_utc(r[0]).timestamp() for r in rows), dtype=float, count=len(rows))
+    region = next((r[1] for r in reversed(rows) if r[1]), None)
+    return times, as_matrix([r[2:] for r in rows]), region
+
+
+def last_two(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Latest and previous non-missing value of every column (NaN where absent)."""
+    if not len(values):
+        empty = np.full(values.shape[1], np.nan)
+        return empty, empty.copy()
+    positions = np.where(~np.isnan(values), np.arange(len(values))[:, None], -1)
+    last = positions.max(axis=0)
+    previous = np.where(positions < last, positions, -1).max(axis=0)
+
+    def pick(index: np.ndarray) -> np.ndarray:
+        return np.where(index >= 0, values[np.maximum(index, 0), np.arange(values.shape[1])], np.nan)
+
+    return pick(last), pick(previous)
+
+
+def column_means(values: np.ndarray) -> np.ndarray:
+    present = ~np.isnan(values)
+    counts = present.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, np.where(present, values, 0.0).sum(axis=0) / counts, np.nan)
+
+
+def column_slopes(days: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Least-squares slope per day of every column over its non-missing points."""
+    present = ~np.isnan(values)
+    counts = present.sum(axis=0)
+    x = np.where(present, days[:, None], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_centered = np.where(present, days[:, None] - x.sum(axis=0) / counts, 0.0)
+        y_centered = np.where(present, values - column_means(values), 0.0)
+        slopes = (x_centered * y_centered).sum(axis=0) / (x_centered ** 2).sum(axis=0)
+    # One point, or all points at one instant, has no trend
+    return np.where((counts >= 2) & np.isfinite(slopes), slopes, np.nan)
+
+
+class RegionStats:
+    """Sorted non-missing values of every metric across a region's samples."""
+
+    def __init__(self, columns: List[np.ndarray], count: int, watermark: Optional[datetime]):
+        self.columns = columns
+        self.count = count
+        self.watermark = watermark   # newest sample included
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, watermark: Optional[datetime]) -> "RegionStats":
+        return cls([np.sort(column[~np.isnan(column)]) for column in values.T], len(values), watermark)
+
+    def extended(self, values: np.ndarray, watermark: datetime) -> "RegionStats":
+        """A copy with more samples merged in; the cached entry is never mutated."""
+        columns = []
+        for column, new in zip(self.columns, values.T):
+            new = np.sort(new[~np.isnan(new)])
+            columns.append(np.insert(column, np.searchsorted(column, new), new))
+        if self.watermark is not None:
+            watermark = max(self.watermark, watermark)
+        return RegionStats(columns, self.count + len(values), watermark)
+
+    def quartiles(self) -> np.ndarray:
+        """(metrics x 3) p25/p50/p75, NaN for metrics nobody measured."""
+        return np.array([
+            np.percentile(column, [25, 50, 75]) if len(column) else np.full(3, np.nan)
+            for column in self.columns
+        ])
+
+    def ranks(self, latest: np.ndarray) -> np.ndarray:
+        return np.array([
+            percentile_of(column, value) if len(column) and not np.isnan(value) else np.nan
+            for column, value in zip(self.columns, latest)
+        ])
+
+
+class RegionCache:
+    """Per-process LRU of region statistics, refreshed past a watermark."""
+
+    def __init__(self, settings: SoilSettings = soil_settings):
+        self._entries = LRUCache(max_entries=settings.SOIL_REGION_CACHE_SIZE)
+        self.hits = 0
+        self.refreshes = 0
+        self.reloads = 0
+
+    async def get(self, db: AsyncSession, region: str) -> RegionStats:
+        count, newest = (await db.execute(
+            select(func.count(), func.max(SoilAnalysis.created_at)).where(SoilAnalysis.region == region)
+        )).one()
+        newest = as_utc(newest)
+        stats = self._entries.get(region)
+        if stats is not None and stats.count == count and stats.watermark == newest:
+            self.hits += 1
+            return stats
+
+        if stats is not None and stats.watermark is not None and count > stats.count:
+            rows = (await db.execute(
+                select(*_COLUMNS).where(SoilAnalysis.region == region, SoilAnalysis.created_at > stats.watermark)
+            )).all()
+            # A sample committed late behind the watermark breaks the count; reload then
+            if stats.count + len(rows) == count:
+                stats = stats.extended(as_matrix(rows), newest)
+                self._entries.set(region, stats)
+                self.refreshes += 1
+                return stats
+
+        rows = (await db.execute(select(*_COLUMNS).where(SoilAnalysis.region == region))).all()
+        stats = RegionStats.from_values(as_matrix(rows), newest)
+        self._entries.set(region, stats)
+        self.reloads += 1
+        return stats
+
+    def add(self, sample: SoilAnalysis):
+        """Fold a sample just committed by this process into its cached region."""
+        stats = self._entries.get(sample.region) if sample.region else None
+        if stats is not None:
+            values = as_matrix([[getattr(sample, metric) for metric in METRICS]])
+            self._entries.set(sample.region, stats.extended(values, as_utc(sample.created_at)))
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"regions": len(self._entries), "hits": self.hits, "refreshes": self.refreshes, "reloads": self.reloads}
+
+
+soil_regions = RegionCache()
+
+
+def _value(x) -> Optional[float]:
+    return None if np.isnan(x) else round(float(x), 4)
+
+
+def analyze(
+    times: np.ndarray,
+    values: np.ndarray,
+    region: Optional[str],
+    region_stats: Optional[RegionStats],
+    deltas: int,
+    settings: SoilSettings = soil_settings,
+) -> SoilAnalyticsResponse:
+    """Summarize a user's samples (oldest first) against their region."""
+    latest, previous = last_two(values)
+    days = (times - times[-1]) / SECONDS_PER_DAY if len(times) else times
+    slopes = column_slopes(days, values)
+    low, high = OPTIMAL_BANDS.T
+    with np.errstate(invalid="ignore"):
+        status = np.select([np.isnan(latest), latest < low, latest > high], ["unknown", "low", "high"], "optimal")
+        projected = latest + slopes * settings.SOIL_TREND_HORIZON_DAYS
+        declining = (status == "optimal") & (slopes < 0) & (projected < low)
+    quartiles = region_stats.quartiles() if region_stats else np.full((len(METRICS), 3), np.nan)
+    ranks = region_stats.ranks(latest) if region_stats else np.full(len(METRICS), np.nan)
+    means = column_means(values)
+
+    metrics, recommendations = [], []
+    for i, metric in enumerate(METRICS):
+        metrics.append(SoilMetricSummary(
+            metric=metric,
+            latest=_value(latest[i]),
+            delta=_value(latest[i] - previous[i]),
+            mean=_value(means[i]),
+            trend_per_30d=_value(slopes[i] * 30),
+            status=status[i],
+            region_percentile=_value(ranks[i]),
+            region_p25=_value(quartiles[i, 0]),
+            region_p50=_value(quartiles[i, 1]),
+            region_p75=_value(quartiles[i, 2]),
+        ))
+        if status[i] in ("low", "high"):
+            issue = "deficient" if status[i] == "low" else "excess"
+            recommendations.append(SoilRecommendation(metric=metric, issue=issue, message=ADVICE[(metric, issue)]))
+        elif declining[i]:
+            recommendations.append(SoilRecommendation(
+                metric=metric,
+                issue="declining",
+                message=(
+                    f"{LABELS[metric]} is falling and may drop below {low[i]:g} within "
+                    f"{settings.SOIL_TREND_HORIZON_DAYS:g} days. {ADVICE[(metric, 'deficient')]}"
+                ),
+            ))
+
+    changes = np.diff(values, axis=0)[-deltas:] if deltas else values[:0]
+    change_times = times[1:][-deltas:] if deltas else times[:0]
+    return SoilAnalyticsResponse(
+        region=region,
+        samples=len(values),
+        region_samples=region_stats.count if region_stats else 0,
+        metrics=metrics,
+        deltas=[
+            SoilDelta(
+                created_at=datetime.fromtimestamp(float(at), timezone.utc),
+                **{metric: _value(change) for metric, change in zip(METRICS, row)},
+            )
+            for at, row in zip(change_times, changes)
+        ],
+        recommendations=recommendations,
+    )
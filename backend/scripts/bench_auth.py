@@ -0,0 +1,58 @@
+"""Benchmark per-request auth overhead of the get_current_user dependency.
+
+Usage: python scripts/bench_auth.py [--requests 20000] [--tokens 100]
+
+Replays a pool of distinct access tokens (think: concurrent sessions) through
+get_current_user for each available JWT backend, with the verified-token
+cache disabled and enabled.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+# Add backend directory to path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api import deps
+from app.utils import jwt as jwt_utils
+from app.utils.jwt import JoseBackend, PyJWTBackend, VerifiedTokenCache
+
+
+def backends():
+    yield JoseBackend()
+    try:
+        yield PyJWTBackend()
+    except RuntimeError:
+        print("pyjwt not installed; skipping that backend")
+
+
+async def run(tokens, requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        await deps.get_current_user(tokens[i % len(tokens)])
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    tokens = [
+        jwt_utils.create_access_token({"sub": str(uuid.uuid4()), "role": "user"})
+        for _ in range(args.tokens)
+    ]
+    for backend in backends():
+        jwt_utils.jwt_backend = backend
+        for label, cache in (("uncached", VerifiedTokenCache(0)), ("cached", VerifiedTokenCache(4096))):
+            deps.verified_tokens = cache
+            elapsed = asyncio.run(run(tokens, args.requests))
+            print(f"{backend.name:>6} {label:>9}: {elapsed / args.requests * 1e6:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Load-test WebSocket chat fan-out with thousands of concurrent sockets.
+
+Usage: python scripts/bench_chat_ws.py [--sockets 2000] [--rooms 20] [--messages 20] [--slow 50]
+
+Starts uvicorn in a subprocess against a throwaway SQLite database (or
+DATABASE_URL), opens ``--sockets`` connections spread over ``--rooms``
+conversations and sends ``--messages`` per room. Reports end-to-end fan-out
+latency and, via /internal/metrics, how many deliveries the hub dropped or
+disconnected. ``--slow`` sockets never read, to show that stalled clients do
+not hold back the rest. Tune with CHAT_SEND_QUEUE_SIZE / CHAT_SLOW_CONSUMER.
+Tune persistence with CHAT_FLUSH_MAX_BATCH / CHAT_FLUSH_INTERVAL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Add backend directory to path so we can import app modules
+sys.path.append(BACKEND_DIR)
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+# Lets the benchmark read /internal/metrics from the server it starts
+os.environ.setdefault("INTERNAL_METRICS_TOKEN", secrets.token_hex(16))
+
+import httpx
+import websockets
+
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.conversation import Conversation, ConversationParticipant
+from app.models.users import User
+from app.utils.jwt import create_access_token
+
+
+def seed(rooms: int):
+    """One member per room; every socket in a room connects as that member."""
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        members = [User(email=f"chat{n}@example.com", password_hash="x", accept_terms=True) for n in range(rooms)]
+        db.add_all(members)
+        db.flush()
+        conversations = [
+            Conversation(title=f"room {n}", participants=[ConversationParticipant(user_id=user.id)])
+            for n, user in enumerate(members)
+        ]
+        db.add_all(conversations)
+        db.commit()
+        return [(c.id, create_access_token({"sub": str(u.id)})) for c, u in zip(conversations, members)]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_until_up(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(base_url + "/")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def pct(samples, q):
+    return statistics.quantiles(samples, n=100)[q - 1] * 1000 if len(samples) > 1 else 0.0
+
+
+async def load(args, rooms, port):
+    ws_url = f"ws://127.0.0.1:{port}/api/v1/chats"
+    latencies = []
+    received = 0
+    expected_per_socket = args.messages
+
+    async def reader(ws):
+        nonlocal received
+        async for frame in ws:
+            event = json.loads(frame)
+            if event.get("type") == "message":
+                latencies.append(time.time() - json.loads(event["content"])["sent"])
+                received += 1
+
+    # Connect in waves so the accept backlog is not the bottleneck
+    sockets, slow = [], []
+    for n in range(args.sockets + args.slow):
+        chat_id, token = rooms[n % len(rooms)]
+        is_slow = n >= args.sockets
+        # A one-frame receive queue stops reading from TCP, building real backpressure
+        ws = await websockets.connect(
+            f"{ws_url}/{chat_id}/ws?token={token}", max_queue=1 if is_slow else 1024, open_timeout=60
+        )
+        (slow if is_slow else sockets).append(ws)
+        if n % 200 == 199:
+            await asyncio.sleep(0)
+    print(f"connected {len(sockets):,} sockets (+{len(slow)} stalled) over {len(rooms)} rooms")
+
+    readers = [asyncio.create_task(reader(ws)) for ws in sockets]
+    senders = sockets[:len(rooms)]
+    started = time.perf_counter()
+    for m in range(args.messages):
+        await asyncio.gather(*(
+            ws.send(json.dumps({"content": json.dumps({"sent": time.time(), "m": m})})) for ws in senders
+        ))
+        await asyncio.sleep(args.interval)
+
+    expected = len(sockets) * expected_per_socket
+    deadline = time.monotonic() + 30
+    while received < expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    elapsed = time.perf_counter() - started
+
+    for task in readers:
+        task.cancel()
+    await asyncio.gather(*(ws.close() for ws in sockets + slow), return_exceptions=True)
+
+    async with httpx.AsyncClient() as client:
+        metrics = (await client.get(
+            f"http://127.0.0.1:{port}/internal/metrics",
+            headers={"X-Internal-Token": os.environ["INTERNAL_METRICS_TOKEN"]},
+        )).json()
+
+    print(f"deliveries: {received:,}/{expected:,} to healthy sockets in {elapsed:.1f}s "
+          f"({received / elapsed:,.0f}/s)")
+    print(f"fan-out latency: p50 {pct(latencies, 50):7.1f} ms  p95 {pct(latencies, 95):7.1f} ms  "
+          f"p99 {pct(latencies, 99):7.1f} ms")
+    print(f"hub: {metrics['chat_hub']}")
+    writer = metrics["chat_writer"]
+    flush = writer["flush_latency"]
+    print(f"writer: flushed {writer['flushed']:,} rows in {flush['count']:,} batches, "
+          f"peak queue {writer['peak_pending']:,}, flush p50 {flush['p50_ms']:.1f} ms p99 {flush['p99_ms']:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sockets", type=int, default=2000)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=20, help="Messages sent per room")
+    parser.add_argument("--interval", type=float, default=0.2, help="Seconds between sends")
+    parser.add_argument("--slow", type=int, default=50, help="Extra sockets that never read")
+    args = parser.parse_args()
+
+    rooms = seed(args.rooms)
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+
+    async def run():
+        await wait_until_up(f"http://127.0.0.1:{port}")
+        await load(args, rooms, port)
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
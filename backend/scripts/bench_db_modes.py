@@ -0,0 +1,123 @@
+"""Compare requests/sec of the product listing in sync and async DB mode.
+
+Usage: python scripts/bench_db_modes.py [--requests 2000] [--concurrency 50]
+
+Seeds a throwaway SQLite database, then drives the listing endpoint in-process
+with httpx:
+  * sync:  a plain ``def`` route using ``SessionLocal`` (runs in the threadpool)
+  * async: the real ``GET /api/v1/products/`` route using ``AsyncSessionLocal``
+Point DATABASE_URL at Postgres to benchmark against a real server instead.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from math import ceil
+
+# Add backend directory to path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.session import SessionLocal, async_engine, engine
+from app.main import app as async_app
+from app.models.product import Product
+from app.models.users import User, UserRole
+from app.schemas.product import PaginatedProductResponse
+
+
+def seed(products: int):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        dealer = User(
+            email="bench@example.com", password_hash="x", role=UserRole.DEALER, accept_terms=True
+        )
+        db.add(dealer)
+        db.flush()
+        db.add_all(
+            Product(
+                name=f"Product {i}",
+                price=random.uniform(10.0, 500.0),
+                quantity=random.randint(10, 100),
+                category=random.choice(["Seeds", "Tools", "Fertilizers", "Pesticides"]),
+                dealer_id=dealer.id,
+            )
+            for i in range(products)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_sync_app() -> FastAPI:
+    sync_app = FastAPI()
+
+    def get_sync_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @sync_app.get("/api/v1/products/", response_model=PaginatedProductResponse)
+    def list_products(page: int = 1, per_page: int = 20, db: Session = Depends(get_sync_db)):
+        query = select(Product).where(Product.is_active == True)
+        total = db.scalar(select(func.count()).select_from(query.subquery()))
+        items = db.scalars(query.offset((page - 1) * per_page).limit(per_page)).unique().all()
+        return {
+            "items": items,
+            "total": total,
+            "page": page,
+            "pages": ceil(total / per_page),
+            "per_page": per_page,
+        }
+
+    return sync_app
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(requests))
+
+        async def worker():
+            for i in remaining:
+                response = await client.get("/api/v1/products/", params={"page": i % 10 + 1})
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    # Release aiosqlite/asyncpg connections before the loop goes away
+    await async_engine.dispose()
+    return requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    seed(args.products)
+    for mode, app in (("sync", build_sync_app()), ("async", async_app)):
+        rps = asyncio.run(run(app, args.requests, args.concurrency))
+        print(f"{mode:>5}: {rps:8.1f} req/s ({args.requests} requests, concurrency {args.concurrency})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Benchmark disease-detection throughput with and without micro-batching.
+
+Usage: python scripts/bench_disease_detect.py [--jobs 500] [--delay 0.05] [--batch 16]
+
+Runs the app in-process against a throwaway SQLite database (or
+DATABASE_URL) with the stub model charging ``--delay`` seconds per forward
+pass, as a CPU model would. Submits ``--jobs`` detections through the API,
+waits for all of them, and repeats with batches of one for comparison.
+Images are served by an in-memory fetcher, so only queueing, inference and
+result writes are measured. Finally resubmits the first run's images, which
+the result cache answers without queueing a job.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add backend directory to path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+import httpx
+from sqlalchemy import func, select
+
+from app.db.base import Base
+from app.db.pool import Timings
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.main import app
+from app.models.crop import DiseaseDetection
+from app.models.users import User
+from app.utils.detection import detection_pipeline
+from app.utils.detection_cache import detection_cache
+from app.utils.inference import StubModel
+from app.utils.jwt import create_access_token
+
+
+def seed() -> str:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        farmer = User(email="bench@example.com", password_hash="x", accept_terms=True)
+        db.add(farmer)
+        db.commit()
+        return create_access_token({"sub": str(farmer.id)})
+
+
+async def fetch(url: str) -> bytes:
+    return url.encode()
+
+
+def client(token: str) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench", headers={"Authorization": f"Bearer {token}"}
+    )
+
+
+async def run(jobs: int, batch: int, token: str) -> float:
+    detection_pipeline.settings = detection_pipeline.settings.model_copy(update={"DETECTION_MAX_BATCH": batch})
+    detection_pipeline.job_latency = Timings()
+    await detection_pipeline.start()
+    try:
+        async with client(token) as api:
+            started = time.perf_counter()
+            for start in range(0, jobs, 50):
+                await asyncio.gather(*(
+                    api.post("/api/v1/crop/disease-detect", json={"image_url": f"https://img/{batch}/{n}.jpg"})
+                    for n in range(start, min(start + 50, jobs))
+                ))
+            while True:
+                async with AsyncSessionLocal() as db:
+                    pending = await db.scalar(
+                        select(func.count()).select_from(DiseaseDetection)
+                        .where(DiseaseDetection.status.in_(("queued", "running")))
+                    )
+                if not pending:
+                    return time.perf_counter() - started
+                await asyncio.sleep(0.01)
+    finally:
+        await detection_pipeline.stop()
+
+
+async def main(args):
+    token = seed()
+    detection_pipeline.model = StubModel(delay=args.delay)
+    detection_pipeline.fetch = fetch
+    try:
+        for batch in (args.batch, 1):
+            elapsed = await run(args.jobs, batch, token)
+            stats = detection_pipeline.stats()
+            print(
+                f"max batch {batch:>3}: {args.jobs} jobs in {elapsed:.2f}s "
+                f"({args.jobs / elapsed:.0f} jobs/s), job latency p95 {stats['job_latency']['p95_ms']:.0f} ms"
+            )
+
+        # Resubmissions of the first run's images are answered from the result cache
+        await detection_pipeline.start()
+        async with client(token) as api:
+            started = time.perf_counter()
+            for n in range(args.jobs):
+                response = await api.post(
+                    "/api/v1/crop/disease-detect", json={"image_url": f"https://img/{args.batch}/{n}.jpg"}
+                )
+                assert response.json()["status"] == "completed"
+            elapsed = time.perf_counter() - started
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            for n in range(args.jobs):
+                await detection_pipeline.lookup(db, f"https://img/{args.batch}/{n}.jpg")
+            lookup = time.perf_counter() - started
+        await detection_pipeline.stop()
+        print(
+            f"duplicates: {args.jobs} resubmissions in {elapsed:.2f}s ({elapsed / args.jobs * 1000:.2f} ms per request, "
+            f"{lookup / args.jobs * 1e6:.0f} us per cache lookup), cache {detection_cache.stats()}"
+        )
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds per forward pass")
+    parser.add_argument("--batch", type=int, default=16)
+    asyncio.run(main(parser.parse_args()))
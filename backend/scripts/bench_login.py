@@ -0,0 +1,108 @@
+"""Benchmark login throughput under concurrency.
+
+Usage: python scripts/bench_login.py [--users 50] [--logins 400] [--concurrency 64]
+
+Fires concurrent logins at the app in-process and, alongside, probes a cheap
+endpoint to show whether the storm starves other routes. Tune with
+PASSWORD_SCHEME / PASSWORD_ROUNDS / PASSWORD_HASH_WORKERS / PASSWORD_HASH_MAX_PENDING.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add backend directory to path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+import httpx
+
+from app.db.base import Base
+from app.db.session import SessionLocal, async_engine, engine
+from app.main import app
+from app.models.users import User
+from app.utils.security import hash_password, password_hasher, password_settings
+
+PASSWORD = "Password123!"
+
+
+def seed(users: int):
+    Base.metadata.create_all(bind=engine)
+    hashed = hash_password(PASSWORD)
+    with SessionLocal() as db:
+        db.add_all(User(email=f"user{n}@example.com", password_hash=hashed, accept_terms=True) for n in range(users))
+        db.commit()
+
+
+def pct(samples, q):
+    return statistics.quantiles(samples, n=100)[q - 1] * 1000 if len(samples) > 1 else 0.0
+
+
+async def storm(args):
+    transport = httpx.ASGITransport(app=app)
+    statuses = {}
+    login_latency, probe_latency = [], []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(n):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/v1/auth/login",
+                    json={"email": f"user{n % args.users}@example.com", "password": PASSWORD},
+                )
+                login_latency.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/")
+                probe_latency.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(n) for n in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    ok = statuses.get(200, 0)
+    print(f"scheme={password_settings.PASSWORD_SCHEME} workers={password_settings.PASSWORD_HASH_WORKERS} "
+          f"max_pending={password_settings.PASSWORD_HASH_MAX_PENDING} concurrency={args.concurrency}")
+    print(f"statuses: {dict(sorted(statuses.items()))}")
+    print(f"throughput: {ok / elapsed:8.1f} successful logins/s")
+    print(f"login latency: p50 {pct(login_latency, 50):7.1f} ms  p95 {pct(login_latency, 95):7.1f} ms")
+    print(f"probe latency: p50 {pct(probe_latency, 50):7.1f} ms  p95 {pct(probe_latency, 95):7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    seed(args.users)
+
+    async def run():
+        try:
+            await storm(args)
+        finally:
+            password_hasher.shutdown()
+            await async_engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark price alert evaluation against a large in-memory alert index.
+
+Usage: python scripts/bench_price_alerts.py [--alerts 1000000] [--products 10000] [--reports 100000]
+
+Builds an AlertIndex (the structure behind POST /prices/products/{id}/report)
+and times matching random price reports against it, compared with scanning
+the product's alerts linearly. Database work for fired alerts is excluded.
+"""
+import argparse
+import random
+import statistics
+import sys
+import os
+import time
+import uuid
+from decimal import Decimal
+
+# Add backend directory to path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.alerts import AlertIndex, to_cents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--reports", type=int, default=100_000)
+    args = parser.parse_args()
+
+    products = [uuid.uuid4() for _ in range(args.products)]
+    # Skew alerts toward popular products, as real watchlists are
+    weights = [1 / (rank + 1) for rank in range(args.products)]
+    index = AlertIndex()
+    flat = {p: [] for p in products}
+    started = time.perf_counter()
+    for product_id in random.choices(products, weights=weights, k=args.alerts):
+        alert_id = uuid.uuid4()
+        # Users watch for moves away from the current price (100.00)
+        direction = random.choice(("above", "below"))
+        cents = random.randint(10_001, 15_000) if direction == "above" else random.randint(5_000, 9_999)
+        threshold = Decimal(cents) / 100
+        index.add(alert_id, product_id, direction, threshold)
+        flat[product_id].append((alert_id, direction, to_cents(threshold)))
+    print(f"built index of {len(index):,} alerts in {time.perf_counter() - started:.1f}s "
+          f"(largest product has {max(len(v) for v in flat.values()):,})")
+
+    reports = [
+        (random.choices(products, weights=weights)[0], Decimal(random.randint(9_900, 10_100)) / 100)
+        for _ in range(args.reports)
+    ]
+
+    def run(label, match):
+        samples = []
+        for product_id, price in reports:
+            started = time.perf_counter()
+            match(product_id, price)
+            samples.append(time.perf_counter() - started)
+        p50, p99 = statistics.quantiles(samples, n=100)[49], statistics.quantiles(samples, n=100)[98]
+        print(f"{label:>8}: p50 {p50 * 1e6:8.1f} us  p99 {p99 * 1e6:8.1f} us  max {max(samples) * 1e6:8.1f} us")
+
+    def scan(product_id, price):
+        cents = to_cents(price)
+        return [
+            a for a, direction, t in flat[product_id]
+            if (direction == "above" and t <= cents) or (direction == "below" and t >= cents)
+        ]
+
+    run("bisect", lambda product_id, price: index.match(product_id, price, price))
+    run("scan", scan)
+
+
+if __name__ == "__main__":
+    main()
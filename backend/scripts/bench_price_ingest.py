@@ -0,0 +1,149 @@
+"""Benchmark price time-series ingest and history reads.
+
+Usage: python scripts/bench_price_ingest.py [--observations 2000000] [--products 200]
+
+Ingests observations through PriceObservation.ingest (the code path behind
+POST /prices/products/{id}/report) in report-sized batches, then times raw
+range reads and daily/weekly OHLC downsampling for one product, latest
+prices for every product (per-product newest-first scans vs latest_prices),
+and batch trend prediction for every product, cold and cached.
+Uses a throwaway SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+# Add backend directory to path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+from sqlalchemy import insert, select
+
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.models.price import LatestPrice, PriceObservation
+from app.models.product import Product
+from app.models.users import User, UserRole
+from app.utils.price_analytics import predict, price_models
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def seed_products(count: int):
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        dealer = User(email="bench@example.com", password_hash="x", role=UserRole.DEALER, accept_terms=True)
+        db.add(dealer)
+        db.commit()
+        ids = [uuid.uuid4() for _ in range(count)]
+        db.execute(insert(Product), [
+            {"id": i, "name": f"Product {n}", "price": 100, "quantity": 1, "category": "Grains", "dealer_id": dealer.id}
+            for n, i in enumerate(ids)
+        ])
+        db.commit()
+    return ids
+
+
+async def ingest(product_ids, observations: int, batch: int, days: int):
+    step = timedelta(days=days) / max(observations // len(product_ids), 1)
+    prices = {p: 100.0 for p in product_ids}
+    clocks = {p: START for p in product_ids}
+    started = time.perf_counter()
+    done = 0
+    async with AsyncSessionLocal() as db:
+        while done < observations:
+            product_id = random.choice(product_ids)
+            rows = []
+            for _ in range(min(batch, observations - done)):
+                prices[product_id] = max(1.0, prices[product_id] * random.uniform(0.98, 1.02))
+                clocks[product_id] += step
+                rows.append((clocks[product_id], Decimal(f"{prices[product_id]:.2f}")))
+            done += await PriceObservation.ingest(db, product_id, rows)
+            await db.commit()
+            print(f"\ringested {done:,}/{observations:,}", end="", flush=True)
+    elapsed = time.perf_counter() - started
+    print(f"\ningest: {observations / elapsed:,.0f} rows/s ({elapsed:.1f}s)")
+
+
+async def time_reads(product_id, days: int, repeat: int):
+    dialect = async_engine.dialect.name
+    start, end = START + timedelta(days=days // 4), START + timedelta(days=days // 2)
+    queries = {
+        "raw 1000": PriceObservation.history(product_id, start, end).limit(1000),
+        "day ohlc": PriceObservation.ohlc(product_id, None, None, "day", dialect),
+        "week ohlc": PriceObservation.ohlc(product_id, None, None, "week", dialect),
+    }
+    async with AsyncSessionLocal() as db:
+        for label, query in queries.items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                rows = (await db.execute(query)).all()
+            elapsed = (time.perf_counter() - started) / repeat
+            print(f"{label:>9}: {elapsed * 1000:8.2f} ms/query ({len(rows)} rows)")
+
+
+async def time_latest(product_ids, repeat: int):
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for product_id in product_ids:
+                await db.scalar(
+                    select(PriceObservation.price)
+                    .where(PriceObservation.product_id == product_id)
+                    .order_by(PriceObservation.observed_at.desc())
+                    .limit(1)
+                )
+        scan = (time.perf_counter() - started) / repeat
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            (await db.scalars(select(LatestPrice).where(LatestPrice.product_id.in_(product_ids)))).all()
+        table = (time.perf_counter() - started) / repeat
+    print(f"latest x{len(product_ids)}: {scan * 1000:8.2f} ms per-product scans, {table * 1000:8.2f} ms latest_prices")
+
+
+async def time_predict(product_ids):
+    async with AsyncSessionLocal() as db:
+        for label in ("cold", "cached"):
+            started = time.perf_counter()
+            fitted = await price_models.get_many(db, product_ids, "ewm")
+            [predict(f.model, 7) for f in fitted.values()]
+            elapsed = time.perf_counter() - started
+            print(f"predict x{len(fitted)} {label:>6}: {elapsed * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--observations", type=int, default=2_000_000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=5_000, help="Observations per report")
+    parser.add_argument("--days", type=int, default=365, help="Time span covered per product")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    product_ids = seed_products(args.products)
+
+    async def run():
+        try:
+            await ingest(product_ids, args.observations, args.batch, args.days)
+            await time_reads(product_ids[0], args.days, args.repeat)
+            await time_latest(product_ids, args.repeat)
+            await time_predict(product_ids)
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark catalog onboarding: one POST per product vs the bulk import.
+
+Usage: python scripts/bench_product_import.py [--products 50000] [--single 500]
+
+Runs the app in-process against a throwaway SQLite database (or
+DATABASE_URL). Times ``--single`` individual creates and extrapolates, then
+imports ``--products`` rows as CSV in one request and exports them back.
+Tune with PRODUCT_IMPORT_BATCH_SIZE.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add backend directory to path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+import httpx
+
+from app.db.base import Base
+from app.db.session import SessionLocal, async_engine, engine
+from app.main import app
+from app.models.users import User, UserRole
+from app.utils.jwt import create_access_token
+
+CATEGORIES = ["Seeds", "Tools", "Fertilizers", "Pesticides", "Feeds", "Irrigation"]
+
+
+def seed() -> str:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        dealer = User(email="bench@example.com", password_hash="x", role=UserRole.DEALER, accept_terms=True)
+        db.add(dealer)
+        db.commit()
+        return create_access_token({"sub": str(dealer.id), "role": "dealer"})
+
+
+def product(n: int) -> dict:
+    return {
+        "name": f"Product {n}",
+        "description": "Bulk imported",
+        "price": f"{random.uniform(1, 500):.2f}",
+        "quantity": random.randint(0, 100),
+        "category": random.choice(CATEGORIES),
+    }
+
+
+async def csv_body(products: int):
+    yield b"name,description,price,quantity,category\n"
+    for start in range(0, products, 1000):
+        yield "".join(
+            "{name},{description},{price},{quantity},{category}\n".format(**product(n))
+            for n in range(start, min(start + 1000, products))
+        ).encode()
+
+
+async def run(args, token):
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=None) as client:
+        started = time.perf_counter()
+        for n in range(args.single):
+            await client.post("/api/v1/products/", json=product(n))
+        per_row = (time.perf_counter() - started) / args.single
+        print(f"single creates: {per_row * 1000:7.2f} ms/product "
+              f"(~{per_row * args.products / 60:.1f} min for {args.products:,})")
+
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/v1/products/import", content=csv_body(args.products), headers={"Content-Type": "text/csv"}
+        )
+        elapsed = time.perf_counter() - started
+        summary = response.text.splitlines()[-1]
+        print(f"bulk import:    {elapsed:7.2f} s for {args.products:,} ({args.products / elapsed:,.0f} rows/s) {summary}")
+
+        started = time.perf_counter()
+        exported = 0
+        async with client.stream("GET", "/api/v1/products/export", params={"format": "csv"}) as response:
+            async for line in response.aiter_lines():
+                exported += 1
+        elapsed = time.perf_counter() - started
+        print(f"export:         {elapsed:7.2f} s for {exported - 1:,} rows ({(exported - 1) / elapsed:,.0f} rows/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--single", type=int, default=500, help="Individual creates to time")
+    args = parser.parse_args()
+
+    token = seed()
+
+    async def go():
+        try:
+            await run(args, token)
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(go())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark product search: ILIKE '%term%' scan vs the full-text index.
+
+Usage: python scripts/bench_product_search.py [--products 1000000] [--queries 50]
+
+Seeds a throwaway SQLite catalog (or the database in DATABASE_URL when set,
+e.g. Postgres after `alembic upgrade head`) and times both query shapes for
+a set of search terms.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+# Add backend directory to path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+from faker import Faker
+from sqlalchemy import insert, or_, select
+
+from app.db.base import Base
+from app.db.search import apply_search
+from app.db.session import SessionLocal, engine
+from app.models.product import Product
+from app.models.users import User, UserRole
+
+CATEGORIES = ["Seeds", "Tools", "Fertilizers", "Pesticides", "Feeds", "Irrigation"]
+TERMS = ["maize", "tomato seed", "fert", "sprayer", "organic", "drip irrigation", "hoe"]
+
+
+def seed(products: int, batch: int = 10_000):
+    fake = Faker()
+    Base.metadata.create_all(bind=engine)
+    words = [fake.word() for _ in range(2_000)] + [t for term in TERMS for t in term.split()]
+    with SessionLocal() as db:
+        dealer = User(email="bench@example.com", password_hash="x", role=UserRole.DEALER, accept_terms=True)
+        db.add(dealer)
+        db.commit()
+        for start in range(0, products, batch):
+            rows = [
+                {
+                    "id": uuid.uuid4(),
+                    "name": " ".join(random.choices(words, k=3)).title(),
+                    "description": " ".join(random.choices(words, k=20)),
+                    "price": round(random.uniform(10.0, 500.0), 2),
+                    "quantity": random.randint(0, 100),
+                    "category": random.choice(CATEGORIES),
+                    "dealer_id": dealer.id,
+                    "is_active": True,
+                }
+                for _ in range(min(batch, products - start))
+            ]
+            db.execute(insert(Product), rows)
+            db.commit()
+            print(f"\rseeded {start + len(rows):,}/{products:,}", end="", flush=True)
+    print()
+
+
+def time_queries(label: str, build, queries: int):
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        for i in range(queries):
+            db.execute(build(TERMS[i % len(TERMS)]).limit(20)).all()
+        elapsed = time.perf_counter() - started
+    print(f"{label:>9}: {elapsed / queries * 1000:8.2f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the catalog already in DATABASE_URL")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        seed(args.products)
+
+    base = select(Product.id).where(Product.is_active == True)
+    dialect = engine.dialect.name
+
+    def ilike(term):
+        pattern = f"%{term}%"
+        return base.where(or_(Product.name.ilike(pattern), Product.description.ilike(pattern)))
+
+    def full_text(term):
+        query, rank = apply_search(base, term, dialect)
+        return query.order_by(rank) if rank is not None else query
+
+    time_queries("ilike", ilike, args.queries)
+    time_queries("full-text", full_text, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Recompute dealer_stats from the products table.
+
+Usage: python scripts/reconcile_dealer_stats.py
+
+Product writes keep the counters current incrementally; run this after bulk
+imports or direct SQL edits, or periodically from cron to repair any drift.
+"""
+import os
+import sys
+import time
+
+# Add backend directory to path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+import app.db.base  # noqa: F401  (register every model)
+from app.db.session import SessionLocal
+from app.models.dealer import DealerStats
+
+
+def main():
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        DealerStats.rebuild(db)
+        db.commit()
+        dealers = db.scalar(select(func.count()).select_from(DealerStats))
+    print(f"Reconciled stats for {dealers} dealers in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
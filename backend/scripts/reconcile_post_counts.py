@@ -0,0 +1,34 @@
+"""Recompute community_posts.likes_count and comments_count from their tables.
+
+Usage: python scripts/reconcile_post_counts.py
+
+Likes are counted through a per-worker delta buffer; deltas still buffered
+when a worker dies are lost. Run this to repair the counters (deltas being
+flushed at the same moment may be counted twice until the next run, so
+prefer a quiet period), then let the feed rescoring pick up the new counts.
+"""
+import os
+import sys
+import time
+
+# Add backend directory to path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+import app.db.base  # noqa: F401  (register every model)
+from app.db.session import SessionLocal
+from app.models.community import Post
+
+
+def main():
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        Post.recount(db)
+        db.commit()
+        posts = db.scalar(select(func.count()).select_from(Post))
+    print(f"Reconciled counts for {posts} posts in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
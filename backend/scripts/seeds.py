@@ -11,7 +11,7 @@ from app.db.session import SessionLocal
 from app.models.users import User, UserRole
 from app.models.product import Product
 from app.models.community import Post, Comment
-from app.models.dealer import Dealer
+from app.models.dealer import Dealer, DealerStats
 from app.utils.security import hash_password
 
 fake = Faker()
@@ -106,6 +106,8 @@ def seed_data():
                 )
                 db.add(comment)
 
+        db.flush()
+        DealerStats.rebuild(db)
         db.commit()
         print("Seeding complete!")
 